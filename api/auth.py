@@ -1,16 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import httpx
 import secrets
 from urllib.parse import urlencode
 from loguru import logger
 from fastapi.responses import HTMLResponse
 import uuid
+import asyncio
+from typing import Optional
 
-from database.database import get_db
+from database.database import get_async_db
 from database.models import UserToken, EmployerInfo
-from database.encryption import encrypt_token, decrypt_token
-from config import HH_CLIENT_ID, HH_CLIENT_SECRET
+from database.encryption import encrypt_tokens_async, decrypt_token_async
+from config import HH_CLIENT_ID, HH_CLIENT_SECRET, HH_API_URL
 
 router = APIRouter()
 
@@ -18,6 +21,27 @@ router = APIRouter()
 AUTH_URL = "https://hh.ru/oauth/authorize"
 TOKEN_URL = "https://hh.ru/oauth/token"
 REDIRECT_URI = "http://localhost:8000/auth/callback"
+ME_URL = f"{HH_API_URL}/me"
+
+# Общий HTTP-клиент с пулом соединений к hh.ru
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Возвращает общий асинхронный HTTP-клиент, создавая его при первом обращении."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    """Закрывает общий HTTP-клиент."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 @router.get("/auth/login")
 async def login(x_extension_user_id: str = Header(...)):
@@ -41,7 +65,7 @@ async def login(x_extension_user_id: str = Header(...)):
         raise HTTPException(status_code=500, detail="Ошибка при генерации URL авторизации")
 
 @router.get("/auth/callback")
-async def callback(code: str, state: str, db: Session = Depends(get_db)):
+async def callback(code: str, state: str, db: AsyncSession = Depends(get_async_db)):
     """Обрабатывает callback от HH.ru и сохраняет токены"""
     try:
         logger.info("Получен callback от HH.ru")
@@ -60,35 +84,42 @@ async def callback(code: str, state: str, db: Session = Depends(get_db)):
             
         logger.info(f"Получен extension_user_id: {extension_user_id}")
 
-        async with httpx.AsyncClient() as client:
-            # Получаем токены
-            token_response = await client.post(
-                TOKEN_URL,
-                data={
-                    "grant_type": "authorization_code",
-                    "client_id": HH_CLIENT_ID,
-                    "client_secret": HH_CLIENT_SECRET,
-                    "code": code,
-                    "redirect_uri": REDIRECT_URI
-                }
+        client = get_http_client()
+
+        # Получаем токены
+        token_response = await client.post(
+            TOKEN_URL,
+            data={
+                "grant_type": "authorization_code",
+                "client_id": HH_CLIENT_ID,
+                "client_secret": HH_CLIENT_SECRET,
+                "code": code,
+                "redirect_uri": REDIRECT_URI
+            }
+        )
+        
+        if token_response.status_code != 200:
+            error_detail = token_response.text
+            logger.error(f"Ошибка при получении токенов: {error_detail}")
+            raise HTTPException(
+                status_code=400,
+                detail=f"Ошибка при получении токенов: {error_detail}"
             )
             
-            if token_response.status_code != 200:
-                error_detail = token_response.text
-                logger.error(f"Ошибка при получении токенов: {error_detail}")
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Ошибка при получении токенов: {error_detail}"
-                )
-                
-            data = token_response.json()
-            access_token = data["access_token"]
-            refresh_token = data["refresh_token"]
-            logger.info("Токены успешно получены")
-            
+        data = token_response.json()
+        access_token = data["access_token"]
+        refresh_token = data["refresh_token"]
+        logger.info("Токены успешно получены")
+        
+        # Шифруем токены вне цикла событий, пока запрашивается информация о пользователе
+        encrypted_tokens_task = asyncio.ensure_future(
+            encrypt_tokens_async(access_token, refresh_token)
+        )
+        
+        try:
             # Получаем информацию о пользователе
             user_response = await client.get(
-                "https://api.hh.ru/me",
+                ME_URL,
                 headers={"Authorization": f"Bearer {access_token}"}
             )
             
@@ -99,87 +130,89 @@ async def callback(code: str, state: str, db: Session = Depends(get_db)):
                     status_code=400,
                     detail=f"Ошибка при получении информации о пользователе: {error_detail}"
                 )
-                
-            user_data = user_response.json()
-            user_id = str(user_data["id"])
-            logger.info(f"Получена информация о пользователе: {user_id}")
+        except BaseException:
+            # Ошибка шифрования не должна заменить исходную ошибку запроса
+            encrypted_tokens_task.cancel()
+            raise
+        encrypted_access_token, encrypted_refresh_token = await encrypted_tokens_task
             
-            # Создаем новую запись токена
-            db_token = UserToken(
+        user_data = user_response.json()
+        user_id = str(user_data["id"])
+        logger.info(f"Получена информация о пользователе: {user_id}")
+        
+        # Проверяем существующие токены для данного extension_user_id
+        existing_token = (await db.execute(
+            select(UserToken).where(UserToken.extension_user_id == extension_user_id)
+        )).scalars().first()
+        
+        if existing_token:
+            # Обновляем существующую запись
+            existing_token.user_id = user_id
+            existing_token.encrypted_access_token = encrypted_access_token
+            existing_token.encrypted_refresh_token = encrypted_refresh_token
+            logger.info(f"Обновлены токены для пользователя {user_id} (extension_user_id: {extension_user_id})")
+        else:
+            # Создаем новую запись
+            db.add(UserToken(
                 id=str(uuid.uuid4()),
                 user_id=user_id,
                 extension_user_id=extension_user_id,
-                encrypted_access_token=encrypt_token(access_token),
-                encrypted_refresh_token=encrypt_token(refresh_token)
-            )
-            
-            # Проверяем существующие токены для данного extension_user_id
-            existing_token = db.query(UserToken).filter(
-                UserToken.extension_user_id == extension_user_id
-            ).first()
-            
-            if existing_token:
+                encrypted_access_token=encrypted_access_token,
+                encrypted_refresh_token=encrypted_refresh_token
+            ))
+            logger.info(f"Создана новая запись токенов для пользователя {user_id} (extension_user_id: {extension_user_id})")
+
+        # Сохраняем информацию о работодателе
+        if "employer" in user_data and "manager" in user_data:
+            employer_fields = {
+                "employer_id": str(user_data["employer"]["id"]),
+                "employer_name": user_data["employer"]["name"],
+                "manager_id": str(user_data["manager"]["id"]),
+                "manager_email": user_data.get("email")
+            }
+
+            # Проверяем существующую информацию о работодателе
+            existing_employer = (await db.execute(
+                select(EmployerInfo).where(EmployerInfo.extension_user_id == extension_user_id)
+            )).scalars().first()
+
+            if existing_employer:
                 # Обновляем существующую запись
-                existing_token.user_id = user_id
-                existing_token.encrypted_access_token = encrypt_token(access_token)
-                existing_token.encrypted_refresh_token = encrypt_token(refresh_token)
-                logger.info(f"Обновлены токены для пользователя {user_id} (extension_user_id: {extension_user_id})")
+                for field, value in employer_fields.items():
+                    setattr(existing_employer, field, value)
+                logger.info(f"Обновлена информация о работодателе для extension_user_id: {extension_user_id}")
             else:
                 # Создаем новую запись
-                db.add(db_token)
-                logger.info(f"Создана новая запись токенов для пользователя {user_id} (extension_user_id: {extension_user_id})")
-
-            # Сохраняем информацию о работодателе
-            if "employer" in user_data and "manager" in user_data:
-                employer_info = EmployerInfo(
+                db.add(EmployerInfo(
                     id=str(uuid.uuid4()),
                     extension_user_id=extension_user_id,
-                    employer_id=str(user_data["employer"]["id"]),
-                    employer_name=user_data["employer"]["name"],
-                    manager_id=str(user_data["manager"]["id"]),
-                    manager_email=user_data.get("email")
-                )
-
-                # Проверяем существующую информацию о работодателе
-                existing_employer = db.query(EmployerInfo).filter(
-                    EmployerInfo.extension_user_id == extension_user_id
-                ).first()
-
-                if existing_employer:
-                    # Обновляем существующую запись
-                    existing_employer.employer_id = str(user_data["employer"]["id"])
-                    existing_employer.employer_name = user_data["employer"]["name"]
-                    existing_employer.manager_id = str(user_data["manager"]["id"])
-                    existing_employer.manager_email = user_data.get("email")
-                    logger.info(f"Обновлена информация о работодателе для extension_user_id: {extension_user_id}")
-                else:
-                    # Создаем новую запись
-                    db.add(employer_info)
-                    logger.info(f"Создана новая запись информации о работодателе для extension_user_id: {extension_user_id}")
-                
-            db.commit()
+                    **employer_fields
+                ))
+                logger.info(f"Создана новая запись информации о работодателе для extension_user_id: {extension_user_id}")
             
-            # Возвращаем HTML-страницу с JavaScript для закрытия окна
-            return HTMLResponse("""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>Авторизация успешна</title>
-                    <script>
-                        window.onload = function() {
-                            if (window.opener) {
-                                window.opener.postMessage('auth_success', '*');
-                            }
-                            window.close();
-                        };
-                    </script>
-                </head>
-                <body>
-                    <h1>Авторизация успешна</h1>
-                    <p>Окно закроется автоматически...</p>
-                </body>
-                </html>
-            """)
+        await db.commit()
+        
+        # Возвращаем HTML-страницу с JavaScript для закрытия окна
+        return HTMLResponse("""
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <title>Авторизация успешна</title>
+                <script>
+                    window.onload = function() {
+                        if (window.opener) {
+                            window.opener.postMessage('auth_success', '*');
+                        }
+                        window.close();
+                    };
+                </script>
+            </head>
+            <body>
+                <h1>Авторизация успешна</h1>
+                <p>Окно закроется автоматически...</p>
+            </body>
+            </html>
+        """)
             
     except HTTPException:
         raise
@@ -188,68 +221,71 @@ async def callback(code: str, state: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 @router.get("/auth/check")
-async def check_auth(x_extension_user_id: str = Header(...), db: Session = Depends(get_db)):
+async def check_auth(x_extension_user_id: str = Header(...), db: AsyncSession = Depends(get_async_db)):
     """Проверяет состояние авторизации пользователя"""
     try:
         # Получаем токен для конкретного extension_user_id
-        user_token = db.query(UserToken).filter(
-            UserToken.extension_user_id == x_extension_user_id
-        ).first()
+        user_token = (await db.execute(
+            select(UserToken).where(UserToken.extension_user_id == x_extension_user_id)
+        )).scalars().first()
         
         if not user_token:
             logger.info(f"Токен не найден для extension_user_id: {x_extension_user_id}")
             return {"is_authenticated": False}
             
         # Проверяем валидность токена
-        async with httpx.AsyncClient() as client:
-            try:
-                # Пробуем получить информацию о пользователе
-                response = await client.get(
-                    "https://api.hh.ru/me",
-                    headers={"Authorization": f"Bearer {decrypt_token(user_token.encrypted_access_token)}"}
+        client = get_http_client()
+        try:
+            # Пробуем получить информацию о пользователе
+            access_token = await decrypt_token_async(user_token.encrypted_access_token)
+            response = await client.get(
+                ME_URL,
+                headers={"Authorization": f"Bearer {access_token}"}
+            )
+            
+            if response.status_code == 200:
+                logger.info(f"Токен валиден для extension_user_id: {x_extension_user_id}")
+                return {"is_authenticated": True}
+            elif response.status_code == 403:
+                # Если токен истек, пробуем обновить его
+                logger.info(f"Токен истек для extension_user_id: {x_extension_user_id}, пробуем обновить")
+                refresh_response = await client.post(
+                    TOKEN_URL,
+                    data={
+                        "grant_type": "refresh_token",
+                        "client_id": HH_CLIENT_ID,
+                        "client_secret": HH_CLIENT_SECRET,
+                        "refresh_token": await decrypt_token_async(user_token.encrypted_refresh_token)
+                    }
                 )
                 
-                if response.status_code == 200:
-                    logger.info(f"Токен валиден для extension_user_id: {x_extension_user_id}")
+                if refresh_response.status_code == 200:
+                    # Обновляем токены в базе
+                    new_tokens = refresh_response.json()
+                    (
+                        user_token.encrypted_access_token,
+                        user_token.encrypted_refresh_token
+                    ) = await encrypt_tokens_async(new_tokens["access_token"], new_tokens["refresh_token"])
+                    await db.commit()
+                    logger.info(f"Токены успешно обновлены для extension_user_id: {x_extension_user_id}")
                     return {"is_authenticated": True}
-                elif response.status_code == 403:
-                    # Если токен истек, пробуем обновить его
-                    logger.info(f"Токен истек для extension_user_id: {x_extension_user_id}, пробуем обновить")
-                    refresh_response = await client.post(
-                        TOKEN_URL,
-                        data={
-                            "grant_type": "refresh_token",
-                            "client_id": HH_CLIENT_ID,
-                            "client_secret": HH_CLIENT_SECRET,
-                            "refresh_token": decrypt_token(user_token.encrypted_refresh_token)
-                        }
-                    )
-                    
-                    if refresh_response.status_code == 200:
-                        # Обновляем токены в базе
-                        new_tokens = refresh_response.json()
-                        user_token.encrypted_access_token = encrypt_token(new_tokens["access_token"])
-                        user_token.encrypted_refresh_token = encrypt_token(new_tokens["refresh_token"])
-                        db.commit()
-                        logger.info(f"Токены успешно обновлены для extension_user_id: {x_extension_user_id}")
-                        return {"is_authenticated": True}
-                    else:
-                        logger.error(f"Ошибка при обновлении токена для extension_user_id: {x_extension_user_id}")
-                        db.delete(user_token)
-                        db.commit()
-                        return {"is_authenticated": False}
                 else:
-                    logger.error(f"Неожиданный статус ответа для extension_user_id: {x_extension_user_id}")
-                    db.delete(user_token)
-                    db.commit()
+                    logger.error(f"Ошибка при обновлении токена для extension_user_id: {x_extension_user_id}")
+                    await db.delete(user_token)
+                    await db.commit()
                     return {"is_authenticated": False}
-                    
-            except Exception as e:
-                logger.error(f"Ошибка при проверке токена для extension_user_id: {x_extension_user_id}: {e}")
-                db.delete(user_token)
-                db.commit()
+            else:
+                logger.error(f"Неожиданный статус ответа для extension_user_id: {x_extension_user_id}")
+                await db.delete(user_token)
+                await db.commit()
                 return {"is_authenticated": False}
                 
+        except Exception as e:
+            logger.error(f"Ошибка при проверке токена для extension_user_id: {x_extension_user_id}: {e}")
+            await db.delete(user_token)
+            await db.commit()
+            return {"is_authenticated": False}
+                
     except Exception as e:
         logger.error(f"Ошибка при проверке авторизации: {e}")
         return {"is_authenticated": False} 
\ No newline at end of file
@@ -1,13 +1,17 @@
 from fastapi import HTTPException, Header, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 import os
 from typing import List, Dict, Any
 from pydantic import BaseModel
-from database.database import get_db
-from session import SessionManager, UserSession
+from database.database import get_async_db
+from session import SessionManager, UserSession, AGENTS_JSON_PATH
 from formatters import format_api_response_to_human_readable
 import asyncio
+import time
+import tracing
+import metrics
+import profiling
 
 class ChatMessage(BaseModel):
     role: str
@@ -22,48 +26,70 @@ class ChatRequest(BaseModel):
 # Инициализация менеджера сессий
 session_manager = SessionManager()
 
+def collect_sessions():
+    """Количество активных пользовательских сессий."""
+    return [("active_sessions", "gauge", "Активные пользовательские сессии", [({}, session_manager.active_count())])]
+
+metrics.registry.register_collector(collect_sessions)
+
 async def chat_endpoint(
     request: ChatRequest,
     x_extension_user_id: str = Header(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Обработка запросов чата."""
+    started = time.perf_counter()
     try:
-        # Используем session_id из запроса или создаем новый
-        session_id = request.session_id or session_manager.create_session()
-        session = session_manager.get_session(session_id)
-        
-        # Если сессия не существует, создаем новую
-        if session is None:
-            session_id = session_manager.create_session()
+        with tracing.span("chat", message_chars=len(request.message)) as span:
+            # Используем session_id из запроса или создаем новый
+            session_id = request.session_id or session_manager.create_session()
             session = session_manager.get_session(session_id)
-        
-        # Добавляем сообщение пользователя в историю
-        session.add_message("user", request.message)
-        
-        # Инициализируем агента, если он еще не инициализирован
-        if not session.bundle or not session.flows:
-            # Загружаем agents.json
-            agents_json_path = os.path.join(os.path.dirname(__file__), 'agents_json', 'hh', 'agents.json')
-            session.load_agents_json(agents_json_path)
             
-            # Настраиваем аутентификацию HeadHunter
-            session.setup_hh_auth(x_extension_user_id, db)
-        
-        # Выполняем запрос через модель GROQ
-        result = session.execute_query(request.message)
-        
-        # Форматируем ответ в человекочитаемый формат
-        response_text = format_api_response_to_human_readable(result, request.message)
-        
-        session.add_message("assistant", response_text)
-        return {
-            "session_id": session.session_id,
-            "response": response_text
-        }
+            # Если сессия не существует, создаем новую
+            if session is None:
+                session_id = session_manager.create_session()
+                session = session_manager.get_session(session_id)
+            span.set_attribute("session_id", session.session_id)
+            
+            # Добавляем сообщение пользователя в историю
+            session.add_message("user", request.message)
+            
+            # Инициализируем агента, если он еще не инициализирован
+            if not session.bundle or not session.flows:
+                with tracing.span("chat.setup"):
+                    # Загружаем agents.json (разбирается один раз на процесс)
+                    session.load_agents_json(AGENTS_JSON_PATH)
+                    
+                    # Настраиваем аутентификацию HeadHunter
+                    await session.setup_hh_auth(x_extension_user_id, db)
+            
+            # Запрос выполняется в отдельном потоке: вызовы LLM и API HeadHunter (с ожиданием
+            # ограничителя частоты) блокирующие и иначе останавливают цикл событий для всех запросов
+            with tracing.span("chat.execute_query"):
+                result = await profiling.run_blocking(session.execute_query, request.message)
+            
+            # Форматируем ответ в человекочитаемый формат
+            with tracing.span("chat.format") as format_span:
+                response_text = await profiling.run_blocking(
+                    format_api_response_to_human_readable,
+                    result, request.message, scope=session.extension_user_id or session.session_id
+                )
+                format_span.set_attribute("response_chars", len(response_text or ""))
+            
+            session.add_message("assistant", response_text)
+            span.set_attribute("prompt_tokens", session.last_prompt_tokens)
+            metrics.CHAT_LATENCY.observe(time.perf_counter() - started, status="ok")
+            return {
+                "session_id": session.session_id,
+                "response": response_text,
+                "prompt_tokens": session.last_prompt_tokens
+            }
             
     except Exception as e:
-        logger.error(f"Ошибка в обработке запроса: {str(e)}", exc_info=True)
+        metrics.CHAT_LATENCY.observe(time.perf_counter() - started, status="error")
+        logger.error(f"Ошибка в обработке запроса: {str(e)}")
+        # Трассировка формируется только при LOG_LEVEL=DEBUG
+        logger.opt(exception=True).debug("Трассировка ошибки обработки запроса")
         raise HTTPException(status_code=500, detail=str(e))
 
 async def clear_session(session_id: str):
@@ -0,0 +1,203 @@
+"""
+Нагрузочный бенчмарк /chat и выполнения потоков без обращения к внешним API.
+
+Поднимает локальный сервер API HeadHunter (mock_hh_server.py), подменяет
+клиент GigaChat на FakeLLM с заданной задержкой и вызовом потока, после чего
+выполняет запросы с заданной параллельностью и выводит задержку
+(p50/p95/p99), пропускную способность и потребление памяти.
+
+Режимы:
+    chat  - запросы POST /chat к приложению FastAPI (через ASGI, без сети)
+    flows - прямой вызов execute_flow в пуле потоков
+
+Запуск:
+    PYTHONPATH=python:. python benchmarks/chat_load.py --mode chat --requests 200 --concurrency 8
+    PYTHONPATH=python:. python benchmarks/chat_load.py --mode flows --flow get_negotiations_with_resume_flow
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_hh_server import MockHHServer, EMPLOYER_ID
+from fake_llm import FakeLLM
+
+EXTENSION_USER_ID = "benchmark-user"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("chat", "flows"), default="chat")
+    parser.add_argument("--requests", type=int, default=100, help="Количество измеряемых запросов")
+    parser.add_argument("--concurrency", type=int, default=4, help="Количество параллельных клиентов")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Задержка ответа LLM, с")
+    parser.add_argument("--hh-latency", type=float, default=0.02, help="Задержка ответа API HeadHunter, с")
+    parser.add_argument("--flow", default="get_negotiations_by_vacancy_flow", help="Поток, который вызывает LLM")
+    parser.add_argument("--arguments", default='{"search_text": "Python"}', help="Аргументы потока (JSON)")
+    parser.add_argument("--query", default="Покажи отклики на вакансию Python разработчик", help="Сообщение для /chat")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    return parser.parse_args()
+
+def configure_environment(hh_url: str, workdir: str) -> None:
+    """Настраивает приложение на локальные сервисы до импорта его модулей."""
+    from cryptography.fernet import Fernet
+    defaults = {
+        "HH_API_URL": hh_url,
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'benchmark.db')}",
+        "ENCRYPTION_KEY": Fernet.generate_key().decode(),
+        "GIGACHAT_CREDENTIALS": "benchmark",
+        "HH_CLIENT_ID": "benchmark",
+        "HH_CLIENT_SECRET": "benchmark",
+        "CANDIDATE_INDEX_DIR": os.path.join(workdir, "candidates"),
+        "HH_RATE_LIMIT_RPS": "100000",
+        "HH_RATE_LIMIT_BURST": "100000",
+        "SYNC_ENABLED": "false",
+    }
+    for key, value in defaults.items():
+        os.environ[key] = value
+    # Кеш LLM сделал бы все запросы, кроме первого, бесплатными
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    # Медленные трассировки пишутся в лог, что засоряет вывод бенчмарка
+    os.environ.setdefault("TRACING_EXPORTER", "none")
+    # Логи каждого запроса искажают измерения; LOG_LEVEL=INFO оценивает их стоимость
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+def seed_database() -> None:
+    """Создает таблицы и учетные данные пользователя бенчмарка."""
+    from database.database import engine, SessionLocal
+    from database.models import Base, UserToken, EmployerInfo
+    from database.encryption import encrypt_token
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.merge(UserToken(
+            id="benchmark", user_id="1", extension_user_id=EXTENSION_USER_ID,
+            encrypted_access_token=encrypt_token("token"), encrypted_refresh_token=encrypt_token("refresh")
+        ))
+        db.merge(EmployerInfo(
+            id="benchmark", extension_user_id=EXTENSION_USER_ID, employer_id=EMPLOYER_ID,
+            employer_name="ООО Ромашка", manager_id="77"
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+def rss_mb() -> float:
+    """Текущий размер резидентной памяти процесса, МБ."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux значение в килобайтах, в macOS - в байтах
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+def run_chat(args):
+    import httpx
+    from main import app
+
+    async def worker(client, count, latencies, errors):
+        body = {"message": args.query}
+        # Первый запрос создает сессию и загружает agents.json, в измерения не входит
+        for i in range(count + 1):
+            started = time.perf_counter()
+            response = await client.post("/chat", json=body, headers={"x-extension-user-id": EXTENSION_USER_ID})
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                errors.append(response.text[:200])
+            else:
+                body["session_id"] = response.json()["session_id"]
+            if i:
+                latencies.append(elapsed)
+
+    async def main():
+        latencies, errors = [], []
+        counts = [args.requests // args.concurrency + (i < args.requests % args.concurrency) for i in range(args.concurrency)]
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=300) as client:
+            # Прогрев: загрузка agents.json и импорт модулей интеграции
+            await client.post("/chat", json={"message": args.query}, headers={"x-extension-user-id": EXTENSION_USER_ID})
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(client, count, latencies, errors) for count in counts if count))
+            wall = time.perf_counter() - started
+        return latencies, errors, wall
+
+    return asyncio.run(main())
+
+def run_flows(args):
+    from agentsjson.core.executor import execute_flow
+    from agentsjson.core.models.auth import AuthType
+    from agentsjson.integrations.hh.tools import HHAuthConfig
+    from session import UserSession
+
+    session = UserSession("benchmark")
+    session.load_agents_json(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents_json", "hh", "agents.json"))
+    flow = next(flow for flow in session.flows if flow.id == args.flow)
+    auth = HHAuthConfig(type=AuthType.OAUTH2, token="token", scopes=set(), employer_id=EMPLOYER_ID)
+    arguments = {"parameters": json.loads(args.arguments)}
+    errors = []
+
+    def call(_):
+        started = time.perf_counter()
+        try:
+            execute_flow(bundle=session.bundle, flow=flow, arguments=arguments, auth=auth)
+        except Exception as e:
+            errors.append(str(e)[:200])
+        return time.perf_counter() - started
+
+    call(None)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(call, range(args.requests)))
+    return latencies, errors, time.perf_counter() - started
+
+def percentile(values, q):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as workdir, MockHHServer(latency=args.hh_latency) as server:
+        configure_environment(server.url, workdir)
+        import llm
+
+        fake = FakeLLM(latency=args.llm_latency, flow_id=args.flow, arguments=json.loads(args.arguments))
+        llm._client = fake
+        seed_database()
+
+        rss_before = rss_mb()
+        latencies, errors, wall = run_chat(args) if args.mode == "chat" else run_flows(args)
+        result = {
+            "mode": args.mode,
+            "requests": len(latencies),
+            "concurrency": args.concurrency,
+            "errors": len(errors),
+            "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "max_ms": round(max(latencies, default=0) * 1000, 1),
+            "llm_calls": fake.calls,
+            "rss_mb": round(rss_mb(), 1),
+            "rss_growth_mb": round(rss_mb() - rss_before, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+        return
+    for key, value in result.items():
+        print(f"{key:<14} {value}")
+    for error in errors[:5]:
+        print(f"ошибка: {error}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Микробенчмарки горячих путей agentsjson.core.
+
+Измеряет на реальных agents.json и openapi.yaml интеграции HeadHunter:
+преобразование потоков в инструменты, применение связей, выполнение потока с
+заглушками операций, применение переопределений (и для сравнения - прежнюю
+реализацию на benedict), индексацию операций, преобразование путей и
+валидацию Bundle.
+
+Время каждого случая - минимум из нескольких повторов (мкс на вызов).
+Результаты сравниваются с сохраненными значениями в baselines/core_micro.json;
+если случай медленнее базового больше чем на порог, бенчмарк завершается с
+кодом 1. Базовые значения зависят от машины, их нужно сохранять заново при
+смене окружения. Поэтому бенчмарки - отдельный скрипт на timeit, как и
+остальные скрипты benchmarks/, а не часть тестов (tests/, pytest), которые
+проверяют поведение и не зависят от скорости машины.
+
+Запуск:
+    PYTHONPATH=python:. python benchmarks/core_micro.py              # сравнение с базовыми
+    PYTHONPATH=python:. python benchmarks/core_micro.py --save       # сохранить базовые
+    PYTHONPATH=python:. python benchmarks/core_micro.py -k execute   # только случаи с подстрокой
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import timeit
+import types
+
+import yaml
+from benedict import benedict
+
+from agentsjson.core.executor import _execute, apply_link
+from agentsjson.core.loader import apply_overrides, index_by_operation_id
+from agentsjson.core.models.auth import AuthType, OAuth2AuthConfig
+from agentsjson.core.models.bundle import Bundle
+from agentsjson.core.models.schema import Override
+from agentsjson.core.parsetools import flow_to_openai_tool
+from agentsjson.core.utils import convert_dot_digits_to_brackets
+from agentsjson.integrations.types import ExecutorType
+
+from mock_hh_server import MockData
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AGENTS_JSON = os.path.join(ROOT, "agents_json", "hh", "agents.json")
+OPENAPI = os.path.join(ROOT, "agents_json", "hh", "openapi.yaml")
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "core_micro.json")
+
+DEFAULT_THRESHOLD = 0.25
+REPEAT = 5
+STUB_SOURCE = "benchmark_stub"
+EXECUTE_FLOW = "get_negotiations_with_resume_flow"
+
+def install_stub_integration(data: MockData) -> None:
+    """Регистрирует интеграцию, операции которой возвращают готовые ответы без обращения к API."""
+    vacancy = data.vacancies[0]
+    responses = {
+        "get-active-vacancy-list": data.page(data.vacancies, {}),
+        "get-negotiations-list": data.page(data.negotiations[vacancy["id"]], {}),
+        "get-resume": data.resume,
+        "get-vacancy": vacancy,
+    }
+
+    def operation(operation_id):
+        response = responses.get(operation_id, {})
+        return lambda auth, parameters=None, requestBody=None: response
+
+    module = types.ModuleType(f"agentsjson.integrations.{STUB_SOURCE}")
+    module.map_type = ExecutorType.RESTAPIHANDLER
+    module.map = {operation_id: operation(operation_id) for operation_id in responses}
+    sys.modules[module.__name__] = module
+
+def stub_flow(flow):
+    """Копия потока, действия которого выполняются заглушкой."""
+    return flow.model_copy(update={
+        "actions": [action.model_copy(update={"sourceId": STUB_SOURCE}) for action in flow.actions]
+    })
+
+def build_overrides(spec):
+    """По одному переопределению описания на каждую операцию спецификации."""
+    return [
+        Override(
+            sourceId="hh",
+            operationId=operation_id,
+            fieldPath="summary",
+            value=f"{operation.get('summary', '')} (benchmark)"
+        )
+        for operation_id, operation in index_by_operation_id(spec).items()
+    ]
+
+def apply_overrides_benedict(openapi_source, overrides):
+    """
+    Прежняя реализация apply_overrides: весь документ оборачивается в benedict,
+    fieldPath - полный путь от корня спецификации с разделителем "!".
+    """
+    d = benedict(openapi_source, keypath_separator="!")
+    for override in overrides:
+        d[override.fieldPath] = override.value
+    return dict(d)
+
+def build_benedict_overrides(spec, overrides):
+    """Те же переопределения с полными путями для прежней реализации."""
+    operations = index_by_operation_id(spec)
+    return [
+        override.model_copy(update={"fieldPath": "!".join([
+            "paths", operations[override.operationId]["path"], operations[override.operationId]["method"], override.fieldPath
+        ])})
+        for override in overrides
+    ]
+
+def build_cases():
+    """Возвращает {имя случая: функция без аргументов}."""
+    with open(AGENTS_JSON, encoding="utf-8") as f:
+        agents_json = json.load(f)
+    with open(OPENAPI, encoding="utf-8") as f:
+        openapi = yaml.safe_load(f)
+
+    bundle_data = {"agentsJson": agents_json, "openapi": openapi, "operations": {}}
+    bundle = Bundle.model_validate(bundle_data)
+    flows = bundle.agentsJson.flows
+
+    data = MockData(vacancies=5, negotiations_per_vacancy=20)
+    install_stub_integration(data)
+    flow = stub_flow(next(flow for flow in flows if flow.id == EXECUTE_FLOW))
+    auth = OAuth2AuthConfig(type=AuthType.OAUTH2, token="token", scopes=set())
+    parameters = {"search_text": "Python", "page": 0, "per_page": 20}
+
+    # Трасса после выполнения поиска вакансий - вход для связи items[0].id -> vacancy_id
+    trace = {
+        flow.id: {"parameters": parameters, "requestBody": {}, "responses": {}},
+        "search_vacancy": {"parameters": {"text": "Python"}, "requestBody": {},
+                           "responses": {"success": data.page(data.vacancies, {})}},
+    }
+    link = next(link for link in flow.links if link.origin.actionId == "search_vacancy")
+
+    overrides = build_overrides(openapi)
+    benedict_overrides = build_benedict_overrides(openapi, overrides)
+    # Переопределения применяются на месте и повторное применение ничего не меняет,
+    # поэтому копия спецификации создается один раз
+    override_spec = copy.deepcopy(openapi)
+    field_paths = [link.origin.fieldPath for flow in flows for link in flow.links or []]
+    field_paths += ["responses.success.items.0.id", "requestBody.line_items.0.price_data.0"]
+
+    return {
+        "flow_to_openai_tool[all]": lambda: [flow_to_openai_tool(flow) for flow in flows],
+        "apply_link": lambda: apply_link(link, trace),
+        "_execute[stub]": lambda: _execute(bundle, flow, auth, parameters, {}),
+        "index_by_operation_id": lambda: index_by_operation_id(openapi),
+        "convert_dot_digits_to_brackets": lambda: [convert_dot_digits_to_brackets(path) for path in field_paths],
+        "Bundle.model_validate": lambda: Bundle.model_validate(bundle_data),
+        "apply_overrides": lambda: apply_overrides(override_spec, overrides),
+        "apply_overrides[benedict]": lambda: apply_overrides_benedict(override_spec, benedict_overrides),
+        "deepcopy[openapi]": lambda: copy.deepcopy(openapi),
+    }
+
+def measure(func) -> float:
+    """Минимальное время одного вызова в микросекундах."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=REPEAT, number=number)) / number * 1e6
+
+def load_baselines():
+    if not os.path.exists(BASELINES):
+        return {}
+    with open(BASELINES, encoding="utf-8") as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", action="store_true", help="Сохранить результаты как базовые")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Допустимое замедление относительно базового значения (0.25 = 25%%)")
+    parser.add_argument("-k", dest="keyword", default="", help="Запускать только случаи, содержащие подстроку")
+    args = parser.parse_args()
+
+    cases = {name: func for name, func in build_cases().items() if args.keyword in name}
+    baselines = load_baselines()
+    results, regressions = {}, []
+
+    print(f"{'случай':<34} {'мкс/вызов':>12} {'базовое':>12} {'изменение':>10}")
+    for name, func in cases.items():
+        func()
+        results[name] = round(measure(func), 2)
+        baseline = baselines.get(name)
+        if baseline:
+            change = results[name] / baseline - 1
+            mark = " !" if change > args.threshold else ""
+            print(f"{name:<34} {results[name]:>12.2f} {baseline:>12.2f} {change * 100:>9.1f}%{mark}")
+            if change > args.threshold:
+                regressions.append(name)
+        else:
+            print(f"{name:<34} {results[name]:>12.2f} {'-':>12} {'-':>10}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(BASELINES), exist_ok=True)
+        with open(BASELINES, "w", encoding="utf-8") as f:
+            json.dump({**baselines, **results}, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Базовые значения сохранены: {BASELINES}")
+    elif regressions:
+        print(f"Замедление больше {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
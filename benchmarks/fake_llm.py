@@ -0,0 +1,44 @@
+"""
+Замена клиента GigaChat для бенчмарков.
+
+Отвечает с заданной задержкой: на запрос с инструментами возвращает вызов
+указанного потока с аргументами, на остальные запросы - фиксированный текст.
+Устанавливается вместо общего клиента: llm._client = FakeLLM(...).
+"""
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+class FakeLLM:
+    def __init__(self, latency: float = 0.0, flow_id: Optional[str] = None,
+                 arguments: Optional[Dict[str, Any]] = None, text: str = "Готово."):
+        self.latency = latency
+        self.flow_id = flow_id
+        self.arguments = arguments or {}
+        self.text = text
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def chat(self, messages: List[Dict[str, Any]], **kwargs) -> SimpleNamespace:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if kwargs.get("tools") and self.flow_id:
+            tool_call = SimpleNamespace(
+                id=f"call_{self.calls}",
+                type="function",
+                function=SimpleNamespace(name=self.flow_id, arguments=json.dumps({"parameters": self.arguments}))
+            )
+            message = SimpleNamespace(content="", tool_calls=[tool_call])
+        else:
+            message = SimpleNamespace(content=self.text, tool_calls=[])
+        # Ответ читается и как сообщение (content, tool_calls), и как ответ OpenAI (choices)
+        return SimpleNamespace(
+            content=message.content,
+            tool_calls=message.tool_calls,
+            choices=[SimpleNamespace(message=message)],
+            usage_metadata=None
+        )
@@ -0,0 +1,94 @@
+"""
+Профиль времени импорта main.py.
+
+Запускает `python -X importtime -c "import main"` в отдельном процессе и
+выводит самые медленные модули (собственное и накопленное время) и сумму по
+пакетам верхнего уровня (langchain_community, agentsjson, benedict, yaml и
+т.д.). С --folded сохраняет дерево импортов в формате свернутых стеков для
+flamegraph.pl или speedscope (вес - собственное время, мкс).
+
+Импорт main.py выполняет инициализацию приложения, поэтому нужны переменные
+окружения (.env) и доступная база данных.
+
+Запуск:
+    PYTHONPATH=python:. python benchmarks/import_time.py [--module main] [--top 25] [--folded imports.folded]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+def run_importtime(module: str):
+    """Возвращает [(собственное мкс, накопленное мкс, глубина, модуль)] в порядке вывода -X importtime."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, env=os.environ.copy()
+    )
+    rows = []
+    for line in process.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, name))
+    if process.returncode != 0:
+        errors = [line for line in process.stderr.splitlines() if not line.startswith("import time:")]
+        raise SystemExit(f"Импорт {module} завершился с ошибкой:\n" + "\n".join(errors[-20:]))
+    return rows
+
+def folded_stacks(rows):
+    """
+    Дерево импортов в виде свернутых стеков. -X importtime выводит модуль после
+    всех его вложенных импортов, поэтому родитель восстанавливается по глубине.
+    """
+    lines = []
+    pending = []  # (глубина, модуль, собственное время) дочерних модулей, ожидающих родителя
+    for self_us, _, depth, name in rows:
+        children = [item for item in pending if item[0] > depth]
+        pending = [item for item in pending if item[0] <= depth]
+        pending.append((depth, name, self_us, children))
+    def emit(prefix, node):
+        _, name, self_us, children = node
+        stack = f"{prefix};{name}" if prefix else name
+        if self_us:
+            lines.append(f"{stack} {self_us}")
+        for child in children:
+            emit(stack, child)
+    for node in pending:
+        emit("", node)
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Импортируемый модуль")
+    parser.add_argument("--top", type=int, default=25, help="Количество модулей в выводе")
+    parser.add_argument("--folded", help="Сохранить свернутые стеки в файл")
+    args = parser.parse_args()
+
+    rows = run_importtime(args.module)
+    total = sum(self_us for self_us, *_ in rows)
+
+    packages = defaultdict(int)
+    for self_us, _, _, name in rows:
+        packages[name.split(".")[0]] += self_us
+
+    print(f"Импорт {args.module}: {total / 1000:.0f} мс, модулей: {len(rows)}\n")
+    print(f"{'пакет':<32} {'мс':>8} {'доля':>7}")
+    for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:<32} {self_us / 1000:>8.1f} {self_us / total * 100:>6.1f}%")
+
+    print(f"\n{'модуль':<48} {'собств. мс':>10} {'накопл. мс':>10}")
+    for self_us, cumulative_us, _, name in sorted(rows, key=lambda row: row[0], reverse=True)[:args.top]:
+        print(f"{name:<48} {self_us / 1000:>10.1f} {cumulative_us / 1000:>10.1f}")
+
+    if args.folded:
+        with open(args.folded, "w", encoding="utf-8") as f:
+            f.write("\n".join(folded_stacks(rows)) + "\n")
+        print(f"\nСвернутые стеки сохранены: {args.folded}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Локальный сервер, имитирующий API HeadHunter для бенчмарков.
+
+Отвечает на запросы, которые выполняет ассистент (/me, активные вакансии,
+вакансия, список откликов, резюме, изменение состояния отклика), данными в
+формате ответов из openapi.yaml. Резюме строятся из фикстуры
+fixtures/hh_resume.json, вакансии и отклики генерируются детерминированно.
+Задержка ответа задается параметром latency.
+
+Запуск отдельно:
+    python benchmarks/mock_hh_server.py [порт]
+"""
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "hh_resume.json")
+
+EMPLOYER_ID = "1455"
+VACANCY_NAMES = ["Python разработчик", "Аналитик данных", "Frontend разработчик", "Менеджер проектов", "QA инженер"]
+STATES = ["response", "invitation", "discard"]
+
+class MockData:
+    """Детерминированный набор вакансий, откликов и резюме."""
+    def __init__(self, vacancies: int = 5, negotiations_per_vacancy: int = 200, seed: int = 1):
+        with open(FIXTURE, encoding="utf-8") as f:
+            self.resume = json.load(f)
+        rng = random.Random(seed)
+        self.vacancies = [
+            {
+                "id": str(93000000 + i),
+                "name": VACANCY_NAMES[i % len(VACANCY_NAMES)],
+                "area": {"id": "1", "name": "Москва"},
+                "salary": {"from": 150000, "to": 250000, "currency": "RUR"},
+                "published_at": "2024-03-01T10:00:00+0300",
+                "counters": {"responses": negotiations_per_vacancy},
+                "employer": {"id": EMPLOYER_ID, "name": "ООО Ромашка"},
+                "key_skills": [{"name": skill} for skill in self.resume.get("skill_set", [])[:5]],
+                "description": "<p>Разработка и поддержка сервисов.</p>",
+            }
+            for i in range(vacancies)
+        ]
+        short_fields = ("first_name", "last_name", "title", "area", "education", "photo")
+        self.negotiations = {}
+        for vacancy in self.vacancies:
+            items = []
+            for i in range(negotiations_per_vacancy):
+                negotiation_id = f"{vacancy['id']}{i:05d}"
+                items.append({
+                    "id": negotiation_id,
+                    "state": {"id": rng.choice(STATES)},
+                    "created_at": f"2024-03-{1 + i % 28:02d}T10:00:00+0300",
+                    "updated_at": f"2024-03-{1 + i % 28:02d}T12:00:00+0300",
+                    "vacancy": {"id": vacancy["id"], "name": vacancy["name"]},
+                    "resume": {
+                        **{key: self.resume.get(key) for key in short_fields},
+                        "id": f"res{negotiation_id}",
+                        "age": rng.choice([None, 24, 29, 35, 42]),
+                        "salary": rng.choice([None, {"amount": rng.randrange(80, 350) * 1000, "currency": "RUR"}]),
+                        "total_experience": {"months": rng.randrange(0, 180)},
+                    },
+                })
+            self.negotiations[vacancy["id"]] = items
+
+    def page(self, items, query):
+        page = int(query.get("page", 0))
+        per_page = int(query.get("per_page", 20))
+        return {
+            "items": items[page * per_page:(page + 1) * per_page],
+            "found": len(items),
+            "pages": math.ceil(len(items) / per_page) if per_page else 0,
+            "page": page,
+            "per_page": per_page,
+        }
+
+    def handle(self, method, path, query):
+        """Возвращает (статус, тело ответа) для запроса."""
+        if method == "GET" and path == "/me":
+            return 200, {"id": "1", "first_name": "Иван", "is_employer": True,
+                         "employer": {"id": EMPLOYER_ID, "name": "ООО Ромашка"}, "manager": {"id": "77"}}
+        match = re.fullmatch(r"/employers/[^/]+/vacancies/active", path)
+        if method == "GET" and match:
+            words = (query.get("text") or "").lower().split()
+            items = [vacancy for vacancy in self.vacancies if all(word in vacancy["name"].lower() for word in words)]
+            return 200, self.page(items, query)
+        match = re.fullmatch(r"/vacancies/([^/]+)", path)
+        if method == "GET" and match:
+            vacancy = next((vacancy for vacancy in self.vacancies if vacancy["id"] == match.group(1)), None)
+            return (200, vacancy) if vacancy else (404, {"errors": [{"type": "not_found"}]})
+        if method == "GET" and path == "/negotiations/response":
+            items = self.negotiations.get(query.get("vacancy_id"))
+            if items is None:
+                return 400, {"errors": [{"type": "bad_argument", "value": "vacancy_id"}]}
+            return 200, self.page(items, query)
+        match = re.fullmatch(r"/resumes/([^/]+)", path)
+        if method == "GET" and match:
+            return 200, {**self.resume, "id": match.group(1)}
+        match = re.fullmatch(r"/negotiations/([^/]+)", path)
+        if method == "GET" and match:
+            for items in self.negotiations.values():
+                for item in items:
+                    if item["id"] == match.group(1):
+                        return 200, item
+            return 404, {"errors": [{"type": "not_found"}]}
+        if method == "PUT" and match:
+            return 200, {"id": match.group(1)}
+        return 404, {"errors": [{"type": "not_found"}]}
+
+def make_handler(data: MockData, latency: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, method):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            if latency:
+                time.sleep(latency)
+            url = urlsplit(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            status, body = data.handle(method, url.path, query)
+            payload = json.dumps(body, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_PUT(self):
+            self._respond("PUT")
+
+        def do_POST(self):
+            self._respond("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+class MockHHServer:
+    """Сервер API HeadHunter в фоновом потоке."""
+    def __init__(self, port: int = 0, latency: float = 0.0, data: MockData = None):
+        self.data = data or MockData()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(self.data, latency))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8081
+    with MockHHServer(port) as server:
+        print(f"Сервер API HeadHunter запущен: {server.url}")
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,88 @@
+"""
+Бенчмарк табличного представления списка откликов.
+
+Сравнивает память и время фильтрации с сортировкой для списка словарей из
+response.json() и для NegotiationTable на синтетических откликах с кратким
+резюме, как в ответе /negotiations/response.
+
+Запуск:
+    PYTHONPATH=python:. python benchmarks/negotiation_table.py [количество откликов]
+"""
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+from agentsjson.integrations.hh.negotiation_table import NegotiationTable
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "hh_resume.json")
+REPEATS = 20
+# Поля краткого резюме в списке откликов
+SHORT_RESUME_FIELDS = ("first_name", "last_name", "middle_name", "title", "area", "photo", "education",
+                       "total_experience", "alternate_url", "url", "created_at", "updated_at")
+
+def make_negotiations(resume, count):
+    rng = random.Random(1)
+    short = {key: resume.get(key) for key in SHORT_RESUME_FIELDS}
+    items = []
+    for i in range(count):
+        items.append({
+            "id": str(1000000 + i),
+            "state": {"id": rng.choice(["response", "invitation", "discard"]), "name": "Отклик"},
+            "created_at": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T10:00:00+0300",
+            "updated_at": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00+0300",
+            "vacancy": {"id": "93000001", "name": "Python разработчик", "url": "https://api.hh.ru/vacancies/93000001"},
+            "has_updates": False,
+            "messages_url": f"https://api.hh.ru/negotiations/{1000000 + i}/messages",
+            "resume": {
+                **short,
+                "id": f"resume{i}",
+                "age": rng.choice([None, 23, 29, 35, 44]),
+                "salary": rng.choice([None, {"amount": rng.randrange(60, 400) * 1000, "currency": "RUR"}]),
+                "total_experience": {"months": rng.randrange(0, 240)},
+            },
+        })
+    return items
+
+def allocated(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+def filter_dicts(items):
+    selected = [
+        item for item in items
+        if item["state"]["id"] in ("response", "invitation")
+        and 100000 <= ((item["resume"].get("salary") or {}).get("amount") or 0) <= 250000
+        and item["resume"].get("age") is not None and item["resume"]["age"] <= 35
+    ]
+    return sorted(selected, key=lambda item: item["resume"]["salary"]["amount"], reverse=True)
+
+def filter_table(table):
+    return table.filter(state=["response", "invitation"], salary_from=100000, salary_to=250000, age_to=35) \
+        .sort("salary", descending=True)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with open(FIXTURE, encoding="utf-8") as f:
+        resume = json.load(f)
+    payload = json.dumps({"items": make_negotiations(resume, count)}, ensure_ascii=False)
+
+    items, dicts_size = allocated(lambda: json.loads(payload)["items"])
+    table, table_size = allocated(lambda: NegotiationTable.from_items(json.loads(payload)["items"]))
+    assert [item["id"] for item in filter_dicts(items)] == filter_table(table).ids
+
+    dicts_time = timeit.timeit(lambda: filter_dicts(items), number=REPEATS) / REPEATS
+    table_time = timeit.timeit(lambda: filter_table(table), number=REPEATS) / REPEATS
+
+    print(f"откликов: {count}")
+    print(f"{'формат':<16} {'память, МБ':>10} {'фильтр+сортировка, мс':>22}")
+    print(f"{'список словарей':<16} {dicts_size / 1e6:>10.1f} {dicts_time * 1000:>22.2f}")
+    print(f"{'NegotiationTable':<16} {table_size / 1e6:>10.1f} {table_time * 1000:>22.2f}")
+
+if __name__ == "__main__":
+    main()
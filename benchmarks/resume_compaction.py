@@ -0,0 +1,41 @@
+"""
+Бенчмарк сжатия резюме для промптов LLM.
+
+Сравнивает размер промпта (символы и оценка токенов) и время подготовки
+для полного JSON резюме с отступами и компактного представления на каждом
+уровне детализации.
+
+Запуск:
+    PYTHONPATH=python:. python benchmarks/resume_compaction.py [путь к резюме.json]
+"""
+import json
+import os
+import sys
+import timeit
+
+from llm import estimate_tokens
+from agentsjson.integrations.hh.resume_compactor import compact_resume, DETAIL_LEVELS
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "hh_resume.json")
+REPEATS = 1000
+
+def measure(name, render, baseline_tokens=None):
+    text = render()
+    seconds = timeit.timeit(render, number=REPEATS) / REPEATS
+    tokens = estimate_tokens(text)
+    savings = f"{(1 - tokens / baseline_tokens) * 100:5.1f}%" if baseline_tokens else "    -"
+    print(f"{name:<12} {len(text):>8} {tokens:>8} {savings:>8} {seconds * 1e6:>10.1f}")
+    return tokens
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else FIXTURE
+    with open(path, encoding="utf-8") as f:
+        resume = json.load(f)
+
+    print(f"{'формат':<12} {'символы':>8} {'токены':>8} {'экономия':>8} {'мкс/резюме':>10}")
+    baseline = measure("json indent", lambda: json.dumps(resume, ensure_ascii=False, indent=2))
+    for detail in DETAIL_LEVELS:
+        measure(detail, lambda: compact_resume(resume, detail), baseline)
+
+if __name__ == "__main__":
+    main()
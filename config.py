@@ -1,37 +1,119 @@
 import os
 from dotenv import load_dotenv
 from loguru import logger
-import sys
-
-logger.remove()  
-logger.add(
-    sys.stderr,
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-    level="DEBUG"
-)
+from logging_setup import setup_logging
 
 env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
-logger.info(f"Загрузка переменных окружения из файла: {env_path}")
 # Загружаем из .env файла
 load_dotenv(env_path)
 
+# Логирование: уровень, формат text/json, уровни модулей ("agentsjson.integrations.hh=WARNING,session=DEBUG"),
+# лимит записей ниже WARNING из одного места вызова в секунду (0 - без выборки), запись в отдельном потоке
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_SAMPLE_PER_SECOND = int(os.getenv("LOG_SAMPLE_PER_SECOND", "20"))
+LOG_ENQUEUE = os.getenv("LOG_ENQUEUE", "true").lower() in ("1", "true", "yes")
+setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_LEVELS, LOG_SAMPLE_PER_SECOND, LOG_ENQUEUE)
+logger.info(f"Переменные окружения загружены из файла: {env_path}")
+
 GIGACHAT_CREDENTIALS = os.getenv("GIGACHAT_CREDENTIALS")
 
 # Параметры авторизации HH.ru
 HH_CLIENT_ID = os.getenv("HH_CLIENT_ID")
 HH_CLIENT_SECRET = os.getenv("HH_CLIENT_SECRET")
+# Базовый URL API HeadHunter (для бенчмарков можно указать локальный сервер)
+HH_API_URL = os.getenv("HH_API_URL", "https://api.hh.ru").rstrip("/")
+
+# Параметры локального маршрутизатора намерений
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes")
+INTENT_ROUTER_TOP_K = int(os.getenv("INTENT_ROUTER_TOP_K", "3"))
+INTENT_ROUTER_MIN_SCORE = float(os.getenv("INTENT_ROUTER_MIN_SCORE", "0.5"))
+
+# Параметры кеша ответов LLM
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+# Файл SQLite для хранения кеша между перезапусками; по умолчанию кеш только в памяти, так как ответы
+# (форматирование, приглашения, отказы) содержат персональные данные кандидатов и хранятся в файле открытым текстом
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+LLM_CACHE_APPROXIMATE = os.getenv("LLM_CACHE_APPROXIMATE", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_APPROX_THRESHOLD = float(os.getenv("LLM_CACHE_APPROX_THRESHOLD", "0.92"))
+
+# Параметры сжатия истории чата
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "3000"))
+HISTORY_KEEP_RECENT = int(os.getenv("HISTORY_KEEP_RECENT", "4"))
+HISTORY_TRUNCATE_TOKENS = int(os.getenv("HISTORY_TRUNCATE_TOKENS", "200"))
+HISTORY_MAX_MESSAGES = int(os.getenv("HISTORY_MAX_MESSAGES", "20"))
+
+# Параметры пакетного скрининга резюме
+SCREENING_BATCH_SIZE = int(os.getenv("SCREENING_BATCH_SIZE", "5"))
+SCREENING_LLM_WORKERS = int(os.getenv("SCREENING_LLM_WORKERS", "4"))
+SCREENING_FETCH_WORKERS = int(os.getenv("SCREENING_FETCH_WORKERS", "8"))
+# Скрининг не больше этого числа откликов выполняется в рамках запроса /chat, остальные - в фоне
+SCREENING_SYNC_MAX_CANDIDATES = int(os.getenv("SCREENING_SYNC_MAX_CANDIDATES", "50"))
+SCREENING_BACKGROUND_WORKERS = int(os.getenv("SCREENING_BACKGROUND_WORKERS", "2"))
+
+# Уровень детализации резюме в промптах LLM (brief/standard/full)
+RESUME_DETAIL_LEVEL = os.getenv("RESUME_DETAIL_LEVEL", "standard")
+SCREENING_RESUME_DETAIL = os.getenv("SCREENING_RESUME_DETAIL", "brief")
+
+# Ограничение частоты запросов к API HeadHunter (для каждого токена пользователя отдельно)
+HH_RATE_LIMIT_RPS = float(os.getenv("HH_RATE_LIMIT_RPS", "5"))
+HH_RATE_LIMIT_BURST = int(os.getenv("HH_RATE_LIMIT_BURST", "10"))
+
+# Параметры массового изменения состояния откликов
+BULK_STATE_CHANGE_WORKERS = int(os.getenv("BULK_STATE_CHANGE_WORKERS", "4"))
+BULK_STATE_CHANGE_MAX_ITEMS = int(os.getenv("BULK_STATE_CHANGE_MAX_ITEMS", "500"))
+
+# Генерация сообщений кандидатам по шаблону
+MESSAGE_PERSONALIZE_COUNT = int(os.getenv("MESSAGE_PERSONALIZE_COUNT", "0"))
+MESSAGE_LLM_WORKERS = int(os.getenv("MESSAGE_LLM_WORKERS", "4"))
+
+# Локальный индекс кандидатов (SQLite FTS5, отдельный файл на работодателя).
+# Файлы содержат персональные данные кандидатов (полные резюме и отклики) открытым текстом:
+# каталог должен быть доступен только сервису
+CANDIDATE_INDEX_ENABLED = os.getenv("CANDIDATE_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+CANDIDATE_INDEX_DIR = os.getenv(
+    "CANDIDATE_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "candidates")
+)
+
+# Фоновая синхронизация вакансий и откликов в локальный индекс
+SYNC_ENABLED = os.getenv("SYNC_ENABLED", "false").lower() in ("1", "true", "yes")
+SYNC_INTERVAL_SECONDS = int(os.getenv("SYNC_INTERVAL_SECONDS", "300"))
+SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY", "2"))
+SYNC_FRESHNESS_SECONDS = int(os.getenv("SYNC_FRESHNESS_SECONDS", "600"))
+# Лимит страниц откликов на вакансию за проход; обрезанный список не отдается из локального хранилища
+SYNC_MAX_NEGOTIATION_PAGES = int(os.getenv("SYNC_MAX_NEGOTIATION_PAGES", "20"))
+
+# Локальная оценка кандидатов по критериям вакансии
+SCORING_MAX_CANDIDATES = int(os.getenv("SCORING_MAX_CANDIDATES", "2000"))
+
+# Трассировка запросов: none, log (медленные запросы в лог) или otel (OpenTelemetry API)
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "5000"))
+
+# Метрики в формате Prometheus (/metrics): по умолчанию выключены; если задан METRICS_TOKEN,
+# эндпоинт требует заголовок "Authorization: Bearer <токен>"
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Запуск приложения: создание таблиц при старте (в продакшене схема управляется миграциями)
+# и целевое время запуска, при превышении которого в лог пишется предупреждение
+DB_CREATE_TABLES = os.getenv("DB_CREATE_TABLES", "true").lower() in ("1", "true", "yes")
+STARTUP_TARGET_MS = float(os.getenv("STARTUP_TARGET_MS", "2000"))
+
+# Прогрев при запуске: загрузка agents.json, описания инструментов, токен GigaChat,
+# соединения с API HeadHunter для последних активных пользователей; /ready отвечает 200 после прогрева
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "true").lower() in ("1", "true", "yes")
+PREWARM_HH_SESSIONS = int(os.getenv("PREWARM_HH_SESSIONS", "10"))
+
+# Профилирование запросов /chat по заголовку X-Profile или параметру ?profile= (sample / cprofile)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_DIR = os.getenv("PROFILING_DIR", "data/profiles")
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
 
-# Проверка наличия всех необходимых переменных окружения
-if not all([GIGACHAT_CREDENTIALS, HH_CLIENT_ID, HH_CLIENT_SECRET]):
-    missing_vars = []
-    if not GIGACHAT_CREDENTIALS:
-        missing_vars.append("GIGACHAT_CREDENTIALS")
-    if not HH_CLIENT_ID:
-        missing_vars.append("HH_CLIENT_ID")
-    if not HH_CLIENT_SECRET:
-        missing_vars.append("HH_CLIENT_SECRET")
-    
-    logger.error(f"Отсутствуют необходимые переменные окружения: {', '.join(missing_vars)}")
-    raise ValueError(f"Необходимо установить {', '.join(missing_vars)} в файле .env")
-
-logger.info("Переменные окружения успешно загружены")
+# Запись и воспроизведение запросов к HeadHunter и GigaChat: off, record или replay
+TRAFFIC_MODE = os.getenv("TRAFFIC_MODE", "off").lower()
+TRAFFIC_FILE = os.getenv("TRAFFIC_FILE", "data/traffic.jsonl.gz")
+TRAFFIC_REPLAY_LATENCY = float(os.getenv("TRAFFIC_REPLAY_LATENCY", "0"))
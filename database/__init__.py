@@ -1,4 +1,10 @@
-from .database import engine, SessionLocal, Base, get_db
+from .database import (
+    engine, async_engine, SessionLocal, AsyncSessionLocal, Base,
+    get_db, get_async_db, get_pool_status
+)
 from .models import UserToken
 
-__all__ = ['engine', 'SessionLocal', 'Base', 'get_db', 'UserToken'] 
\ No newline at end of file
+__all__ = [
+    'engine', 'async_engine', 'SessionLocal', 'AsyncSessionLocal', 'Base',
+    'get_db', 'get_async_db', 'get_pool_status', 'UserToken'
+]
@@ -1,4 +1,5 @@
 from cryptography.fernet import Fernet
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -19,4 +20,12 @@ def encrypt_token(token: str) -> str:
     return fernet.encrypt(token.encode()).decode()
 
 def decrypt_token(encrypted_token: str) -> str:
-    return fernet.decrypt(encrypted_token.encode()).decode() 
\ No newline at end of file
+    return fernet.decrypt(encrypted_token.encode()).decode() 
+
+async def encrypt_tokens_async(*tokens: str) -> tuple:
+    """Шифрует токены в пуле потоков, не блокируя цикл событий."""
+    return await asyncio.to_thread(lambda: tuple(encrypt_token(token) for token in tokens))
+
+async def decrypt_token_async(encrypted_token: str) -> str:
+    """Расшифровывает токен в пуле потоков, не блокируя цикл событий."""
+    return await asyncio.to_thread(decrypt_token, encrypted_token)
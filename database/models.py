@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy import Column, String, DateTime, Integer, Float, Boolean, Text, UniqueConstraint, func
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -30,4 +30,71 @@ class EmployerInfo(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
     def __repr__(self):
-        return f"<EmployerInfo(employer_id={self.employer_id}, manager_id={self.manager_id})>" 
\ No newline at end of file
+        return f"<EmployerInfo(employer_id={self.employer_id}, manager_id={self.manager_id})>"
+
+class ScreeningRun(Base):
+    __tablename__ = "screening_runs"
+
+    id = Column(String, primary_key=True)
+    vacancy_id = Column(String, nullable=False, index=True)
+    employer_id = Column(String)
+    criteria = Column(Text)
+    status = Column(String, nullable=False, default="running")
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ScreeningRun(id={self.id}, vacancy_id={self.vacancy_id}, status={self.status})>"
+
+class ScreeningResult(Base):
+    __tablename__ = "screening_results"
+    __table_args__ = (UniqueConstraint("run_id", "negotiation_id", name="uq_screening_results_run_negotiation"),)
+
+    id = Column(String, primary_key=True)
+    run_id = Column(String, nullable=False, index=True)
+    negotiation_id = Column(String, nullable=False)
+    resume_id = Column(String)
+    score = Column(Float)
+    should_invite = Column(Boolean)
+    summary = Column(Text)
+    created_at = Column(DateTime, default=func.now())
+
+    def __repr__(self):
+        return f"<ScreeningResult(run_id={self.run_id}, negotiation_id={self.negotiation_id}, should_invite={self.should_invite})>"
+
+class ResumeAnalysis(Base):
+    __tablename__ = "resume_analyses"
+    __table_args__ = (
+        UniqueConstraint("resume_id", "fingerprint", "criteria_hash", name="uq_resume_analyses_fingerprint"),
+    )
+
+    id = Column(String, primary_key=True)
+    resume_id = Column(String, nullable=False, index=True)
+    fingerprint = Column(String, nullable=False)
+    criteria_hash = Column(String, nullable=False)
+    analysis = Column(Text)
+    score = Column(Float)
+    should_invite = Column(Boolean)
+    summary = Column(Text)
+    created_at = Column(DateTime, default=func.now())
+
+    def __repr__(self):
+        return f"<ResumeAnalysis(resume_id={self.resume_id}, fingerprint={self.fingerprint})>"
+
+class NegotiationStateChange(Base):
+    __tablename__ = "negotiation_state_changes"
+
+    id = Column(String, primary_key=True)
+    idempotency_key = Column(String, nullable=False, index=True)
+    negotiation_id = Column(String, nullable=False)
+    new_state = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    error = Column(Text)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<NegotiationStateChange(negotiation_id={self.negotiation_id}, new_state={self.new_state}, status={self.status})>"
@@ -1,12 +1,11 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import json
 from loguru import logger
-from langchain_community.chat_models.gigachat import GigaChat
-from config import GIGACHAT_CREDENTIALS
+import llm
+import prompts
 
-def format_api_response_to_human_readable(result: Dict[str, Any], query: str) -> str:
-    """Преобразует JSON-ответ от API в человекочитаемый формат."""
-    system_prompt = """Вы - ИИ-ассистент, который помогает пользователям взаимодействовать с API HeadHunter.
+# Системный промпт для форматирования ответов API
+FORMATTER_SYSTEM_PROMPT = prompts.register("formatter_system", """Вы - ИИ-ассистент, который помогает пользователям взаимодействовать с API HeadHunter.
 Ваша задача - преобразовать технический JSON-ответ от API в понятный для человека текст.
 
 Правила форматирования:
@@ -17,19 +16,34 @@ def format_api_response_to_human_readable(result: Dict[str, Any], query: str) ->
 5. Если в ответе есть ошибка, объясните её простыми словами
 
 Не просто перечисляйте данные, а составьте связный ответ на вопрос пользователя.
-"""
+""", role="system")
 
+FORMATTER_USER_PROMPT = prompts.register(
+    "formatter_user",
+    "Запрос пользователя: {query}\n\nJSON-ответ от API: {result_json}\n\n"
+    "Пожалуйста, преобразуйте этот JSON в человекочитаемый ответ на запрос пользователя."
+)
+
+def format_api_response_to_human_readable(result: Dict[str, Any], query: str, scope: Optional[str] = None) -> str:
+    """
+    Преобразует JSON-ответ от API в человекочитаемый формат.
+
+    Args:
+        result: Ответ API
+        query: Запрос пользователя
+        scope: Область кеша (пользователь): приблизительно совпавший ответ берется
+            только из той же области и с теми же данными API
+    """
     result_json = json.dumps(result, ensure_ascii=False)
     
     messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": f"Запрос пользователя: {query}\n\nJSON-ответ от API: {result_json}\n\nПожалуйста, преобразуйте этот JSON в человекочитаемый ответ на запрос пользователя."}
+        FORMATTER_SYSTEM_PROMPT.message(),
+        FORMATTER_USER_PROMPT.message(query=query, result_json=result_json)
     ]
     
     try:
-        giga = GigaChat(credentials=GIGACHAT_CREDENTIALS, verify_ssl_certs=False)
-        
-        response = giga.chat(messages)
+        response = llm.chat(messages, call_site="formatter", cache=llm.CACHE_APPROXIMATE,
+                            template=FORMATTER_USER_PROMPT.name, cache_exact=f"{scope or ''}\n{result_json}")
         
         if response and hasattr(response, 'content'):
             return response.content
@@ -37,5 +51,5 @@ def format_api_response_to_human_readable(result: Dict[str, Any], query: str) ->
             logger.error(f"Неожиданный формат ответа от GigaChat API: {response}")
             return "Не удалось преобразовать ответ в человекочитаемый формат."
     except Exception as e:
-        logger.error(f"Ошибка при форматировании ответа: {str(e)}", exc_info=True)
+        logger.error(f"Ошибка при форматировании ответа: {str(e)}")
         return f"Произошла ошибка при форматировании ответа: {str(e)}" 
\ No newline at end of file
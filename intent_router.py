@@ -0,0 +1,177 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+from loguru import logger
+from pydantic import BaseModel
+from agentsjson.core.models import Flow
+
+# Слова, не несущие смысла для выбора потока
+STOP_WORDS = {
+    "и", "в", "во", "на", "по", "с", "со", "о", "об", "обо", "к", "ко", "для", "из", "от", "до",
+    "мне", "мой", "моя", "мои", "моих", "меня", "я", "все", "всех", "это", "как", "что", "а",
+    "не", "ли", "же", "бы", "или", "пожалуйста", "покажи", "покажите", "выведи", "дай", "найди", "расскажи",
+}
+
+# Слова, указывающие на фильтры, которые быстрый путь не извлекает
+FILTER_MARKERS = re.compile(
+    r"зарплат|оклад|опыт|возраст|лет\b|образован|регион|город|москв|петербург|страниц",
+    re.IGNORECASE
+)
+
+# Слова, указывающие на изменяющие действия: такие запросы всегда решает LLM
+WRITE_MARKERS = re.compile(
+    r"пригла\w*|отклон\w*|отказ\w*|закр\w*|измен\w*|удал\w*|перевед\w*",
+    re.IGNORECASE
+)
+
+WORD_RE = re.compile(r"[a-zа-яё0-9]+", re.IGNORECASE)
+
+# Веса полей описания потока при подсчете релевантности
+FIELD_WEIGHTS = {"id": 1.5, "title": 2.0, "description": 1.0, "parameters": 0.5}
+
+def stem(word: str) -> str:
+    """Грубая нормализация слова: нижний регистр и усечение окончания."""
+    word = word.lower().replace("ё", "е")
+    return word[:5] if len(word) > 5 else word
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает текст на нормализованные термы без стоп-слов."""
+    return [
+        stem(word) for word in WORD_RE.findall(text or "")
+        if word.lower() not in STOP_WORDS
+    ]
+
+def _clean_value(value: str) -> str:
+    """Удаляет кавычки и завершающую пунктуацию из извлеченного значения."""
+    return value.strip().strip("«»\"'.,!?;: ").strip()
+
+class DirectRule(BaseModel):
+    """Правило прямого вызова потока без обращения к LLM."""
+    flow_id: str
+    pattern: Pattern
+    # Запрещает прямой вызов, если в запросе есть фильтры
+    allow_filters: bool = False
+
+# Начало запроса: не больше одного глагола чтения перед описанием
+READ_PREFIX = r"^\W*(?:(?:покажи|покажите|выведи|выведите|открой|откройте|дай|дайте|найди|найдите)\s+)?"
+
+# Прямой вызов разрешен только для потоков, которые ничего не изменяют
+DIRECT_RULES = [
+    DirectRule(
+        flow_id="get_current_user_info_flow",
+        pattern=re.compile(r"^\W*(?:кто я|обо мне|мой профиль|(?:информаци\w*|данные) (?:обо мне|о текущем пользователе|о пользователе))\W*$", re.IGNORECASE)
+    ),
+    DirectRule(
+        flow_id="get_vacancy_info_flow",
+        pattern=re.compile(READ_PREFIX + r"(?:(?:информаци\w*|данные|подробност\w*)\s+(?:о|об|по|про)\s+)?ваканси\w*\s+(?:№|#|id|номер)?\s*(?P<vacancy_id>\d{5,})\W*$", re.IGNORECASE)
+    ),
+    DirectRule(
+        flow_id="get_negotiations_by_vacancy_flow",
+        pattern=re.compile(READ_PREFIX + r"(?:список\s+)?отклик\w*\s+(?:на|по)\s+ваканси\w*\s+(?P<search_text>.+)$", re.IGNORECASE)
+    ),
+    DirectRule(
+        flow_id="search_and_get_vacancy_info_flow",
+        pattern=re.compile(READ_PREFIX + r"(?:расскаж\w*|информаци\w*|подробност\w*|подробно)\s+(?:о|об|про|по)\s+ваканси\w*\s+(?P<search_text>.+)$", re.IGNORECASE)
+    ),
+    DirectRule(
+        flow_id="get_active_vacancies_flow",
+        pattern=re.compile(READ_PREFIX + r"(?:список\s+)?(?:мои\w*|наши\w*|активн\w*|опубликованн\w*|открыт\w*)(?:\s+(?:мои\w*|наши\w*|активн\w*|опубликованн\w*|открыт\w*))*\s+ваканси\w*\W*$", re.IGNORECASE)
+    ),
+]
+
+class RouteDecision(BaseModel):
+    """Результат маршрутизации запроса."""
+    # Поток для прямого вызова без LLM
+    flow_id: Optional[str] = None
+    parameters: Dict[str, Any] = {}
+    # Потоки-кандидаты для передачи в LLM
+    candidates: List[str] = []
+    scores: Dict[str, float] = {}
+
+class IntentRouter:
+    """
+    Локальный классификатор намерений поверх описаний потоков из agents.json.
+
+    Очевидные запросы на чтение направляются напрямую в поток с извлеченными
+    параметрами, остальные сужают список инструментов до top-k потоков.
+    """
+    def __init__(self, flows: List[Flow], top_k: int = 3, min_score: float = 0.5):
+        self.flows = {flow.id: flow for flow in flows}
+        self.top_k = top_k
+        self.min_score = min_score
+        self._index = {flow.id: self._flow_terms(flow) for flow in flows}
+        document_frequency = Counter(term for terms in self._index.values() for term in terms)
+        total = len(self._index) or 1
+        self._idf = {
+            term: math.log(1 + total / count)
+            for term, count in document_frequency.items()
+        }
+
+    @staticmethod
+    def _flow_terms(flow: Flow) -> Dict[str, float]:
+        """Собирает взвешенные термы из идентификатора, названия, описания и параметров потока."""
+        fields = {
+            "id": flow.id.replace("_", " "),
+            "title": flow.title,
+            "description": flow.description,
+            "parameters": " ".join(
+                f"{param.name.replace('_', ' ')} {param.description or ''}"
+                for param in flow.fields.parameters
+            ),
+        }
+        terms: Dict[str, float] = {}
+        for field, text in fields.items():
+            for term in tokenize(text):
+                terms[term] = max(terms.get(term, 0.0), FIELD_WEIGHTS[field])
+        return terms
+
+    def score(self, query: str) -> List[Tuple[str, float]]:
+        """Возвращает потоки, отсортированные по релевантности запросу."""
+        query_terms = set(tokenize(query))
+        scores = []
+        for flow_id, terms in self._index.items():
+            value = sum(terms[term] * self._idf[term] for term in query_terms if term in terms)
+            # Нормализация, чтобы длинные описания не получали преимущества
+            value /= math.sqrt(len(terms)) if terms else 1
+            scores.append((flow_id, round(value, 4)))
+        return sorted(scores, key=lambda item: item[1], reverse=True)
+
+    def match_direct(self, query: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Ищет правило прямого вызова и извлекает параметры потока."""
+        text = query.strip()
+        if WRITE_MARKERS.search(text):
+            return None
+        for rule in DIRECT_RULES:
+            if rule.flow_id not in self.flows:
+                continue
+            match = rule.pattern.search(text)
+            if not match:
+                continue
+            if not rule.allow_filters and FILTER_MARKERS.search(text):
+                continue
+            parameters = {
+                name: _clean_value(value)
+                for name, value in match.groupdict().items()
+                if value and _clean_value(value)
+            }
+            if len(parameters) != len(match.groupdict()):
+                continue
+            return rule.flow_id, parameters
+        return None
+
+    def route(self, query: str) -> RouteDecision:
+        """Определяет, вызвать ли поток напрямую или какие потоки передать в LLM."""
+        direct = self.match_direct(query)
+        if direct:
+            flow_id, parameters = direct
+            logger.info(f"Запрос направлен напрямую в поток {flow_id} с параметрами {parameters}")
+            return RouteDecision(flow_id=flow_id, parameters=parameters)
+
+        scores = self.score(query)
+        candidates = [
+            flow_id for flow_id, value in scores[:self.top_k]
+            if value >= self.min_score
+        ]
+        logger.debug(f"Потоки-кандидаты для запроса: {candidates}")
+        return RouteDecision(candidates=candidates, scores=dict(scores))
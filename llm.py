@@ -0,0 +1,137 @@
+import math
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from loguru import logger
+from config import (
+    GIGACHAT_CREDENTIALS, LLM_CACHE_ENABLED, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_PATH, LLM_CACHE_APPROXIMATE, LLM_CACHE_APPROX_THRESHOLD
+)
+from llm_cache import LLMCache
+import prompts
+import tracing
+import metrics
+from traffic import traffic
+
+if TYPE_CHECKING:
+    from langchain_community.chat_models.gigachat import GigaChat
+
+# Среднее число символов на токен для смешанного русско-английского текста
+CHARS_PER_TOKEN = 3.0
+# Служебные токены на каждое сообщение чата
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Режимы кеширования ответов
+CACHE_EXACT = "exact"
+CACHE_APPROXIMATE = "approximate"
+
+_client: Optional["GigaChat"] = None
+_client_lock = threading.Lock()
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+def get_client() -> "GigaChat":
+    """Возвращает общий клиент GigaChat, создавая его при первом обращении."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Импорт langchain занимает сотни миллисекунд, поэтому откладывается до первого вызова
+                from langchain_community.chat_models.gigachat import GigaChat
+                _client = GigaChat(credentials=GIGACHAT_CREDENTIALS, verify_ssl_certs=False)
+    return _client
+
+def warm_up() -> None:
+    """
+    Создает клиент GigaChat, открывает соединение и получает токен доступа,
+    чтобы первый запрос пользователя не ждал обмена учетных данных на токен.
+    """
+    client = get_client()
+    # Клиент библиотеки gigachat внутри обертки langchain
+    gigachat_client = getattr(client, "_client", None)
+    if gigachat_client is not None and hasattr(gigachat_client, "get_token"):
+        gigachat_client.get_token()
+
+def get_cache() -> Optional[LLMCache]:
+    """Возвращает общий кеш ответов LLM или None, если кеширование отключено."""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache(
+                    max_entries=LLM_CACHE_MAX_ENTRIES,
+                    ttl_seconds=LLM_CACHE_TTL,
+                    path=LLM_CACHE_PATH or None,
+                    approx_threshold=LLM_CACHE_APPROX_THRESHOLD
+                )
+    return _cache
+
+def chat(messages: List[Dict[str, Any]], call_site: str, cache: Optional[str] = None,
+         template: Optional[str] = None, cache_exact: Optional[str] = None, **kwargs) -> Any:
+    """
+    Отправляет сообщения в GigaChat через общий клиент.
+
+    Args:
+        messages: Сообщения чата
+        call_site: Имя места вызова, используется как пространство имен кеша
+        cache: Режим кеширования (exact/approximate) или None, чтобы не кешировать
+        template: Имя шаблона промпта для статистики (по умолчанию call_site)
+        cache_exact: Часть промпта (данные, область), которая при приблизительном совпадении должна совпасть точно
+        **kwargs: Дополнительные параметры вызова (tools, temperature и т.д.)
+
+    Returns:
+        Ответ GigaChat
+    """
+    llm_cache = get_cache() if cache else None
+    approximate = cache == CACHE_APPROXIMATE and LLM_CACHE_APPROXIMATE
+
+    with tracing.span("llm.chat", call_site=call_site, template=template or call_site, messages=len(messages),
+                      prompt_chars=sum(len(message.get("content") or "") for message in messages)) as span:
+        started = time.perf_counter()
+
+        if llm_cache is not None:
+            cached = llm_cache.get(call_site, messages, kwargs, approximate=approximate, exact=cache_exact)
+            if cached is not None:
+                logger.info(f"Ответ LLM для {call_site} получен из кеша")
+                tokens = _record(template or call_site, messages, cached, started, cached=True)
+                metrics.observe_llm(call_site, time.perf_counter() - started, True, **tokens)
+                span.set_attributes(cached=True, **tokens)
+                return cached
+
+        response = traffic.llm_chat(call_site, messages, kwargs, lambda: get_client().chat(messages, **kwargs))
+        tokens = _record(template or call_site, messages, response, started)
+        metrics.observe_llm(call_site, time.perf_counter() - started, False, **tokens)
+        span.set_attributes(cached=False, tool_calls=len(getattr(response, "tool_calls", None) or []), **tokens)
+
+        if llm_cache is not None and response is not None and getattr(response, "content", None):
+            llm_cache.set(call_site, messages, response, kwargs, approximate=approximate, exact=cache_exact)
+        return response
+
+def _record(template: str, messages: List[Dict[str, Any]], response: Any, started: float,
+            cached: bool = False) -> Dict[str, int]:
+    """Записывает токены и задержку вызова в статистику шаблона и возвращает количество токенов."""
+    # Фактический расход токенов, если клиент его вернул, иначе оценка по длине текста
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens") or sum(estimate_message_tokens(message) for message in messages)
+    completion_tokens = usage.get("output_tokens") or estimate_tokens(getattr(response, "content", None) or "")
+    prompts.registry.record(template, prompt_tokens, completion_tokens, time.perf_counter() - started, cached)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+
+def estimate_tokens(text: str) -> int:
+    """Приблизительно оценивает количество токенов в тексте."""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+def estimate_message_tokens(message: Dict[str, Any]) -> int:
+    """Приблизительно оценивает количество токенов в сообщении чата."""
+    return estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+def cache_stats() -> Dict[str, Any]:
+    """Возвращает статистику кеша ответов LLM."""
+    llm_cache = get_cache()
+    return llm_cache.stats() if llm_cache is not None else {}
+
+def prompt_stats() -> Dict[str, Any]:
+    """Возвращает статистику токенов и задержки по шаблонам промптов."""
+    return prompts.registry.stats()
@@ -0,0 +1,302 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Dict, FrozenSet, List, Optional
+from loguru import logger
+
+WHITESPACE_RE = re.compile(r"\s+")
+WORD_RE = re.compile(r"\w+")
+
+def normalize_text(text: str) -> str:
+    """
+    Нормализует текст промпта: схлопывание пробелов. Регистр сохраняется -
+    идентификаторы, имена и код в разном регистре дают разные ответы.
+    """
+    return WHITESPACE_RE.sub(" ", str(text)).strip()
+
+def normalize_messages(messages: List[Any]) -> List[Dict[str, str]]:
+    """Приводит сообщения чата к нормализованному виду для хеширования."""
+    normalized = []
+    for message in messages:
+        if isinstance(message, dict):
+            role, content = message.get("role", ""), message.get("content", "")
+        else:
+            role, content = getattr(message, "role", ""), getattr(message, "content", "")
+        normalized.append({"role": str(role), "content": normalize_text(content)})
+    return normalized
+
+def shingles(text: str, size: int = 3) -> FrozenSet[int]:
+    """Возвращает множество хешей словесных n-грамм для приблизительного сравнения."""
+    words = WORD_RE.findall(normalize_text(text).lower())
+    if len(words) < size:
+        return frozenset([hash(" ".join(words))])
+    return frozenset(hash(" ".join(words[i:i + size])) for i in range(len(words) - size + 1))
+
+def jaccard(left: FrozenSet[int], right: FrozenSet[int]) -> float:
+    """Коэффициент Жаккара для двух множеств n-грамм."""
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+def serialize_response(response: Any) -> Dict[str, Any]:
+    """Извлекает из ответа LLM текст, вызовы инструментов и расход токенов."""
+    choices = getattr(response, "choices", None)
+    message = choices[0].message if choices else response
+    tool_calls = []
+    for call in getattr(message, "tool_calls", None) or []:
+        function = getattr(call, "function", None)
+        if function is not None:
+            tool_calls.append({"id": getattr(call, "id", None), "name": function.name, "arguments": function.arguments})
+        elif isinstance(call, dict):
+            # Формат LangChain: {"name", "args", "id"}
+            tool_calls.append({"id": call.get("id"), "name": call.get("name"),
+                               "arguments": json.dumps(call.get("args") or {}, ensure_ascii=False)})
+    return {
+        "content": getattr(message, "content", None) or "",
+        "tool_calls": tool_calls,
+        "usage": getattr(response, "usage_metadata", None) or None,
+    }
+
+def deserialize_response(data: Dict[str, Any]) -> SimpleNamespace:
+    """Восстанавливает ответ LLM в форме, которую читают session и executor (content, tool_calls, choices)."""
+    tool_calls = [
+        SimpleNamespace(id=call.get("id"), type="function",
+                        function=SimpleNamespace(name=call["name"], arguments=call["arguments"]))
+        for call in data.get("tool_calls") or []
+    ]
+    message = SimpleNamespace(content=data.get("content") or "", tool_calls=tool_calls)
+    return SimpleNamespace(
+        content=message.content,
+        tool_calls=tool_calls,
+        choices=[SimpleNamespace(message=message)],
+        usage_metadata=data.get("usage")
+    )
+
+def exact_hash(text: Optional[str]) -> str:
+    """Хеш части промпта, которая при приблизительном совпадении должна совпасть точно."""
+    return hashlib.sha256((text or "").encode()).hexdigest()
+
+class CacheEntry:
+    """
+    Запись кеша ответов LLM; value - ответ в виде serialize_response,
+    exact_key - хеш точно совпадающей части промпта (данные, область).
+    """
+    __slots__ = ("namespace", "params_key", "expires_at", "value", "shingles", "exact_key")
+
+    def __init__(self, namespace: str, params_key: str, expires_at: float, value: Any,
+                 shingles: Optional[FrozenSet[int]] = None, exact_key: Optional[str] = None):
+        self.namespace = namespace
+        self.params_key = params_key
+        self.expires_at = expires_at
+        self.value = value
+        self.shingles = shingles
+        self.exact_key = exact_key
+
+class LLMCache:
+    """
+    Кеш ответов LLM с точным совпадением по хешу нормализованного промпта
+    и опциональным приблизительным совпадением по n-граммам.
+
+    Приблизительное совпадение допускается только для записи с тем же
+    местом вызова, параметрами и точно совпадающей частью exact (данные из
+    API и область - пользователь), поэтому близкие промпты с разными данными
+    или из разных сессий не получают чужой ответ.
+
+    Записи ограничены по времени жизни и количеству (вытеснение LRU),
+    при указании пути дублируются в SQLite и переживают перезапуск. Хранятся
+    только текст, вызовы инструментов и расход токенов в JSON, а не объекты
+    клиента; ответы могут содержать персональные данные кандидатов.
+    """
+    def __init__(self, max_entries: int = 1000, ttl_seconds: int = 3600, path: Optional[str] = None,
+                 approx_threshold: float = 0.92, approx_scan_limit: int = 200):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.approx_threshold = approx_threshold
+        self.approx_scan_limit = approx_scan_limit
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.RLock()
+        self._db = None
+        if path:
+            self._open_db(path)
+
+    def _open_db(self, path: str) -> None:
+        """Открывает (и при необходимости создает) файл SQLite для хранения кеша."""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            # Прежняя таблица хранила ответы в pickle; такие записи не загружаются
+            self._db.execute("DROP TABLE IF EXISTS llm_cache")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, params_key TEXT NOT NULL, "
+                "prompt TEXT, exact_key TEXT, value TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(llm_responses)")}
+            if "exact_key" not in columns:
+                self._db.execute("ALTER TABLE llm_responses ADD COLUMN exact_key TEXT")
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_llm_responses_expires ON llm_responses (expires_at)")
+            self._db.execute("DELETE FROM llm_responses WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+            logger.info(f"Кеш ответов LLM подключен к файлу {path}")
+        except sqlite3.Error as e:
+            logger.error(f"Не удалось открыть файл кеша LLM {path}: {e}")
+            self._db = None
+
+    @staticmethod
+    def _params_key(params: Dict[str, Any]) -> str:
+        return hashlib.sha256(
+            json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str).encode()
+        ).hexdigest()
+
+    @classmethod
+    def make_key(cls, namespace: str, messages: List[Any], params: Optional[Dict[str, Any]] = None) -> str:
+        """Формирует ключ кеша по месту вызова, нормализованным сообщениям и параметрам вызова."""
+        payload = json.dumps(
+            {"namespace": namespace, "messages": normalize_messages(messages), "params": cls._params_key(params)},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def _prompt_text(messages: List[Any]) -> str:
+        return "\n".join(message["content"] for message in normalize_messages(messages))
+
+    def _record(self, namespace: str, outcome: str) -> None:
+        stats = self._stats.setdefault(namespace, {"hits": 0, "approximate_hits": 0, "misses": 0})
+        stats[outcome] += 1
+
+    def get(self, namespace: str, messages: List[Any], params: Optional[Dict[str, Any]] = None,
+            approximate: bool = False, exact: Optional[str] = None) -> Optional[Any]:
+        """
+        Возвращает сохраненный ответ или None, если подходящей записи нет.
+
+        Args:
+            exact: Часть промпта, которая для приблизительного совпадения должна совпасть точно
+        """
+        key = self.make_key(namespace, messages, params)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at < now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                entry = self._load(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._record(namespace, "hits")
+                return deserialize_response(entry.value)
+
+            if approximate:
+                value = self._find_approximate(namespace, self._params_key(params), exact_hash(exact), messages, now)
+                if value is not None:
+                    self._record(namespace, "approximate_hits")
+                    return deserialize_response(value)
+
+            self._record(namespace, "misses")
+            return None
+
+    def _find_approximate(self, namespace: str, params_key: str, exact_key: str, messages: List[Any],
+                          now: float) -> Optional[Any]:
+        """Ищет среди последних записей места вызова с теми же данными промпт, близкий к текущему."""
+        target = shingles(self._prompt_text(messages))
+        scanned = 0
+        for entry in reversed(self._entries.values()):
+            if scanned >= self.approx_scan_limit:
+                break
+            if (entry.namespace != namespace or entry.params_key != params_key or entry.shingles is None
+                    or entry.exact_key != exact_key):
+                continue
+            scanned += 1
+            if entry.expires_at >= now and jaccard(target, entry.shingles) >= self.approx_threshold:
+                return entry.value
+        return None
+
+    def _load(self, key: str, now: float) -> Optional[CacheEntry]:
+        """Загружает запись из SQLite в память."""
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT namespace, params_key, prompt, exact_key, value, expires_at FROM llm_responses "
+                "WHERE key = ? AND expires_at >= ?",
+                (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            namespace, params_key, prompt, exact_key, value, expires_at = row
+            entry = CacheEntry(namespace, params_key, expires_at, json.loads(value),
+                               shingles(prompt) if prompt is not None else None, exact_key)
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Не удалось прочитать запись кеша LLM: {e}")
+            return None
+        self._store(key, entry)
+        return entry
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set(self, namespace: str, messages: List[Any], value: Any, params: Optional[Dict[str, Any]] = None,
+            approximate: bool = False, ttl_seconds: Optional[int] = None, exact: Optional[str] = None) -> None:
+        """Сохраняет ответ LLM в кеше (exact - как в get)."""
+        key = self.make_key(namespace, messages, params)
+        value = serialize_response(value)
+        params_key = self._params_key(params)
+        now = time.time()
+        expires_at = now + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        prompt = self._prompt_text(messages) if approximate else None
+        exact_key = exact_hash(exact) if approximate else None
+        entry = CacheEntry(namespace, params_key, expires_at, value, shingles(prompt) if prompt is not None else None,
+                           exact_key)
+        with self._lock:
+            self._store(key, entry)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_responses "
+                    "(key, namespace, params_key, prompt, exact_key, value, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, namespace, params_key, prompt, exact_key,
+                     json.dumps(value, ensure_ascii=False, default=str), now, expires_at)
+                )
+                # Ограничиваем размер файла тем же числом записей, что и в памяти
+                self._db.execute(
+                    "DELETE FROM llm_responses WHERE key IN ("
+                    "SELECT key FROM llm_responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                self._db.commit()
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"Не удалось сохранить запись кеша LLM на диск: {e}")
+
+    def clear(self) -> None:
+        """Очищает кеш в памяти и на диске."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает статистику попаданий по местам вызова."""
+        with self._lock:
+            namespaces = {}
+            for namespace, counters in self._stats.items():
+                total = counters["hits"] + counters["approximate_hits"] + counters["misses"]
+                namespaces[namespace] = {
+                    **counters,
+                    "hit_rate": round((counters["hits"] + counters["approximate_hits"]) / total, 4) if total else 0.0
+                }
+            return {"size": len(self._entries), "max_entries": self.max_entries, "namespaces": namespaces}
@@ -0,0 +1,194 @@
+"""
+Единая настройка логирования.
+
+Все записи - и loguru, и стандартного logging (модули
+agentsjson.integrations) - проходят через один обработчик loguru:
+
+    - запись в отдельном потоке (enqueue): вызывающий поток не ждет вывода
+      в stderr;
+    - текстовый формат или JSON (одна запись - одна строка);
+    - уровень по умолчанию и уровни для отдельных модулей по префиксу имени
+      ("agentsjson.integrations.hh=WARNING,session=DEBUG");
+    - выборка частых сообщений: не больше sample_per_second записей в секунду
+      из одного места вызова ниже WARNING, число пропущенных добавляется к
+      следующей записи;
+    - замена токенов, адресов почты и телефонов в тексте сообщения.
+
+Настраивается из config.py при первом импорте.
+"""
+import inspect
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+FORMAT_TEXT = "text"
+FORMAT_JSON = "json"
+
+TEXT_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>{extra[sampled]}"
+)
+
+MASK = "***"
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+# Телефон: с кодом страны (+7 ...) или с разделителями (999-123-45-67).
+# Длинные числа без разделителей (идентификаторы HeadHunter) не заменяются
+PHONE_RE = re.compile(r"\+\d[\d\s()-]{8,}\d|\b\d{3}[\s-]\d{3}[\s-]\d{2}[\s-]\d{2}\b")
+# Значения токенов в заголовках, параметрах и repr словарей
+TOKEN_RE = re.compile(
+    r"(?i)(bearer\s+|(?:access_token|refresh_token|client_secret|authorization|password|token)['\"]?\s*[:=]\s*['\"]?)"
+    r"[^\s'\",&}]+"
+)
+
+def redact_text(text: str) -> str:
+    """Заменяет токены, адреса почты и телефоны в строке."""
+    return PHONE_RE.sub(MASK, EMAIL_RE.sub(MASK, TOKEN_RE.sub(lambda match: match.group(1) + MASK, text)))
+
+def parse_levels(spec: str) -> List[Tuple[str, int]]:
+    """
+    Разбирает уровни модулей "модуль=УРОВЕНЬ,..." в список (префикс, номер уровня),
+    более длинные префиксы первыми.
+    """
+    levels = []
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, level = (part.strip() for part in item.split("=", 1))
+        if name and level:
+            levels.append((name, logger.level(level.upper()).no))
+    return sorted(levels, key=lambda item: len(item[0]), reverse=True)
+
+class RecordFilter:
+    """Фильтр записей loguru: уровень модуля и выборка частых сообщений."""
+    def __init__(self, level: int, levels: List[Tuple[str, int]], sample_per_second: int):
+        self.level = level
+        self.levels = levels
+        self.sample_per_second = sample_per_second
+        self._module_levels: Dict[str, int] = {}
+        # (модуль, строка) -> [секунда, записано, пропущено]
+        self._windows: Dict[Tuple[str, int], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def enabled_for(self, name: str, level: int) -> bool:
+        return level >= self.level_for(name)
+
+    def level_for(self, name: str) -> int:
+        level = self._module_levels.get(name)
+        if level is None:
+            level = next(
+                (module_level for prefix, module_level in self.levels
+                 if name == prefix or name.startswith(prefix + ".")),
+                self.level
+            )
+            self._module_levels[name] = level
+        return level
+
+    def _sample(self, record: Dict[str, Any]) -> bool:
+        key = (record["name"], record["line"])
+        second = int(time.monotonic())
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window[0] != second:
+                if window is not None and window[2]:
+                    record["extra"]["sampled"] = f" (пропущено похожих: {window[2]})"
+                self._windows[key] = [second, 1, 0]
+                return True
+            if window[1] >= self.sample_per_second:
+                window[2] += 1
+                return False
+            window[1] += 1
+            return True
+
+    def __call__(self, record: Dict[str, Any]) -> bool:
+        level = record["level"].no
+        if level < self.level_for(record["name"] or ""):
+            return False
+        if self.sample_per_second > 0 and level < logging.WARNING and not self._sample(record):
+            return False
+        # Замена выполняется только для записей, которые будут выведены
+        record["message"] = redact_text(record["message"])
+        record["extra"].setdefault("sampled", "")
+        return True
+
+_record_filter: Optional[RecordFilter] = None
+
+def enabled_for(name: str, level: str) -> bool:
+    """Проверяет, будет ли выведена запись уровня level из модуля name (до настройки - всегда да)."""
+    if _record_filter is None:
+        return True
+    return _record_filter.enabled_for(name, logger.level(level.upper()).no)
+
+def _json_format(record: Dict[str, Any]) -> str:
+    data = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    extra = {key: value for key, value in record["extra"].items() if key not in ("sampled", "json")}
+    if extra:
+        data["extra"] = extra
+    if record["extra"]["sampled"]:
+        data["sampled"] = record["extra"]["sampled"].strip(" ()")
+    if record["exception"] is not None:
+        exception = record["exception"]
+        data["exception"] = f"{exception.type.__name__ if exception.type else ''}: {exception.value}"
+    record["extra"]["json"] = json.dumps(data, ensure_ascii=False, default=str)
+    return "{extra[json]}\n"
+
+class InterceptHandler(logging.Handler):
+    """Передает записи стандартного logging в loguru с исходным модулем и строкой."""
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            level: Any = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        # Поднимаемся по стеку до кода, вызвавшего logging
+        frame, depth = inspect.currentframe(), 0
+        while frame is not None and (depth == 0 or frame.f_code.co_filename == logging.__file__):
+            frame = frame.f_back
+            depth += 1
+        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+def setup_logging(level: str = "INFO", log_format: str = FORMAT_TEXT, levels: str = "",
+                  sample_per_second: int = 0, enqueue: bool = True, sink: Optional[Any] = None) -> None:
+    """
+    Настраивает loguru и перенаправляет в него стандартный logging.
+
+    Args:
+        level: Уровень по умолчанию
+        log_format: text или json
+        levels: Уровни модулей "модуль=УРОВЕНЬ,..."
+        sample_per_second: Лимит записей ниже WARNING из одного места вызова в секунду (0 - без выборки)
+        enqueue: Писать в отдельном потоке
+        sink: Куда писать (по умолчанию stderr)
+    """
+    global _record_filter
+    default_level = logger.level(level.upper()).no
+    module_levels = parse_levels(levels)
+    record_filter = _record_filter = RecordFilter(default_level, module_levels, sample_per_second)
+
+    logger.remove()
+    logger.add(
+        sink or sys.stderr,
+        format=_json_format if log_format == FORMAT_JSON else TEXT_FORMAT,
+        level=min([default_level] + [module_level for _, module_level in module_levels]),
+        filter=record_filter,
+        enqueue=enqueue,
+        colorize=None if log_format != FORMAT_JSON else False,
+        # Значения переменных в трассировках (diagnose) раскрывают данные запросов и дорого форматируются
+        backtrace=False,
+        diagnose=False,
+    )
+
+    # Уровни выставляются и стандартным логгерам, чтобы отброшенные записи не форматировались
+    logging.basicConfig(handlers=[InterceptHandler()], level=default_level, force=True)
+    for name, module_level in module_levels:
+        logging.getLogger(name).setLevel(module_level)
@@ -1,43 +1,85 @@
+import hmac
+import time
+
+# Отсчет времени запуска: импорт модулей приложения и фаза lifespan
+_started = time.perf_counter()
+
 import uvicorn
-from fastapi import FastAPI, Header, Depends
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Header, Depends, Query, HTTPException
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
-from dotenv import load_dotenv
-from database.database import engine, Base, get_db
-from api.auth import router as auth_router
+from database.database import engine, get_async_db
+from database.models import Base
+from api.auth import router as auth_router, close_http_client
 from api_handlers import chat_endpoint, clear_session, ChatRequest
-from config import GIGACHAT_CREDENTIALS, HH_CLIENT_ID, HH_CLIENT_SECRET
-from sqlalchemy.orm import Session
-
-# Загрузка переменных окружения
-load_dotenv()
-logger.info("Проверка переменных окружения...")
-
-# Проверка наличия необходимых переменных окружения
-required_env_vars = {
-    "GIGACHAT_CREDENTIALS": GIGACHAT_CREDENTIALS,
-    "HH_CLIENT_ID": HH_CLIENT_ID,
-    "HH_CLIENT_SECRET": HH_CLIENT_SECRET
-}
-
-# Проверяем наличие всех необходимых переменных окружения
-for var_name, var_value in required_env_vars.items():
-    if not var_value:
-        logger.error(f"Отсутствует обязательная переменная окружения: {var_name}")
-        raise ValueError(f"Необходимо установить {var_name} в файле .env")
-    logger.info(f"Переменная {var_name} успешно загружена")
-
-# Инициализация базы данных
-try:
-    logger.info("Инициализация базы данных...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("База данных успешно инициализирована")
-except Exception as e:
-    logger.error(f"Ошибка при инициализации базы данных: {e}")
-    raise
+from config import (
+    GIGACHAT_CREDENTIALS, HH_CLIENT_ID, HH_CLIENT_SECRET, SYNC_ENABLED, METRICS_ENABLED, METRICS_TOKEN,
+    PROFILING_ENABLED, DB_CREATE_TABLES, STARTUP_TARGET_MS, PREWARM_ENABLED
+)
+import metrics
+import profiling
+from sync_worker import sync_worker
+from traffic import traffic
+from prewarm import prewarm
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def check_environment() -> None:
+    """Проверка наличия необходимых переменных окружения при запуске (config.py их только читает)."""
+    logger.info("Проверка переменных окружения...")
+    required_env_vars = {
+        "GIGACHAT_CREDENTIALS": GIGACHAT_CREDENTIALS,
+        "HH_CLIENT_ID": HH_CLIENT_ID,
+        "HH_CLIENT_SECRET": HH_CLIENT_SECRET
+    }
+    for var_name, var_value in required_env_vars.items():
+        if not var_value:
+            logger.error(f"Отсутствует обязательная переменная окружения: {var_name}")
+            raise ValueError(f"Необходимо установить {var_name} в файле .env")
+        logger.info(f"Переменная {var_name} успешно загружена")
+
+def init_database() -> None:
+    """Создание недостающих таблиц. В продакшене схема управляется миграциями (DB_CREATE_TABLES=false)."""
+    if not DB_CREATE_TABLES:
+        logger.info("Создание таблиц пропущено (DB_CREATE_TABLES=false)")
+        return
+    try:
+        logger.info("Инициализация базы данных...")
+        Base.metadata.create_all(bind=engine)
+        logger.info("База данных успешно инициализирована")
+    except Exception as e:
+        logger.error(f"Ошибка при инициализации базы данных: {e}")
+        raise
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    check_environment()
+    init_database()
+    if SYNC_ENABLED:
+        sync_worker.start()
+    if PREWARM_ENABLED:
+        prewarm.start()
+    else:
+        prewarm.mark_ready()
+
+    app.state.startup_seconds = time.perf_counter() - _started
+    startup_ms = app.state.startup_seconds * 1000
+    if startup_ms > STARTUP_TARGET_MS:
+        logger.warning(f"Запуск приложения занял {startup_ms:.0f} мс (цель {STARTUP_TARGET_MS:.0f} мс)")
+    else:
+        logger.info(f"Приложение запущено за {startup_ms:.0f} мс")
+
+    yield
+
+    await prewarm.stop()
+    await sync_worker.stop()
+    await close_http_client()
+    traffic.close()
 
 # Инициализация FastAPI приложения
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Настройка CORS для расширения Chrome
 app.add_middleware(
@@ -63,9 +105,20 @@ async def options_chat():
 async def chat(
     request: ChatRequest,
     x_extension_user_id: str = Header(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    x_profile: Optional[str] = Header(None),
+    profile: Optional[str] = Query(None)
 ):
-    return await chat_endpoint(request, x_extension_user_id, db)
+    profile_mode = x_profile or profile
+    if not profile_mode or not PROFILING_ENABLED:
+        return await chat_endpoint(request, x_extension_user_id, db)
+
+    try:
+        with profiling.profile(profile_mode.lower(), name="chat") as request_profile:
+            result = await chat_endpoint(request, x_extension_user_id, db)
+    except (ValueError, profiling.ProfilingBusyError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**result, "profile": request_profile.summary()}
 
 @app.post("/clear_session")
 async def clear(session_id: str):
@@ -75,5 +128,19 @@ async def clear(session_id: str):
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Готовность принимать запросы: 200 только после прогрева воркера."""
+    status = prewarm.status()
+    return JSONResponse({"status": "ready" if status["ready"] else "warming_up", **status},
+                        status_code=200 if status["ready"] else 503)
+
+if METRICS_ENABLED:
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics_endpoint(authorization: Optional[str] = Header(None)):
+        if METRICS_TOKEN and not hmac.compare_digest((authorization or "").encode(), f"Bearer {METRICS_TOKEN}".encode()):
+            raise HTTPException(status_code=401, detail="Неверный токен доступа к метрикам")
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
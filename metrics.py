@@ -0,0 +1,246 @@
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+from config import METRICS_ENABLED
+
+PREFIX = "hh_assistant_"
+
+# Границы корзин гистограмм задержки в секундах
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Сэмпл метрики: (метки, значение)
+Sample = Tuple[Dict[str, Any], float]
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """Монотонно растущий счетчик."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        return [(dict(zip(self.labels, key)), value) for key, value in values]
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in self.samples()
+        ]
+
+class Histogram(_Metric):
+    """Гистограмма с фиксированными корзинами."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # Для каждого набора меток: счетчики корзин (последняя - +Inf), сумма
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts[0][index] += 1
+            counts[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts[0]), counts[1]) for key, counts in self._values.items()]
+        lines = self.header()
+        for key, buckets, total in values:
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), buckets):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+class Registry:
+    """Реестр метрик и функций, собирающих текущие значения при каждом запросе /metrics."""
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]) -> None:
+        """Регистрирует функцию, возвращающую (имя, тип, описание, сэмплы) для метрик-состояний."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                collected = list(collector())
+            except Exception as e:
+                logger.warning(f"Ошибка при сборе метрик {getattr(collector, '__name__', collector)}: {e}")
+                continue
+            for name, kind, documentation, samples in collected:
+                lines.append(f"# HELP {PREFIX}{name} {documentation}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                lines.extend(f"{PREFIX}{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+CHAT_LATENCY = registry.register(Histogram(
+    "chat_request_duration_seconds", "Длительность обработки запроса /chat", ("status",)
+))
+LLM_LATENCY = registry.register(Histogram(
+    "llm_request_duration_seconds", "Длительность вызова LLM по месту вызова", ("call_site", "cached")
+))
+LLM_TOKENS = registry.register(Counter(
+    "llm_tokens_total", "Токены LLM по месту вызова", ("call_site", "kind")
+))
+HH_LATENCY = registry.register(Histogram(
+    "hh_request_duration_seconds", "Длительность запроса к API HeadHunter без ожидания ограничителя", ("operation_id",)
+))
+HH_REQUESTS = registry.register(Counter(
+    "hh_requests_total", "Запросы к API HeadHunter по операции и статусу ответа", ("operation_id", "status")
+))
+# Обращения к кешам приложения (сохраненные анализы, локальное хранилище, описания инструментов);
+# выводятся вместе со счетчиками кеша LLM в collect_caches
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Обращения к кешу по результату", ("cache", "namespace", "result")
+)
+
+def collect_db_pool():
+    """Состояние пулов соединений с базой данных."""
+    from database.database import get_pool_status
+    connections, events = [], []
+    for pool, stats in get_pool_status().items():
+        for state in ("size", "checkedin", "checkedout", "overflow"):
+            if state in stats:
+                connections.append(({"pool": pool, "state": state}, stats[state]))
+        for event in ("connects", "checkouts", "checkins", "invalidations"):
+            events.append(({"pool": pool, "event": event}, stats.get(event, 0)))
+    return [
+        ("db_pool_connections", "gauge", "Соединения пула базы данных по состоянию", connections),
+        ("db_pool_events_total", "counter", "События пула соединений базы данных", events),
+    ]
+
+def collect_caches():
+    """Попадания в кеш ответов LLM по месту вызова и в кеши приложения."""
+    import llm
+    stats = llm.cache_stats()
+    entries, requests, ratios = [], [], []
+    if stats:
+        entries.append(({"cache": "llm"}, stats.get("size", 0)))
+        for namespace, counters in stats.get("namespaces", {}).items():
+            for result, key in (("hit", "hits"), ("approximate_hit", "approximate_hits"), ("miss", "misses")):
+                requests.append(({"cache": "llm", "namespace": namespace, "result": result}, counters[key]))
+            ratios.append(({"cache": "llm", "namespace": namespace}, counters["hit_rate"]))
+
+    local = CACHE_REQUESTS.samples()
+    requests.extend(local)
+    totals: Dict[Tuple[str, str], List[float]] = {}
+    for labels, value in local:
+        counts = totals.setdefault((labels["cache"], labels["namespace"]), [0, 0])
+        counts[0 if labels["result"] == "hit" else 1] += value
+    for (cache, namespace), (hits, misses) in totals.items():
+        ratios.append(({"cache": cache, "namespace": namespace}, round(hits / (hits + misses), 4) if hits + misses else 0))
+
+    collected = []
+    if entries:
+        collected.append(("cache_entries", "gauge", "Количество записей в кеше", entries))
+    if requests:
+        collected.append(("cache_requests_total", "counter", "Обращения к кешу по результату", requests))
+        collected.append(("cache_hit_ratio", "gauge", "Доля попаданий в кеш", ratios))
+    return collected
+
+def collect_prompts():
+    """Токены и задержка вызовов LLM по шаблонам промптов."""
+    import llm
+    calls, tokens, average, maximum = [], [], [], []
+    for template, stats in llm.prompt_stats().items():
+        calls.append(({"template": template, "cached": "false"}, stats["calls"] - stats["cached"]))
+        calls.append(({"template": template, "cached": "true"}, stats["cached"]))
+        tokens.append(({"template": template, "kind": "prompt"}, stats["prompt_tokens"]))
+        tokens.append(({"template": template, "kind": "completion"}, stats["completion_tokens"]))
+        average.append(({"template": template}, stats["avg_latency_ms"] / 1000))
+        maximum.append(({"template": template}, stats["max_latency_ms"] / 1000))
+    if not calls:
+        return []
+    return [
+        ("prompt_calls_total", "counter", "Вызовы LLM по шаблону промпта", calls),
+        ("prompt_tokens_total", "counter", "Токены LLM по шаблону промпта", tokens),
+        ("prompt_latency_avg_seconds", "gauge", "Средняя задержка вызова LLM по шаблону промпта", average),
+        ("prompt_latency_max_seconds", "gauge", "Максимальная задержка вызова LLM по шаблону промпта", maximum),
+    ]
+
+registry.register_collector(collect_db_pool)
+registry.register_collector(collect_caches)
+registry.register_collector(collect_prompts)
+
+def observe_llm(call_site: str, seconds: float, cached: bool, prompt_tokens: int, completion_tokens: int) -> None:
+    """Учитывает вызов LLM."""
+    LLM_LATENCY.observe(seconds, call_site=call_site, cached=str(cached).lower())
+    LLM_TOKENS.inc(prompt_tokens, call_site=call_site, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, call_site=call_site, kind="completion")
+
+def observe_cache(cache: str, namespace: str, hits: int = 0, misses: int = 0) -> None:
+    """Учитывает обращения к кешу приложения: hits - данные взяты из кеша, misses - получены заново."""
+    if hits:
+        CACHE_REQUESTS.inc(hits, cache=cache, namespace=namespace, result="hit")
+    if misses:
+        CACHE_REQUESTS.inc(misses, cache=cache, namespace=namespace, result="miss")
+
+def observe_hh(operation_id: str, seconds: float, status: Optional[int]) -> None:
+    """Учитывает запрос к API HeadHunter (status None - ошибка соединения)."""
+    HH_LATENCY.observe(seconds, operation_id=operation_id)
+    HH_REQUESTS.inc(operation_id=operation_id, status=status if status is not None else "error")
+
+def render() -> str:
+    return registry.render()
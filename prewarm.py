@@ -0,0 +1,116 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from loguru import logger
+from sqlalchemy import select
+from database.database import AsyncSessionLocal
+from database.models import UserToken
+from database.encryption import decrypt_token_async
+from agentsjson.integrations.hh.tools import Executor
+from config import HH_API_URL, PREWARM_HH_SESSIONS
+import llm
+import session
+
+class Prewarm:
+    """
+    Прогрев воркера после запуска.
+
+    Выполняется в фоне, чтобы /health отвечал сразу, а /ready - только после
+    того, как первому запросу не придется ждать разбора agents.json,
+    построения описаний инструментов, получения токена GigaChat и установки
+    соединений с API HeadHunter. Без загруженного agents.json воркер не
+    готов; остальные шаги необязательны, их ошибки только записываются в лог.
+    """
+    def __init__(self):
+        self.ready = False
+        self.error: Optional[str] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _step(self, name: str, func: Callable[[], Awaitable[Any]], required: bool = False) -> None:
+        started = time.perf_counter()
+        try:
+            result = await func()
+            self.steps[name] = {"ok": True, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+            if result is not None:
+                self.steps[name]["result"] = result
+        except Exception as e:
+            self.steps[name] = {"ok": False, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1), "error": str(e)}
+            if required:
+                raise
+            logger.warning(f"Прогрев: шаг {name} завершился ошибкой: {str(e)}")
+
+    @staticmethod
+    async def _load_agent():
+        agent = await asyncio.to_thread(session.load_agent)
+        # Полный набор инструментов нужен запросам, которые маршрутизатор не сузил
+        _, tokens = await asyncio.to_thread(agent.get_tools, agent.flows)
+        return {"flows": len(agent.flows), "tools_tokens": tokens}
+
+    @staticmethod
+    async def _warm_llm():
+        await asyncio.to_thread(llm.warm_up)
+
+    @staticmethod
+    async def _warm_hh_sessions():
+        """Открывает сессии API HeadHunter последних активных пользователей (кеш Executor._get_session)."""
+        if PREWARM_HH_SESSIONS <= 0:
+            return {"sessions": 0}
+        async with AsyncSessionLocal() as db:
+            encrypted_tokens = (await db.execute(
+                select(UserToken.encrypted_access_token)
+                .order_by(UserToken.updated_at.desc())
+                .limit(PREWARM_HH_SESSIONS)
+            )).scalars().all()
+
+        def connect(token: str) -> None:
+            # Любой ответ подходит: важно установить TLS-соединение в пуле сессии
+            Executor._get_session(token).head(HH_API_URL, timeout=5)
+
+        opened = 0
+        for encrypted_token in encrypted_tokens:
+            try:
+                token = await decrypt_token_async(encrypted_token)
+                await asyncio.to_thread(connect, token)
+                opened += 1
+            except Exception as e:
+                logger.warning(f"Прогрев: не удалось открыть сессию API HeadHunter: {str(e)}")
+        return {"sessions": opened}
+
+    async def run(self) -> None:
+        started = time.perf_counter()
+        try:
+            await self._step("agents_json", self._load_agent, required=True)
+            await asyncio.gather(
+                self._step("llm", self._warm_llm),
+                self._step("hh_sessions", self._warm_hh_sessions),
+            )
+            self.ready = True
+            logger.info(f"Прогрев завершен за {(time.perf_counter() - started) * 1000:.0f} мс")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Ошибка прогрева, воркер не готов: {str(e)}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def mark_ready(self) -> None:
+        """Отмечает воркер готовым без прогрева (PREWARM_ENABLED=false)."""
+        self.ready = True
+
+    def status(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "error": self.error, "steps": dict(self.steps)}
+
+prewarm = Prewarm()
@@ -0,0 +1,197 @@
+"""
+Профилирование отдельных запросов /chat.
+
+Включается PROFILING_ENABLED и запрашивается заголовком X-Profile или
+параметром ?profile= со значением режима:
+
+    sample   - выборочный профилировщик: фоновый поток каждые
+               PROFILING_INTERVAL_MS снимает стек потока запроса. Результат -
+               свернутые стеки (.folded) для flamegraph.pl, speedscope или
+               inferno; накладные расходы малы и не зависят от числа вызовов.
+    cprofile - детерминированный cProfile (.prof для pstats, snakeviz).
+               Точные счетчики вызовов ценой заметного замедления.
+
+Профилируется только поток, обрабатывающий запрос: работа в пулах потоков
+(скрининг, массовые действия) видна как ожидание. Блокирующая часть /chat
+обычно выполняется в отдельном потоке (run_blocking); в профилируемом запросе
+она выполняется в потоке запроса, чтобы попасть в профиль, и на это время
+останавливает цикл событий.
+"""
+import asyncio
+import contextvars
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from loguru import logger
+from config import PROFILING_DIR, PROFILING_INTERVAL_MS
+
+MODE_SAMPLE = "sample"
+MODE_CPROFILE = "cprofile"
+MODES = (MODE_SAMPLE, MODE_CPROFILE)
+
+# Количество самых затратных функций в сводке ответа
+SUMMARY_TOP = 10
+
+# cProfile допускает один активный профилировщик на процесс
+_cprofile_lock = threading.Lock()
+# Запрос профилируется: блокирующие вызовы выполняются в его потоке
+_profiling: contextvars.ContextVar[bool] = contextvars.ContextVar("profiling", default=False)
+
+class ProfilingBusyError(RuntimeError):
+    """Детерминированное профилирование уже выполняется для другого запроса."""
+
+def _frame_label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Периодически снимает стек заданного потока и считает одинаковые стеки."""
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        """Свернутые стеки: "корень;...;лист количество" на строку."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int = SUMMARY_TOP) -> List[Dict[str, Any]]:
+        """Функции, чаще всего находившиеся на вершине стека."""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [
+            {"function": leaf, "samples": count, "share": round(count / self.samples, 3)}
+            for leaf, count in leaves.most_common(limit)
+        ]
+
+class RequestProfile:
+    """Результат профилирования запроса."""
+    def __init__(self, mode: str, name: str):
+        self.mode = mode
+        self.name = name
+        self.path: Optional[str] = None
+        self.elapsed = 0.0
+        self.samples = 0
+        self.top: List[Dict[str, Any]] = []
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "elapsed_ms": round(self.elapsed * 1000, 1),
+            "samples": self.samples,
+            "top": self.top,
+        }
+
+def _output_path(name: str, extension: str) -> str:
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    return os.path.join(PROFILING_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{os.getpid()}-{threading.get_ident()}.{extension}")
+
+def _cprofile_top(profiler: cProfile.Profile, limit: int = SUMMARY_TOP) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(profiler)
+    # stats: {(файл, строка, функция): (примитивные вызовы, вызовы, собственное время, общее время, вызывающие)}
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [
+        {
+            "function": f"{function} ({os.path.basename(filename)}:{line})",
+            "calls": calls,
+            "self_ms": round(self_time * 1000, 2),
+            "cumulative_ms": round(cumulative * 1000, 2),
+        }
+        for (filename, line, function), (_, calls, self_time, cumulative, _) in rows
+    ]
+
+@contextmanager
+def profile(mode: str, name: str = "chat") -> Iterator[RequestProfile]:
+    """
+    Профилирует блок кода в текущем потоке и сохраняет результат в PROFILING_DIR.
+
+    Args:
+        mode: sample или cprofile
+        name: Имя профиля в имени файла
+    """
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим профилирования: {mode}, доступны: {', '.join(MODES)}")
+    token = _profiling.set(True)
+    try:
+        with _profile(mode, name) as result:
+            yield result
+    finally:
+        _profiling.reset(token)
+
+@contextmanager
+def _profile(mode: str, name: str) -> Iterator[RequestProfile]:
+    result = RequestProfile(mode, name)
+    started = time.perf_counter()
+    if mode == MODE_SAMPLE:
+        sampler = StackSampler(threading.get_ident(), PROFILING_INTERVAL_MS / 1000)
+        sampler.start()
+        try:
+            yield result
+        finally:
+            sampler.stop()
+            result.elapsed = time.perf_counter() - started
+            result.samples = sampler.samples
+            result.top = sampler.top()
+            result.path = _output_path(name, "folded")
+            with open(result.path, "w", encoding="utf-8") as f:
+                f.write(sampler.folded())
+            _log_saved(result)
+    else:
+        if not _cprofile_lock.acquire(blocking=False):
+            raise ProfilingBusyError("Профилирование cProfile уже выполняется для другого запроса")
+        try:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield result
+            finally:
+                profiler.disable()
+                result.elapsed = time.perf_counter() - started
+                result.top = _cprofile_top(profiler)
+                result.path = _output_path(name, "prof")
+                profiler.dump_stats(result.path)
+                _log_saved(result)
+        finally:
+            _cprofile_lock.release()
+
+async def run_blocking(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """
+    Выполняет блокирующую функцию в отдельном потоке, не останавливая цикл событий.
+    В профилируемом запросе функция выполняется в текущем потоке, чтобы попасть в профиль.
+    """
+    if _profiling.get():
+        return func(*args, **kwargs)
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+def _log_saved(result: RequestProfile) -> None:
+    logger.info(f"Профиль {result.name} ({result.mode}, {result.elapsed * 1000:.0f} мс) сохранен в {result.path}")
@@ -0,0 +1,131 @@
+import threading
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+class PromptTemplate:
+    """
+    Предварительно разобранный шаблон промпта.
+
+    Текст шаблона разбирается один раз при регистрации на неизменяемые
+    фрагменты и подстановки, поэтому при вызове остается только склеить строки.
+    Шаблоны без подстановок возвращают одну и ту же строку, что сохраняет
+    префикс запроса побайтно одинаковым для кеширования на стороне провайдера.
+    """
+    __slots__ = ("name", "role", "text", "fields", "prefix", "_parts", "_static")
+
+    def __init__(self, name: str, text: str, role: str = "user"):
+        self.name = name
+        self.role = role
+        self.text = text
+        # Фрагменты: (текст, имя подстановки, преобразование, формат)
+        self._parts: List[Tuple[str, Optional[str], Optional[str], str]] = [
+            (literal, field, conversion, spec or "")
+            for literal, field, spec, conversion in Formatter().parse(text)
+        ]
+        self.fields = tuple(dict.fromkeys(field for _, field, _, _ in self._parts if field is not None))
+        if any(field == "" or (field and not field.isidentifier()) for _, field, _, _ in self._parts):
+            raise ValueError(f"Шаблон {name} поддерживает только именованные подстановки")
+        # Неизменяемое начало шаблона до первой подстановки
+        self.prefix = self._parts[0][0] if self._parts else ""
+        self._static = None
+        self._static = self.render() if not self.fields else None
+
+    def render(self, **values: Any) -> str:
+        """Подставляет значения в шаблон."""
+        if self._static is not None:
+            return self._static
+        missing = [field for field in self.fields if field not in values]
+        if missing:
+            raise KeyError(f"Для шаблона {self.name} не переданы значения: {', '.join(missing)}")
+        chunks = []
+        for literal, field, conversion, spec in self._parts:
+            chunks.append(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "a":
+                value = ascii(value)
+            chunks.append(format(value, spec) if spec or not isinstance(value, str) else value)
+        return "".join(chunks)
+
+    def message(self, **values: Any) -> Dict[str, str]:
+        """Возвращает сообщение чата с отрисованным шаблоном."""
+        return {"role": self.role, "content": self.render(**values)}
+
+class PromptRegistry:
+    """Реестр шаблонов промптов со статистикой вызовов LLM по каждому шаблону."""
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, text: str, role: str = "user") -> PromptTemplate:
+        """Регистрирует шаблон промпта. Повторная регистрация того же текста возвращает существующий шаблон."""
+        with self._lock:
+            template = self._templates.get(name)
+            if template is not None:
+                if template.text != text or template.role != role:
+                    raise ValueError(f"Шаблон {name} уже зарегистрирован с другим текстом")
+                return template
+            template = PromptTemplate(name, text, role)
+            self._templates[name] = template
+            return template
+
+    def get(self, name: str) -> PromptTemplate:
+        """Возвращает зарегистрированный шаблон."""
+        template = self._templates.get(name)
+        if template is None:
+            raise KeyError(f"Шаблон промпта {name} не зарегистрирован")
+        return template
+
+    def render(self, name: str, **values: Any) -> str:
+        """Отрисовывает зарегистрированный шаблон."""
+        return self.get(name).render(**values)
+
+    def record(self, name: str, prompt_tokens: int, completion_tokens: int, latency: float, cached: bool = False) -> None:
+        """Учитывает вызов LLM, выполненный с промптом по шаблону."""
+        with self._lock:
+            stats = self._stats.setdefault(name, {
+                "calls": 0, "cached": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "latency_total": 0.0, "latency_max": 0.0
+            })
+            stats["calls"] += 1
+            stats["cached"] += int(cached)
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["latency_total"] += latency
+            stats["latency_max"] = max(stats["latency_max"], latency)
+        logger.debug(
+            f"Промпт {name}: {prompt_tokens} + {completion_tokens} токенов, {latency * 1000:.0f} мс"
+            f"{' (кеш)' if cached else ''}"
+        )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Возвращает статистику токенов и задержки по шаблонам."""
+        with self._lock:
+            result = {}
+            for name, stats in self._stats.items():
+                calls = stats["calls"] or 1
+                result[name] = {
+                    "calls": stats["calls"],
+                    "cached": stats["cached"],
+                    "prompt_tokens": stats["prompt_tokens"],
+                    "completion_tokens": stats["completion_tokens"],
+                    "avg_prompt_tokens": round(stats["prompt_tokens"] / calls, 1),
+                    "avg_latency_ms": round(stats["latency_total"] / calls * 1000, 1),
+                    "max_latency_ms": round(stats["latency_max"] * 1000, 1),
+                }
+            return result
+
+registry = PromptRegistry()
+
+def register(name: str, text: str, role: str = "user") -> PromptTemplate:
+    """Регистрирует шаблон в общем реестре."""
+    return registry.register(name, text, role)
+
+def get(name: str) -> PromptTemplate:
+    """Возвращает шаблон из общего реестра."""
+    return registry.get(name)
@@ -2,7 +2,7 @@
 Core functionality for Agents.json Python implementation.
 """
 
-from .executor import execute, execute_flows
+from .executor import execute, execute_flow, execute_flows
 from .models.auth import AuthConfig, AuthType
 from .models.bundle import Bundle
 from .models.schema import AgentsJson, Flow, Link, Action
@@ -12,6 +12,7 @@ from .parsetools import flows_prompt, flows_tools, get_tool_prompt, get_tools
 
 __all__ = [
     'execute',
+    'execute_flow',
     'execute_flows',
     'AuthConfig',
     'AuthType',
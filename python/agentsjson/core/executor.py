@@ -11,6 +11,7 @@ from .utils import convert_dot_digits_to_brackets
 from .models.auth import AuthConfig, AuthType, OAuth1AuthConfig, UserPassCredentials, OAuth2AuthConfig
 from .parsetools import ToolFormat
 from .models.schema import AgentsJson, Flow, Link
+from . import tracing
 
 def apply_link(link: Link, execution_trace: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
     """
@@ -84,7 +85,12 @@ def _execute(bundle: Optional[Bundle], flow: Flow, auth: AuthConfig, parameters:
     Executes a flow of Actions in order, applying link-based parameter link.
     Each new link is deep-merged so we don't overwrite nested structures.
     """
-    
+    with tracing.span("flow", flow_id=flow.id, actions=len(flow.actions or [])) as span:
+        if tracing.enabled():
+            span.set_attribute("parameters_bytes", tracing.payload_size(parameters))
+        return _execute_actions(bundle, flow, auth, parameters, requestBody)
+
+def _execute_actions(bundle: Optional[Bundle], flow: Flow, auth: AuthConfig, parameters: Dict[str, Any], requestBody: Dict[str, Any]) -> Dict[str, Any]:
     if not flow.actions:
         return {}
         
@@ -107,48 +113,56 @@ def _execute(bundle: Optional[Bundle], flow: Flow, auth: AuthConfig, parameters:
         operation_map = integration_module.map
         operation = operation_map[action.operationId]
         
-        # Find all links targeting this action
-        action_links = []
+        with tracing.span("action", action_id=action.id, operation_id=action.operationId) as action_span:
+            # Find all links targeting this action
+            action_links = []
         
-        if flow.links:
-            action_links = [
-                m for m in flow.links 
-                if m.target and m.target.actionId == action.id
-            ]
+            if flow.links:
+                action_links = [
+                    m for m in flow.links 
+                    if m.target and m.target.actionId == action.id
+                ]
                 
-        # Initialize action parameters
-        action_parameters = benedict({})
-        action_requestBody = benedict({})
+            # Initialize action parameters
+            action_parameters = benedict({})
+            action_requestBody = benedict({})
         
-        # Apply each link and merge the results
-        for link in action_links:
-            apply = apply_link(link, execution_trace)
+            # Apply each link and merge the results
+            with tracing.span("apply_links", links=len(action_links)):
+                for link in action_links:
+                    apply = apply_link(link, execution_trace)
         
-            # Deep merge parameters and requestBody
-            action_parameters.merge(apply.get("parameters", {}), overwrite=True)
-            action_requestBody.merge(apply.get("requestBody", {}), overwrite=True)
+                    # Deep merge parameters and requestBody
+                    action_parameters.merge(apply.get("parameters", {}), overwrite=True)
+                    action_requestBody.merge(apply.get("requestBody", {}), overwrite=True)
                     
-        # Convert benedict objects back to plain dicts
-        action_parameters = dict(action_parameters)
-        action_requestBody = dict(action_requestBody)
-
-        # Store the parameters in execution trace
-        execution_trace[action.id] = {
-            "parameters": action_parameters,
-            "requestBody": action_requestBody
-        }
+            # Convert benedict objects back to plain dicts
+            action_parameters = dict(action_parameters)
+            action_requestBody = dict(action_requestBody)
+
+            # Store the parameters in execution trace
+            execution_trace[action.id] = {
+                "parameters": action_parameters,
+                "requestBody": action_requestBody
+            }
            
-        # Get authentication
-        auth_key = resolve_auth(auth)
+            # Get authentication
+            auth_key = resolve_auth(auth)
         
-        # Execute the operation
-        if operation_map_type == ExecutorType.RESTAPIHANDLER:
-            result = operation(auth, parameters=action_parameters, requestBody=action_requestBody)
-        else:
-            if isinstance(auth_key, tuple):
-                result = operation(auth_key[0], auth_key[1], **action_parameters, **action_requestBody)
+            # Execute the operation
+            if operation_map_type == ExecutorType.RESTAPIHANDLER:
+                result = operation(auth, parameters=action_parameters, requestBody=action_requestBody)
             else:
-                result = operation(auth_key, **action_parameters, **action_requestBody)
+                if isinstance(auth_key, tuple):
+                    result = operation(auth_key[0], auth_key[1], **action_parameters, **action_requestBody)
+                else:
+                    result = operation(auth_key, **action_parameters, **action_requestBody)
+
+            if tracing.enabled():
+                action_span.set_attributes(
+                    parameters_bytes=tracing.payload_size(action_parameters),
+                    response_bytes=tracing.payload_size(result)
+                )
         
         if "responses" not in execution_trace[action.id]:
             execution_trace[action.id]["responses"] = {}
@@ -219,6 +233,16 @@ def execute_flows(response: Any, format: ToolFormat, bundle: Bundle, flows: List
     return results
 
 
+def execute_flow(bundle: Optional[Bundle], flow: Flow, arguments: Dict[str, Any], auth: AuthConfig) -> Dict[str, Any]:
+    """
+    Executes a single flow with already known tool call arguments, without an LLM response.
+    
+    Returns a dictionary with the flow id and its result, same as `execute_flows`.
+    """
+    parameters, requestBody = _parse_tool_call(arguments)
+    return {flow.id: _execute(bundle=bundle, flow=flow, auth=auth, parameters=parameters, requestBody=requestBody)}
+
+
 def execute(agentsjson: AgentsJson, response: Any, format: ToolFormat, auth: AuthConfig) -> Dict[str, Any]:
     """
     Executes flows from a tool call response and returns the result.
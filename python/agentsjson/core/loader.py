@@ -1,25 +1,68 @@
+import copy
 import requests
 import yaml
-from typing import Dict, Any, List
-from benedict import benedict
+from typing import Dict, Any, List, Optional
 from pydantic import ValidationError
 
-from .utils import convert_dot_digits_to_brackets
+from .utils import split_field_path
 from .models.schema import Flow, AgentsJson, Override, Source
 from .models.bundle import Bundle
 
-def apply_overrides(openapi_source: Dict[str, Any], overrides: List[Override]) -> Dict[str, Any]:
+def _resolve_segment(container: Any, segment: str, field_path: str) -> Any:
     """
-    Apply a list of overrides to an OpenAPI source document.
+    Return the key or index that `segment` refers to in `container`.
     """
-    d = benedict(openapi_source, keypath_separator='!')
-    
+    if isinstance(container, list):
+        if not segment.isdigit() or int(segment) >= len(container):
+            raise ValueError(f"Invalid override fieldPath '{field_path}': no index '{segment}'")
+        return int(segment)
+    if isinstance(container, dict):
+        if segment not in container and segment.isdigit() and int(segment) in container:
+            # YAML loads unquoted response codes as integers
+            return int(segment)
+        return segment
+    raise ValueError(f"Invalid override fieldPath '{field_path}': '{segment}' is not inside an object or array")
+
+def apply_overrides(openapi_source: Dict[str, Any], overrides: List[Override],
+                    source_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Apply a list of overrides to an OpenAPI source document in place.
+
+    When source_id is given, overrides whose sourceId targets another source
+    are skipped. Each override's fieldPath is resolved relative to the operation with its
+    operationId (e.g. "parameters.0.required"), navigating only the targeted
+    path. Every intermediate segment must exist; the last one may add a new
+    field to an object but must be an existing index in an array.
+    """
+    if source_id is not None:
+        overrides = [override for override in overrides if override.sourceId == source_id]
+    if not overrides:
+        return openapi_source
+
+    operations = {
+        operation['operationId']: operation
+        for path_item in openapi_source.get('paths', {}).values()
+        for operation in path_item.values()
+        if isinstance(operation, dict) and operation.get('operationId')
+    }
+
     for override in overrides:
-        if override.fieldPath and override.value is not None:
-            field_path = convert_dot_digits_to_brackets(override.fieldPath)
-            d[field_path] = override.value
-            
-    return dict(d)
+        if not override.fieldPath or override.value is None:
+            continue
+        target = operations.get(override.operationId)
+        if target is None:
+            raise ValueError(f"Override targets unknown operationId '{override.operationId}'")
+
+        *parents, last = split_field_path(override.fieldPath)
+        for segment in parents:
+            key = _resolve_segment(target, segment, override.fieldPath)
+            if isinstance(target, dict) and key not in target:
+                raise ValueError(f"Invalid override fieldPath '{override.fieldPath}' for operation '{override.operationId}': no field '{segment}'")
+            target = target[key]
+        # Copy so later changes to the spec do not leak into the parsed agents.json
+        target[_resolve_segment(target, last, override.fieldPath)] = copy.deepcopy(override.value)
+
+    return openapi_source
 
 def load_openapi_source(source: Source) -> Dict[str, Any]:
     """
@@ -77,7 +120,7 @@ def load_agents_json(url: str) -> Bundle:
         openapi_source = load_openapi_source(source)
         
         # Modify and index the OpenAPI spec
-        openapi_source = apply_overrides(openapi_source, overrides=agents_json.overrides or [])
+        openapi_source = apply_overrides(openapi_source, overrides=agents_json.overrides or [], source_id=source.id)
         indexed_spec = index_by_operation_id(openapi_source)
         
         return Bundle(
@@ -0,0 +1,56 @@
+"""
+Optional tracing hook for flow execution.
+
+The core does not depend on a tracing backend: spans are no-ops until the
+application installs a tracer with set_tracer(). A tracer is any object
+providing enabled(), span(name, **attributes) and payload_size(value).
+"""
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+
+class _NoopSpan:
+    """Span placeholder used while no tracer is installed."""
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _NoopTracer:
+    def enabled(self) -> bool:
+        return False
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Any]:
+        yield NOOP_SPAN
+
+    def payload_size(self, value: Any) -> int:
+        return 0
+
+
+_tracer: Any = _NoopTracer()
+
+
+def set_tracer(tracer: Any) -> None:
+    """Installs the tracer used by the executor (None restores the no-op tracer)."""
+    global _tracer
+    _tracer = tracer if tracer is not None else _NoopTracer()
+
+
+def enabled() -> bool:
+    return _tracer.enabled()
+
+
+def span(name: str, **attributes: Any):
+    return _tracer.span(name, **attributes)
+
+
+def payload_size(value: Any) -> int:
+    return _tracer.payload_size(value)
@@ -5,4 +5,14 @@ def convert_dot_digits_to_brackets(dot_notation: str) -> str:
     Convert something like "line_items.0.price_data.0" into
     "line_items[0].price_data[0]" so benedict sees array indices.
     """
-    return re.sub(r"\.(\d+)(?=\.|$)", r"[\1]", dot_notation)
\ No newline at end of file
+    return re.sub(r"\.(\d+)(?=\.|$)", r"[\1]", dot_notation)
+
+
+def split_field_path(field_path: str) -> list:
+    """
+    Split a field path like "parameters.0.schema" or "parameters[0].schema"
+    into its segments: ["parameters", "0", "schema"]. Numeric segments stay
+    strings; whether they index a list or key a dict (e.g. response codes)
+    depends on the container they are applied to.
+    """
+    return [segment for segment in re.split(r"\.|\[(\d+)\]", field_path) if segment]
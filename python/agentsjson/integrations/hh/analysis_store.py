@@ -0,0 +1,74 @@
+"""
+Хранилище результатов анализа резюме.
+
+Результат анализа привязан к отпечатку резюме (дата обновления или хеш
+содержимого) и хешу критериев с уровнем детализации резюме, поэтому повторный
+скрининг отправляет в LLM только новые или изменившиеся резюме.
+"""
+from typing import Any, Dict, Iterable, Optional, Tuple
+import hashlib
+import json
+import re
+from database.models import ResumeAnalysis
+
+# Поля резюме, которые меняются при каждом запросе и не влияют на анализ
+VOLATILE_RESUME_FIELDS = {
+    "photo", "portfolio", "download", "actions", "alternate_url", "url", "negotiations_history",
+    "owner", "paid_services", "view_without_contacts_reason", "can_view_full_info", "hidden_fields"
+}
+
+def resume_fingerprint(resume: Dict[str, Any]) -> str:
+    """
+    Возвращает отпечаток резюме.
+
+    Используется дата обновления резюме, а если ее нет — хеш содержимого
+    без изменчивых полей.
+    """
+    updated_at = resume.get("updated_at")
+    if updated_at:
+        return f"updated_at:{updated_at}"
+    content = {key: value for key, value in resume.items() if key not in VOLATILE_RESUME_FIELDS}
+    digest = hashlib.sha256(
+        json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode()
+    ).hexdigest()
+    return f"sha256:{digest}"
+
+def criteria_hash(criteria: Optional[str], detail: Optional[str] = None) -> str:
+    """
+    Возвращает хеш нормализованных критериев анализа. Уровень детализации
+    резюме входит в хеш: анализ по сокращенному резюме не подходит для полного.
+    """
+    normalized = re.sub(r"\s+", " ", criteria or "").strip().lower()
+    return hashlib.sha256(f"{detail or ''}|{normalized}".encode()).hexdigest()
+
+def analysis_id(resume_id: str, fingerprint: str, criteria: str) -> str:
+    """Возвращает детерминированный идентификатор записи анализа."""
+    return hashlib.sha256(f"{resume_id}|{fingerprint}|{criteria}".encode()).hexdigest()
+
+def get_analyses(db, keys: Iterable[Tuple[str, str]], criteria: str) -> Dict[str, ResumeAnalysis]:
+    """
+    Находит сохраненные результаты анализа для резюме с неизменными отпечатками.
+
+    Args:
+        db: Сессия базы данных
+        keys: Пары (resume_id, отпечаток)
+        criteria: Хеш критериев анализа
+
+    Returns:
+        Dict: Результаты анализа по идентификаторам резюме
+    """
+    ids = {analysis_id(str(resume_id), fingerprint, criteria): str(resume_id) for resume_id, fingerprint in keys}
+    if not ids:
+        return {}
+    rows = db.query(ResumeAnalysis).filter(ResumeAnalysis.id.in_(list(ids))).all()
+    return {row.resume_id: row for row in rows}
+
+def save_analysis(db, resume_id: str, fingerprint: str, criteria: str, **fields) -> ResumeAnalysis:
+    """Сохраняет (или обновляет) результат анализа резюме без фиксации транзакции."""
+    return db.merge(ResumeAnalysis(
+        id=analysis_id(str(resume_id), fingerprint, criteria),
+        resume_id=str(resume_id),
+        fingerprint=fingerprint,
+        criteria_hash=criteria,
+        **fields
+    ))
@@ -0,0 +1,180 @@
+"""
+Массовое изменение состояния откликов.
+
+Отклики выбираются явным списком или по результатам пакетного скрининга
+(порог оценки, решение should_invite). Запросы PUT выполняются параллельно
+через общий ограничитель частоты. Каждое изменение записывается с ключом
+идемпотентности, поэтому повторный запуск не отправляет изменение дважды.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import hashlib
+import logging
+import requests
+import tracing
+from config import BULK_STATE_CHANGE_WORKERS, BULK_STATE_CHANGE_MAX_ITEMS, HH_API_URL
+from database.database import SessionLocal
+from database.models import NegotiationStateChange, ScreeningResult
+from .transport import request
+from .candidate_index import update_negotiation_states
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = HH_API_URL
+
+# Допустимые состояния откликов
+NEGOTIATION_STATES = ("response", "invitation", "discard", "hidden")
+
+def select_negotiations(db, negotiation_ids: Optional[List[str]] = None, run_id: Optional[str] = None,
+                        score_below: Optional[float] = None, score_above: Optional[float] = None,
+                        should_invite: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """
+    Выбирает отклики для изменения состояния.
+
+    Args:
+        db: Сессия базы данных
+        negotiation_ids: Явный список ID откликов
+        run_id: ID прогона скрининга для отбора по его результатам
+        score_below: Отбирать кандидатов с оценкой ниже порога
+        score_above: Отбирать кандидатов с оценкой не ниже порога
+        should_invite: Отбирать кандидатов с указанным решением
+
+    Returns:
+        List[Dict]: Отклики с ID резюме и оценкой скрининга, если они известны
+    """
+    if run_id:
+        query = db.query(ScreeningResult).filter(ScreeningResult.run_id == run_id)
+        if score_below is not None:
+            query = query.filter(ScreeningResult.score < float(score_below))
+        if score_above is not None:
+            query = query.filter(ScreeningResult.score >= float(score_above))
+        if should_invite is not None:
+            query = query.filter(ScreeningResult.should_invite.is_(bool(should_invite)))
+        if negotiation_ids:
+            query = query.filter(ScreeningResult.negotiation_id.in_([str(nid) for nid in negotiation_ids]))
+        return [
+            {"negotiation_id": result.negotiation_id, "resume_id": result.resume_id, "score": result.score}
+            for result in query.order_by(ScreeningResult.score.asc())
+        ]
+    return [{"negotiation_id": str(nid), "resume_id": None, "score": None} for nid in dict.fromkeys(negotiation_ids or [])]
+
+def make_idempotency_key(negotiation_ids: List[str], new_state: str) -> str:
+    """Формирует ключ идемпотентности по набору откликов и новому состоянию."""
+    payload = "|".join(sorted(negotiation_ids)) + f"|{new_state}"
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+def _change_id(idempotency_key: str, negotiation_id: str, new_state: str) -> str:
+    return hashlib.sha256(f"{idempotency_key}|{negotiation_id}|{new_state}".encode()).hexdigest()
+
+def bulk_change_state(session: requests.Session, new_state: str, negotiation_ids: Optional[List[str]] = None,
+                      run_id: Optional[str] = None, score_below: Optional[float] = None,
+                      score_above: Optional[float] = None, should_invite: Optional[bool] = None,
+                      messages: Optional[Dict[str, str]] = None, dry_run: bool = True,
+                      idempotency_key: Optional[str] = None, max_items: Optional[int] = None,
+                      employer_id: Optional[str] = None, base_url: str = BASE_URL) -> Dict[str, Any]:
+    """
+    Изменяет состояние набора откликов.
+
+    Args:
+        session: Сессия API HeadHunter
+        new_state: Новое состояние (response/invitation/discard/hidden)
+        negotiation_ids: Явный список ID откликов
+        run_id: ID прогона скрининга для отбора по его результатам
+        score_below: Отбирать кандидатов с оценкой ниже порога
+        score_above: Отбирать кандидатов с оценкой не ниже порога
+        should_invite: Отбирать кандидатов с указанным решением
+        messages: Сообщения кандидатам по ID откликов
+        dry_run: Только показать, какие отклики будут изменены
+        idempotency_key: Ключ идемпотентности (по умолчанию вычисляется из набора откликов)
+        max_items: Максимальное количество откликов
+        employer_id: ID работодателя, чей локальный индекс откликов обновляется после изменения
+        base_url: Базовый URL API HeadHunter
+
+    Returns:
+        Dict: Итоги и результат по каждому отклику
+    """
+    if new_state not in NEGOTIATION_STATES:
+        raise Exception(f"Недопустимое состояние отклика: {new_state}")
+    if not negotiation_ids and not run_id:
+        raise Exception("Не указаны отклики: negotiation_ids или run_id")
+
+    max_items = min(int(max_items or BULK_STATE_CHANGE_MAX_ITEMS), BULK_STATE_CHANGE_MAX_ITEMS)
+    messages = messages or {}
+    db = SessionLocal()
+    try:
+        selected = select_negotiations(db, negotiation_ids, run_id, score_below, score_above, should_invite)
+        truncated = len(selected) > max_items
+        selected = selected[:max_items]
+        ids = [item["negotiation_id"] for item in selected]
+        idempotency_key = idempotency_key or make_idempotency_key(ids, new_state)
+
+        done = {
+            change.negotiation_id for change in db.query(NegotiationStateChange).filter(
+                NegotiationStateChange.idempotency_key == idempotency_key,
+                NegotiationStateChange.status == "done"
+            )
+        }
+
+        outcomes = {
+            item["negotiation_id"]: {
+                **item,
+                **({"message": messages[item["negotiation_id"]]} if messages.get(item["negotiation_id"]) else {}),
+                "status": "duplicate" if item["negotiation_id"] in done else ("planned" if dry_run else "pending")
+            }
+            for item in selected
+        }
+        to_send = [nid for nid, outcome in outcomes.items() if outcome["status"] == "pending"]
+
+        def change(negotiation_id: str) -> Optional[str]:
+            data = {"state": new_state}
+            if messages.get(negotiation_id):
+                data["message"] = messages[negotiation_id]
+            try:
+                response = request(
+                    session, "PUT", f"{base_url}/negotiations/{negotiation_id}", "change-negotiation-action", json=data
+                )
+            except requests.RequestException as e:
+                return str(e)
+            if response.status_code not in (200, 201, 204):
+                return f"{response.status_code} - {response.text}"
+            return None
+
+        if to_send:
+            logger.info(f"Изменение состояния {len(to_send)} откликов на {new_state} (ключ {idempotency_key})")
+            with ThreadPoolExecutor(max_workers=BULK_STATE_CHANGE_WORKERS) as pool:
+                errors = dict(zip(to_send, pool.map(tracing.bind(change), to_send)))
+            for negotiation_id, error in errors.items():
+                outcomes[negotiation_id]["status"] = "failed" if error else "done"
+                if error:
+                    outcomes[negotiation_id]["error"] = error
+                db.merge(NegotiationStateChange(
+                    id=_change_id(idempotency_key, negotiation_id, new_state),
+                    idempotency_key=idempotency_key,
+                    negotiation_id=negotiation_id,
+                    new_state=new_state,
+                    status="failed" if error else "done",
+                    error=error
+                ))
+            db.commit()
+            update_negotiation_states(
+                employer_id, [negotiation_id for negotiation_id, error in errors.items() if not error], new_state
+            )
+
+        statuses = [outcome["status"] for outcome in outcomes.values()]
+        return {
+            "dry_run": dry_run,
+            "new_state": new_state,
+            "idempotency_key": idempotency_key,
+            "total": len(selected),
+            "truncated": truncated,
+            "planned": statuses.count("planned"),
+            "succeeded": statuses.count("done"),
+            "failed": statuses.count("failed"),
+            "duplicates": statuses.count("duplicate"),
+            "items": list(outcomes.values())
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
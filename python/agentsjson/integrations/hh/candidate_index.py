@@ -0,0 +1,463 @@
+"""
+Локальный индекс кандидатов работодателя.
+
+Отклики и резюме, полученные из API HeadHunter, сохраняются в отдельный
+файл SQLite для каждого работодателя. Полнотекстовый поиск по должности,
+навыкам и опыту выполняется через FTS5, фильтры по зарплате, опыту, региону
+и возрасту используют обычные индексы. Запросы вида «кандидаты с опытом
+Python из Москвы» обрабатываются локально без обращения к API и LLM.
+
+Фоновая синхронизация сохраняет в тот же файл активные вакансии и исходный
+JSON откликов вместе с отметками времени, по которым чтение может
+обслуживаться из локального хранилища, пока данные достаточно свежие.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from config import CANDIDATE_INDEX_ENABLED, CANDIDATE_INDEX_DIR
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    resume_id TEXT PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    title TEXT,
+    age INTEGER,
+    area TEXT,
+    area_lc TEXT,
+    salary INTEGER,
+    currency TEXT,
+    experience_months INTEGER,
+    education_level TEXT,
+    skills TEXT,
+    experience TEXT,
+    resume_updated_at TEXT,
+    detailed INTEGER NOT NULL DEFAULT 0,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_candidates_salary ON candidates (salary);
+CREATE INDEX IF NOT EXISTS ix_candidates_experience ON candidates (experience_months);
+CREATE INDEX IF NOT EXISTS ix_candidates_area ON candidates (area_lc);
+CREATE INDEX IF NOT EXISTS ix_candidates_age ON candidates (age);
+
+CREATE TABLE IF NOT EXISTS negotiations (
+    negotiation_id TEXT PRIMARY KEY,
+    vacancy_id TEXT,
+    resume_id TEXT,
+    state TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    data TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_negotiations_vacancy ON negotiations (vacancy_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_negotiations_resume ON negotiations (resume_id);
+
+CREATE TABLE IF NOT EXISTS vacancies (
+    vacancy_id TEXT PRIMARY KEY,
+    name_lc TEXT,
+    data TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT,
+    updated_at REAL NOT NULL
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+    resume_id UNINDEXED, title, skills, experience, area,
+    tokenize = "unicode61 remove_diacritics 2"
+);
+"""
+
+# Поля сортировки результатов поиска
+ORDER_FIELDS = {
+    "salary": "c.salary",
+    "experience": "c.experience_months",
+    "age": "c.age",
+    "updated": "c.resume_updated_at",
+}
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+def _name(value: Any) -> Optional[str]:
+    return value.get("name") if isinstance(value, dict) else value
+
+def _candidate_row(resume: Dict[str, Any], detailed: bool) -> Dict[str, Any]:
+    """Преобразует резюме HH (полное или краткое из отклика) в строку индекса."""
+    salary = resume.get("salary") or {}
+    area = _name(resume.get("area"))
+    experience = "; ".join(
+        " ".join(part for part in (job.get("position"), job.get("company"), job.get("description")) if part)
+        for job in resume.get("experience") or []
+    )
+    return {
+        "resume_id": str(resume["id"]),
+        "first_name": resume.get("first_name"),
+        "last_name": resume.get("last_name"),
+        "title": resume.get("title"),
+        "age": resume.get("age"),
+        "area": area,
+        "area_lc": area.lower() if area else None,
+        "salary": salary.get("amount"),
+        "currency": salary.get("currency"),
+        "experience_months": (resume.get("total_experience") or {}).get("months"),
+        "education_level": _name((resume.get("education") or {}).get("level")),
+        "skills": ", ".join(skill for skill in resume.get("skill_set") or [] if skill) or None,
+        "experience": experience or None,
+        "resume_updated_at": resume.get("updated_at"),
+        "detailed": int(detailed),
+        "indexed_at": time.time(),
+    }
+
+def _update_clause(column: str) -> str:
+    if column == "detailed":
+        return "detailed = MAX(detailed, excluded.detailed)"
+    if column == "indexed_at":
+        return "indexed_at = excluded.indexed_at"
+    return f"{column} = COALESCE(excluded.{column}, {column})"
+
+def fts_query(text: str) -> Optional[str]:
+    """Строит запрос FTS5: все слова запроса с поиском по префиксу."""
+    words = WORD_RE.findall(text or "")
+    if not words:
+        return None
+    return " AND ".join(f'"{word}"*' for word in words)
+
+class CandidateIndex:
+    """Индекс откликов и резюме одного работодателя в файле SQLite."""
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Файлы, созданные до появления колонки с исходным JSON откликов
+        if "negotiations" in {row[0] for row in self._db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}:
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(negotiations)")}
+            if "data" not in columns:
+                self._db.execute("ALTER TABLE negotiations ADD COLUMN data TEXT")
+                self._db.execute("DROP INDEX IF EXISTS ix_negotiations_vacancy")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _upsert_candidates(self, rows: List[Dict[str, Any]]) -> None:
+        """Сохраняет кандидатов, не затирая данные полного резюме данными из отклика."""
+        columns = list(rows[0])
+        updates = ", ".join(_update_clause(column) for column in columns if column != "resume_id")
+        self._db.executemany(
+            f"INSERT INTO candidates ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)}) "
+            f"ON CONFLICT(resume_id) DO UPDATE SET {updates}",
+            rows
+        )
+        ids = [(row["resume_id"],) for row in rows]
+        self._db.executemany("DELETE FROM candidates_fts WHERE resume_id = ?", ids)
+        self._db.executemany(
+            "INSERT INTO candidates_fts (resume_id, title, skills, experience, area) "
+            "SELECT resume_id, title, skills, experience, area FROM candidates WHERE resume_id = ?",
+            ids
+        )
+
+    def _negotiation_rows(self, items: Iterable[Dict[str, Any]], vacancy_id: Optional[str]):
+        """Разбирает элементы списка откликов на строки откликов и краткие резюме."""
+        now = time.time()
+        negotiations, candidates = [], {}
+        for item in items:
+            resume = item.get("resume") or {}
+            if not item.get("id"):
+                continue
+            if resume.get("id"):
+                candidates[str(resume["id"])] = _candidate_row(resume, detailed=False)
+            negotiations.append({
+                "negotiation_id": str(item["id"]),
+                "vacancy_id": str(vacancy_id or (item.get("vacancy") or {}).get("id") or "") or None,
+                "resume_id": str(resume["id"]) if resume.get("id") else None,
+                "state": (item.get("state") or {}).get("id"),
+                "created_at": item.get("created_at"),
+                "updated_at": item.get("updated_at"),
+                "data": json.dumps(item, ensure_ascii=False),
+                "indexed_at": now,
+            })
+        return negotiations, list(candidates.values())
+
+    def _write_negotiations(self, negotiations: List[Dict[str, Any]], candidates: List[Dict[str, Any]]) -> None:
+        if candidates:
+            self._upsert_candidates(candidates)
+        self._db.executemany(
+            "INSERT OR REPLACE INTO negotiations (negotiation_id, vacancy_id, resume_id, state, created_at, updated_at, data, indexed_at) "
+            "VALUES (:negotiation_id, :vacancy_id, :resume_id, :state, :created_at, :updated_at, :data, :indexed_at)",
+            negotiations
+        )
+
+    def ingest_negotiations(self, items: Iterable[Dict[str, Any]], vacancy_id: Optional[str] = None) -> int:
+        """
+        Сохраняет отклики и краткие резюме из списка откликов.
+
+        Args:
+            items: Элементы ответа /negotiations/response
+            vacancy_id: ID вакансии, по которой получен список
+
+        Returns:
+            int: Количество сохраненных откликов
+        """
+        negotiations, candidates = self._negotiation_rows(items, vacancy_id)
+        if not negotiations:
+            return 0
+        with self._lock, self._db:
+            self._write_negotiations(negotiations, candidates)
+        return len(negotiations)
+
+    def replace_negotiations(self, vacancy_id: str, items: Iterable[Dict[str, Any]]) -> int:
+        """
+        Заменяет сохраненные отклики по вакансии полным списком, удаляя отклики,
+        которых больше нет в API (удаленные, перенесенные на другую вакансию).
+
+        Returns:
+            int: Количество сохраненных откликов
+        """
+        negotiations, candidates = self._negotiation_rows(items, vacancy_id)
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM negotiations WHERE vacancy_id = ?", (str(vacancy_id),))
+            if negotiations:
+                self._write_negotiations(negotiations, candidates)
+        return len(negotiations)
+
+    def ingest_resumes(self, resumes: Iterable[Dict[str, Any]]) -> int:
+        """Сохраняет полные резюме."""
+        rows = [_candidate_row(resume, detailed=True) for resume in resumes if isinstance(resume, dict) and resume.get("id")]
+        if rows:
+            with self._lock, self._db:
+                self._upsert_candidates(rows)
+        return len(rows)
+
+    def search(self, text: Optional[str] = None, vacancy_id: Optional[str] = None, area: Optional[str] = None,
+               salary_from: Optional[int] = None, salary_to: Optional[int] = None,
+               experience_from: Optional[float] = None, experience_to: Optional[float] = None,
+               age_from: Optional[int] = None, age_to: Optional[int] = None,
+               order_by: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
+        """
+        Ищет кандидатов в локальном индексе.
+
+        Args:
+            text: Слова для полнотекстового поиска по должности, навыкам и опыту
+            vacancy_id: Только кандидаты, откликнувшиеся на вакансию
+            area: Регион (начало названия, без учета регистра)
+            salary_from: Нижняя граница желаемой зарплаты
+            salary_to: Верхняя граница желаемой зарплаты
+            experience_from: Минимальный опыт работы в годах
+            experience_to: Максимальный опыт работы в годах
+            age_from: Нижняя граница возраста
+            age_to: Верхняя граница возраста
+            order_by: Сортировка: salary, experience, age, updated (по умолчанию релевантность)
+            limit: Максимальное количество кандидатов
+
+        Returns:
+            Dict: Найденные кандидаты и общее количество совпадений
+        """
+        joins, conditions, params = [], [], {}
+        match = fts_query(text)
+        if match:
+            joins.append("JOIN candidates_fts f ON f.resume_id = c.resume_id")
+            conditions.append("candidates_fts MATCH :match")
+            params["match"] = match
+        if vacancy_id:
+            conditions.append("n.vacancy_id = :vacancy_id")
+            params["vacancy_id"] = str(vacancy_id)
+        if area:
+            conditions.append("c.area_lc LIKE :area")
+            params["area"] = area.strip().lower() + "%"
+        for column, name, value, operator in (
+            ("c.salary", "salary_from", salary_from, ">="),
+            ("c.salary", "salary_to", salary_to, "<="),
+            ("c.experience_months", "experience_from", float(experience_from) * 12 if experience_from is not None else None, ">="),
+            ("c.experience_months", "experience_to", float(experience_to) * 12 if experience_to is not None else None, "<="),
+            ("c.age", "age_from", age_from, ">="),
+            ("c.age", "age_to", age_to, "<="),
+        ):
+            if value is not None:
+                conditions.append(f"{column} {operator} :{name}")
+                params[name] = value
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = ORDER_FIELDS.get(order_by)
+        order_clause = f"{order} DESC" if order else ("f.rank" if match else "c.indexed_at DESC")
+        base = (
+            f"FROM candidates c LEFT JOIN negotiations n ON n.resume_id = c.resume_id "
+            f"{' '.join(joins)} {where}"
+        )
+        started = time.perf_counter()
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(DISTINCT c.resume_id) {base}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT c.*, GROUP_CONCAT(DISTINCT n.negotiation_id) AS negotiation_ids, "
+                f"GROUP_CONCAT(DISTINCT n.vacancy_id) AS vacancy_ids, MAX(n.state) AS state "
+                f"{base} GROUP BY c.resume_id ORDER BY {order_clause} LIMIT :limit",
+                {**params, "limit": int(limit)}
+            ).fetchall()
+        elapsed = time.perf_counter() - started
+
+        candidates = []
+        for row in rows:
+            months = row["experience_months"]
+            candidates.append({
+                "resume_id": row["resume_id"],
+                "name": " ".join(part for part in (row["first_name"], row["last_name"]) if part) or None,
+                "title": row["title"],
+                "age": row["age"],
+                "area": row["area"],
+                "salary": f"{row['salary']} {row['currency'] or ''}".rstrip() if row["salary"] else None,
+                "experience_years": round(months / 12, 1) if months is not None else None,
+                "education_level": row["education_level"],
+                "skills": row["skills"],
+                "negotiation_ids": row["negotiation_ids"].split(",") if row["negotiation_ids"] else [],
+                "vacancy_ids": row["vacancy_ids"].split(",") if row["vacancy_ids"] else [],
+                "state": row["state"],
+            })
+        return {"total": total, "found": len(candidates), "elapsed_ms": round(elapsed * 1000, 2), "items": candidates}
+
+    def replace_vacancies(self, items: List[Dict[str, Any]]) -> int:
+        """Заменяет сохраненный список активных вакансий."""
+        rows = [
+            (str(item["id"]), (item.get("name") or "").lower(), json.dumps(item, ensure_ascii=False), position)
+            for position, item in enumerate(items) if item.get("id")
+        ]
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM vacancies")
+            self._db.executemany("INSERT INTO vacancies (vacancy_id, name_lc, data, position) VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def get_vacancies(self, text: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Возвращает сохраненные активные вакансии, название которых содержит все слова запроса."""
+        words = [word.lower() for word in WORD_RE.findall(text or "")]
+        with self._lock:
+            rows = self._db.execute("SELECT name_lc, data FROM vacancies ORDER BY position").fetchall()
+        return [json.loads(row["data"]) for row in rows if all(word in row["name_lc"] for word in words)]
+
+    def get_negotiations(self, vacancy_id: str, offset: int = 0, limit: int = 20) -> Dict[str, Any]:
+        """Возвращает сохраненные отклики по вакансии, начиная с самых новых."""
+        with self._lock:
+            total = self._db.execute(
+                "SELECT COUNT(*) FROM negotiations WHERE vacancy_id = ? AND data IS NOT NULL", (str(vacancy_id),)
+            ).fetchone()[0]
+            rows = self._db.execute(
+                "SELECT data FROM negotiations WHERE vacancy_id = ? AND data IS NOT NULL "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (str(vacancy_id), int(limit), int(offset))
+            ).fetchall()
+        return {"total": total, "items": [json.loads(row["data"]) for row in rows]}
+
+    def get_negotiation_data(self, vacancy_id: str) -> List[str]:
+        """Возвращает исходный JSON всех сохраненных откликов по вакансии без разбора."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT data FROM negotiations WHERE vacancy_id = ? AND data IS NOT NULL ORDER BY created_at DESC",
+                (str(vacancy_id),)
+            ).fetchall()
+        return [row["data"] for row in rows]
+
+    def update_negotiation_states(self, negotiation_ids: Iterable[str], state: str) -> int:
+        """
+        Записывает новое состояние сохраненных откликов после изменения через API,
+        чтобы чтение из локального хранилища не возвращало прежнее состояние.
+
+        Returns:
+            int: Количество обновленных откликов
+        """
+        ids = [str(nid) for nid in negotiation_ids]
+        if not ids:
+            return 0
+        with self._lock, self._db:
+            rows = self._db.execute(
+                f"SELECT negotiation_id, data FROM negotiations WHERE negotiation_id IN ({', '.join('?' * len(ids))})", ids
+            ).fetchall()
+            updates = []
+            for row in rows:
+                data = json.loads(row["data"]) if row["data"] else None
+                if data is not None:
+                    # Название прежнего состояния больше не соответствует идентификатору
+                    data["state"] = {"id": state}
+                    data = json.dumps(data, ensure_ascii=False)
+                updates.append((state, data, row["negotiation_id"]))
+            self._db.executemany("UPDATE negotiations SET state = ?, data = ? WHERE negotiation_id = ?", updates)
+        return len(updates)
+
+    def get_state(self, key: str) -> Optional[Dict[str, Any]]:
+        """Возвращает значение и время обновления отметки синхронизации."""
+        with self._lock:
+            row = self._db.execute("SELECT value, updated_at FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return {"value": row["value"], "updated_at": row["updated_at"]} if row else None
+
+    def set_state(self, key: str, value: Optional[str] = None) -> None:
+        """Сохраняет отметку синхронизации с текущим временем."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value, updated_at) VALUES (?, ?, ?)", (key, value, time.time())
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает количество кандидатов и откликов в индексе."""
+        with self._lock:
+            return {
+                "candidates": self._db.execute("SELECT COUNT(*) FROM candidates").fetchone()[0],
+                "detailed": self._db.execute("SELECT COUNT(*) FROM candidates WHERE detailed = 1").fetchone()[0],
+                "negotiations": self._db.execute("SELECT COUNT(*) FROM negotiations").fetchone()[0],
+                "vacancies": self._db.execute("SELECT COUNT(*) FROM vacancies").fetchone()[0],
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+_indexes: Dict[str, CandidateIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_index(employer_id: Optional[str]) -> Optional[CandidateIndex]:
+    """Возвращает индекс кандидатов работодателя или None, если индекс отключен."""
+    if not CANDIDATE_INDEX_ENABLED:
+        return None
+    key = re.sub(r"[^\w-]", "_", str(employer_id or "default"))
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = CandidateIndex(os.path.join(CANDIDATE_INDEX_DIR, f"{key}.sqlite"))
+                _indexes[key] = index
+    return index
+
+def index_negotiations(employer_id: Optional[str], data: Dict[str, Any], vacancy_id: Optional[str] = None) -> None:
+    """Добавляет полученный список откликов в индекс, не прерывая основной запрос при ошибке."""
+    try:
+        index = get_index(employer_id)
+        if index is not None:
+            index.ingest_negotiations(data.get("items") or [], vacancy_id)
+    except sqlite3.Error as e:
+        logger.warning(f"Не удалось сохранить отклики в локальный индекс: {e}")
+
+def index_resumes(employer_id: Optional[str], resumes: List[Dict[str, Any]]) -> None:
+    """Добавляет полученные резюме в индекс, не прерывая основной запрос при ошибке."""
+    try:
+        index = get_index(employer_id)
+        if index is not None:
+            index.ingest_resumes(resumes)
+    except sqlite3.Error as e:
+        logger.warning(f"Не удалось сохранить резюме в локальный индекс: {e}")
+
+def update_negotiation_states(employer_id: Optional[str], negotiation_ids: Iterable[str], state: str) -> None:
+    """Обновляет состояние откликов в индексе, не прерывая основной запрос при ошибке."""
+    try:
+        index = get_index(employer_id)
+        if index is not None:
+            index.update_negotiation_states(negotiation_ids, state)
+    except sqlite3.Error as e:
+        logger.warning(f"Не удалось обновить состояние откликов в локальном индексе: {e}")
@@ -0,0 +1,210 @@
+"""
+Векторизованная оценка кандидатов по критериям вакансии.
+
+Поля откликов (зарплата, опыт, возраст, образование) один раз переводятся в
+столбцы NumPy, после чего оценка по всем критериям вычисляется одним проходом
+без циклов по кандидатам. Каждый критерий дает оценку от 0 до 1: значение в
+заданном диапазоне - 1, за его пределами оценка линейно убывает с удалением
+от границы, неизвестное значение оценивается нейтрально. Итоговая оценка -
+взвешенное среднее по заданным критериям.
+
+Зарплата сравнивается без пересчета валют: зарплата в другой валюте, чем у
+диапазона, оценивается как неизвестная.
+"""
+from typing import Any, Dict, List, Optional, Tuple, Union
+import logging
+import time
+import numpy as np
+from .negotiation_table import NegotiationTable
+
+logger = logging.getLogger(__name__)
+
+# Оценка критерия, если у кандидата нет значения
+MISSING_SCORE = 0.5
+
+# Доля ширины шкалы, на которой оценка за пределами диапазона падает до нуля
+FALLOFF = {"salary": 0.5, "experience": 0.5, "age": 0.25}
+
+DEFAULT_WEIGHTS = {"salary": 1.0, "experience": 1.0, "age": 0.5, "education": 0.5}
+
+# Валюта диапазона зарплаты по умолчанию (код справочника HH)
+DEFAULT_CURRENCY = "RUR"
+
+# Уровни образования HH по возрастанию
+EDUCATION_RANKS = {
+    "secondary": 1, "среднее": 1,
+    "special_secondary": 2, "среднее специальное": 2,
+    "unfinished_higher": 3, "неоконченное высшее": 3,
+    "bachelor": 4, "бакалавр": 4,
+    "higher": 5, "высшее": 5,
+    "master": 5, "магистр": 5,
+    "candidate": 6, "кандидат наук": 6,
+    "doctor": 7, "доктор наук": 7,
+}
+
+# Значения фильтра опыта HH в месяцах
+EXPERIENCE_RANGES = {
+    "noExperience": (0, 12),
+    "between1And3": (12, 36),
+    "between3And6": (36, 72),
+    "moreThan6": (72, None),
+}
+
+def education_rank(value: Any) -> float:
+    """Возвращает ранг уровня образования по id или названию справочника HH."""
+    keys = [value.get("id"), value.get("name")] if isinstance(value, dict) else [value]
+    for key in keys:
+        rank = EDUCATION_RANKS.get(key.strip().lower()) if isinstance(key, str) else None
+        if rank:
+            return float(rank)
+    return np.nan
+
+def build_columns(table: NegotiationTable, currency: str = DEFAULT_CURRENCY) -> Dict[str, np.ndarray]:
+    """
+    Возвращает столбцы таблицы откликов для векторной оценки.
+
+    Args:
+        table: Таблица откликов
+        currency: Валюта зарплаты; зарплата в других валютах считается неизвестной
+
+    Returns:
+        Dict: Столбцы salary, experience, age, education (NaN - нет значения)
+    """
+    levels = np.array([education_rank(level) for level in table.vocabulary["education_level"]] + [np.nan])
+    # Зарплата без указанной валюты (код -1) считается заданной в валюте диапазона
+    other = [code for code, value in enumerate(table.vocabulary["currency"]) if value != currency]
+    return {
+        "salary": np.where(np.isin(table.codes["currency"], other), np.nan, table.numeric["salary"]),
+        "experience": table.numeric["experience_months"],
+        "age": table.numeric["age"],
+        "education": levels[table.codes["education_level"]],
+    }
+
+def range_score(values: np.ndarray, low: Optional[float], high: Optional[float], falloff: float) -> np.ndarray:
+    """
+    Оценивает попадание значений в диапазон [low, high].
+
+    За пределами диапазона оценка линейно убывает до нуля на расстоянии
+    falloff * масштаб, где масштаб - верхняя граница диапазона (или нижняя,
+    если верхняя не задана).
+    """
+    scale = max(abs(high if high is not None else low or 0.0), 1.0) * falloff
+    below = np.maximum((low if low is not None else -np.inf) - values, 0.0)
+    above = np.maximum(values - (high if high is not None else np.inf), 0.0)
+    scores = np.clip(1.0 - (below + above) / scale, 0.0, 1.0)
+    return np.where(np.isnan(values), MISSING_SCORE, scores)
+
+def education_score(ranks: np.ndarray, required: float) -> np.ndarray:
+    """Оценивает уровень образования: не ниже требуемого - 1, ниже - пропорционально рангу."""
+    scores = np.minimum(ranks / required, 1.0)
+    scores = np.where(ranks < required, scores * 0.5, scores)
+    return np.where(np.isnan(ranks), MISSING_SCORE, scores)
+
+def top_k(scores: np.ndarray, k: Optional[int]) -> Tuple[np.ndarray, int]:
+    """
+    Выбирает k лучших оценок с сохранением исходного порядка при равенстве.
+
+    Результат не длиннее k: из кандидатов с оценкой, равной k-й, берутся
+    первые по исходному порядку, остальные только подсчитываются.
+
+    Returns:
+        Tuple: Индексы по убыванию оценки и количество не вошедших кандидатов с оценкой, равной последней выбранной
+    """
+    n = len(scores)
+    if not k or k >= n:
+        return np.lexsort((np.arange(n), -scores)), 0
+    threshold = np.partition(scores, n - k)[n - k]
+    selected = np.flatnonzero(scores >= threshold)
+    order = selected[np.lexsort((selected, -scores[selected]))]
+    return order[:k], len(order) - k
+
+def score_candidates(items: Union[NegotiationTable, List[Dict[str, Any]]], salary_from: Optional[float] = None,
+                     salary_to: Optional[float] = None, salary_currency: Optional[str] = None,
+                     experience_from: Optional[float] = None,
+                     experience_to: Optional[float] = None, experience: Optional[str] = None,
+                     age_from: Optional[float] = None, age_to: Optional[float] = None,
+                     education_level: Optional[str] = None, weights: Optional[Dict[str, float]] = None,
+                     limit: Optional[int] = 20) -> Dict[str, Any]:
+    """
+    Оценивает и ранжирует кандидатов по критериям.
+
+    Args:
+        items: Таблица или список откликов HH с краткими резюме
+        salary_from: Нижняя граница желаемой ЗП
+        salary_to: Верхняя граница желаемой ЗП
+        salary_currency: Валюта границ ЗП (по умолчанию RUR)
+        experience_from: Минимальный опыт работы в годах
+        experience_to: Максимальный опыт работы в годах
+        experience: Опыт в формате фильтра HH (noExperience, between1And3, between3And6, moreThan6)
+        age_from: Нижняя граница возраста
+        age_to: Верхняя граница возраста
+        education_level: Минимальный уровень образования (id или название справочника HH)
+        weights: Веса критериев salary, experience, age, education
+        limit: Количество лучших кандидатов (равные оценки сверх limit только подсчитываются)
+
+    Returns:
+        Dict: Ранжированные кандидаты с итоговой оценкой и оценками по критериям
+    """
+    started = time.perf_counter()
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    table = items if isinstance(items, NegotiationTable) else NegotiationTable.from_items(items)
+    columns = build_columns(table, salary_currency or DEFAULT_CURRENCY)
+
+    experience_range = (
+        experience_from * 12 if experience_from is not None else None,
+        experience_to * 12 if experience_to is not None else None,
+    )
+    if experience in EXPERIENCE_RANGES and experience_range == (None, None):
+        experience_range = EXPERIENCE_RANGES[experience]
+
+    criteria = {}
+    if salary_from is not None or salary_to is not None:
+        criteria["salary"] = range_score(columns["salary"], salary_from, salary_to, FALLOFF["salary"])
+    if experience_range != (None, None):
+        criteria["experience"] = range_score(columns["experience"], *experience_range, FALLOFF["experience"])
+    if age_from is not None or age_to is not None:
+        criteria["age"] = range_score(columns["age"], age_from, age_to, FALLOFF["age"])
+    required = education_rank(education_level) if education_level else np.nan
+    if not np.isnan(required):
+        criteria["education"] = education_score(columns["education"], required)
+
+    active = {name: float(weights.get(name) or 0.0) for name in criteria}
+    total_weight = sum(active.values())
+    if criteria and total_weight > 0:
+        scores = sum(criteria[name] * weight for name, weight in active.items()) / total_weight
+    else:
+        scores = np.full(len(table), MISSING_SCORE)
+
+    order, ties_omitted = top_k(scores, int(limit) if limit else None)
+    ranked = []
+    rank = 0
+    for position, i in enumerate(order):
+        # Равные оценки получают одинаковое место
+        if position == 0 or scores[i] != scores[order[position - 1]]:
+            rank = position + 1
+        # Исходный JSON разбираем только для попавших в выборку кандидатов
+        resume = table.item(i).get("resume") or {}
+        row = table.row(i)
+        ranked.append({
+            "negotiation_id": row["negotiation_id"],
+            "resume_id": row["resume_id"],
+            "name": " ".join(part for part in (resume.get("first_name"), resume.get("last_name")) if part) or None,
+            "title": resume.get("title"),
+            "rank": rank,
+            "score": round(float(scores[i]), 4),
+            "criteria": {name: round(float(values[i]), 4) for name, values in criteria.items()},
+            "salary": row["salary"],
+            "experience_months": None if row["experience_months"] is None else int(row["experience_months"]),
+            "age": None if row["age"] is None else int(row["age"]),
+        })
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Оценено {len(table)} кандидатов по {len(criteria)} критериям за {elapsed * 1000:.1f} мс")
+    return {
+        "total": len(table),
+        "criteria": list(criteria),
+        "weights": active,
+        "ties_omitted": ties_omitted,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "items": ranked
+    }
@@ -11,6 +11,11 @@ map = {
     "get-negotiations-list": Executor.hh_get_negotiations_list,
     "get-resume": Executor.hh_get_resume,
     "analyze-resume": Executor.hh_analyze_resume,
+    "batch-screen-resumes": Executor.hh_batch_screen_resumes,
+    "bulk-change-negotiation-state": Executor.hh_bulk_change_negotiation_state,
+    "generate-bulk-messages": Executor.hh_generate_bulk_messages,
+    "search-local-candidates": Executor.hh_search_local_candidates,
+    "score-candidates": Executor.hh_score_candidates,
     "generate-rejection-message": Executor.hh_generate_rejection_message,
     "generate-invitation-message": Executor.hh_generate_invitation_message,
     "change-negotiation-action": Executor.hh_change_negotiation_state
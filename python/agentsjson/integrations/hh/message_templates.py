@@ -0,0 +1,219 @@
+"""
+Генерация сообщений кандидатам по шаблону.
+
+Вместо отдельного запроса к LLM на каждого кандидата шаблон сообщения
+генерируется один раз для сочетания (тип сообщения, тон, причина) и
+заполняется локально данными кандидата и вакансии: имя, должность, ключевой
+навык, название вакансии. Запросы шаблонов кешируются общим кешем LLM,
+поэтому повторная рассылка с теми же параметрами не обращается к модели. Персональные сообщения через LLM
+генерируются только для заданного подмножества кандидатов.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import logging
+import re
+import requests
+import llm
+import tracing
+import prompts
+from config import (
+    MESSAGE_PERSONALIZE_COUNT, MESSAGE_LLM_WORKERS, SCREENING_FETCH_WORKERS, BULK_STATE_CHANGE_MAX_ITEMS, HH_API_URL
+)
+from database.database import SessionLocal
+from database.models import ScreeningRun
+from .transport import request
+from .screening import fetch_resumes
+from .bulk_actions import select_negotiations
+from .resume_compactor import compact_resume, DETAIL_BRIEF
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = HH_API_URL
+
+MESSAGE_REJECTION = "rejection"
+MESSAGE_INVITATION = "invitation"
+
+# Тип сообщения: (описание для промпта, подпись параметра, новое состояние отклика, шаблон персонального промпта)
+MESSAGE_KINDS = {
+    MESSAGE_REJECTION: ("вежливое сообщение об отказе кандидату", "Причина отказа", "discard", "generate_rejection_message"),
+    MESSAGE_INVITATION: ("приглашение на собеседование", "Детали собеседования", "invitation", "generate_invitation_message"),
+}
+
+# Подстановки в шаблоне сообщения и соответствующие данные кандидата
+SLOTS = {"[ИМЯ]": "name", "[ДОЛЖНОСТЬ]": "position", "[НАВЫК]": "skill", "[ВАКАНСИЯ]": "vacancy"}
+SLOT_RE = re.compile("|".join(re.escape(slot) for slot in SLOTS))
+
+MESSAGE_TEMPLATE_PROMPT = prompts.register("message_template", """Составьте шаблон сообщения, которое будет отправлено сразу многим кандидатам.
+
+Требования к шаблону:
+1. Вместо данных кандидата используйте подстановки ровно в таком виде: [ИМЯ] - имя кандидата, [ДОЛЖНОСТЬ] - должность из резюме кандидата, [НАВЫК] - ключевой навык кандидата, [ВАКАНСИЯ] - название вакансии
+2. Подстановки [ИМЯ] и [ВАКАНСИЯ] обязательны, остальные - по смыслу
+3. Не добавляйте пояснений, верните только текст шаблона
+
+Тип сообщения: {kind}
+Тон сообщения: {message_tone}
+{detail_label}: {detail}""")
+
+def generate_template(kind: str, message_tone: str, detail: str) -> str:
+    """
+    Генерирует шаблон сообщения одним запросом к LLM.
+
+    Args:
+        kind: Тип сообщения (rejection/invitation)
+        message_tone: Тон сообщения
+        detail: Причина отказа или детали собеседования
+
+    Returns:
+        str: Текст шаблона с подстановками
+    """
+    description, detail_label = MESSAGE_KINDS[kind][:2]
+    prompt = MESSAGE_TEMPLATE_PROMPT.render(
+        kind=description, message_tone=message_tone, detail_label=detail_label, detail=detail
+    )
+    response = llm.chat([{"role": "user", "content": prompt}], call_site="message_template",
+                        cache=llm.CACHE_EXACT, template=MESSAGE_TEMPLATE_PROMPT.name)
+    if not response or not getattr(response, "content", None):
+        raise Exception("Получен пустой ответ от GigaChat API")
+    template = response.content.strip()
+    if "[ИМЯ]" not in template:
+        logger.warning("Шаблон сообщения не содержит подстановку имени кандидата")
+    return template
+
+def candidate_slots(resume: Dict[str, Any], vacancy: Dict[str, Any]) -> Dict[str, str]:
+    """Извлекает из резюме значения подстановок шаблона."""
+    vacancy_skills = {
+        (skill.get("name") or "").lower()
+        for skill in vacancy.get("key_skills") or []
+    }
+    skills = [skill for skill in resume.get("skill_set") or [] if skill]
+    # Предпочитаем навык, который указан в требованиях вакансии
+    skill = next((skill for skill in skills if skill.lower() in vacancy_skills), skills[0] if skills else "")
+    return {
+        "name": resume.get("first_name") or "кандидат",
+        "position": resume.get("title") or "",
+        "skill": skill,
+        "vacancy": vacancy.get("name") or "",
+    }
+
+def fill_template(template: str, slots: Dict[str, str]) -> str:
+    """Заполняет подстановки шаблона данными кандидата."""
+    return SLOT_RE.sub(lambda match: slots.get(SLOTS[match.group(0)]) or "", template)
+
+def _fetch_json(session: requests.Session, url: str, operation_id: str) -> Dict[str, Any]:
+    response = request(session, "GET", url, operation_id)
+    if response.status_code != 200:
+        raise Exception(f"Ошибка при запросе {url}: {response.status_code} - {response.text}")
+    return response.json()
+
+def generate_messages(session: requests.Session, kind: str, detail: str, vacancy_id: Optional[str] = None,
+                      message_tone: str = "professional", negotiation_ids: Optional[List[str]] = None,
+                      run_id: Optional[str] = None, score_below: Optional[float] = None,
+                      score_above: Optional[float] = None, should_invite: Optional[bool] = None,
+                      personalize_count: Optional[int] = None, personalize_ids: Optional[List[str]] = None,
+                      base_url: str = BASE_URL) -> Dict[str, Any]:
+    """
+    Генерирует сообщения для набора откликов по общему шаблону.
+
+    Args:
+        session: Сессия API HeadHunter
+        kind: Тип сообщения (rejection/invitation)
+        detail: Причина отказа или детали собеседования
+        vacancy_id: ID вакансии (по умолчанию берется из прогона скрининга)
+        message_tone: Тон сообщения
+        negotiation_ids: Явный список ID откликов
+        run_id: ID прогона скрининга для отбора откликов по его результатам
+        score_below: Отбирать кандидатов с оценкой ниже порога
+        score_above: Отбирать кандидатов с оценкой не ниже порога
+        should_invite: Отбирать кандидатов с указанным решением скрининга
+        personalize_count: Количество кандидатов с наибольшей оценкой для персональных сообщений
+        personalize_ids: ID откликов для персональных сообщений
+        base_url: Базовый URL API HeadHunter
+
+    Returns:
+        Dict: Шаблон, сообщения по ID откликов и новое состояние откликов
+    """
+    if kind not in MESSAGE_KINDS:
+        raise Exception(f"Недопустимый тип сообщения: {kind}")
+    if not detail:
+        raise Exception("Не указана причина отказа или детали собеседования")
+    if not negotiation_ids and not run_id:
+        raise Exception("Не указаны отклики: negotiation_ids или run_id")
+
+    db = SessionLocal()
+    try:
+        selected = select_negotiations(db, negotiation_ids, run_id, score_below, score_above, should_invite)
+        if run_id and not vacancy_id:
+            run = db.query(ScreeningRun).filter(ScreeningRun.id == run_id).first()
+            vacancy_id = run.vacancy_id if run else None
+    finally:
+        db.close()
+    selected = selected[:BULK_STATE_CHANGE_MAX_ITEMS]
+
+    # Для откликов вне прогона скрининга ID резюме берем из самого отклика
+    for item in selected:
+        if not item["resume_id"]:
+            negotiation = _fetch_json(session, f"{base_url}/negotiations/{item['negotiation_id']}", "get-negotiation")
+            item["resume_id"] = (negotiation.get("resume") or {}).get("id")
+            vacancy_id = vacancy_id or (negotiation.get("vacancy") or {}).get("id")
+
+    vacancy = _fetch_json(session, f"{base_url}/vacancies/{vacancy_id}", "get-vacancy") if vacancy_id else {}
+    resumes = fetch_resumes(
+        session, list(dict.fromkeys(item["resume_id"] for item in selected if item["resume_id"])),
+        SCREENING_FETCH_WORKERS, base_url=base_url
+    )
+
+    template = generate_template(kind, message_tone, detail)
+    messages, skipped = {}, []
+    for item in selected:
+        resume = resumes.get(item["resume_id"])
+        if resume is None:
+            skipped.append(item["negotiation_id"])
+            continue
+        messages[item["negotiation_id"]] = fill_template(template, candidate_slots(resume, vacancy))
+
+    # Персональные сообщения для выбранных кандидатов, по умолчанию с наибольшей оценкой
+    if personalize_ids:
+        personalized = [str(nid) for nid in personalize_ids if str(nid) in messages]
+    else:
+        count = MESSAGE_PERSONALIZE_COUNT if personalize_count is None else int(personalize_count)
+        ranked = sorted(
+            (item for item in selected if item["negotiation_id"] in messages),
+            key=lambda item: item["score"] if item["score"] is not None else float("-inf"),
+            reverse=True
+        )
+        personalized = [item["negotiation_id"] for item in ranked[:max(count, 0)]]
+
+    resume_ids = {item["negotiation_id"]: item["resume_id"] for item in selected}
+    personal_prompt = prompts.get(MESSAGE_KINDS[kind][3])
+    detail_field = "rejection_reason" if kind == MESSAGE_REJECTION else "interview_details"
+
+    def personalize(negotiation_id: str) -> Optional[str]:
+        prompt = personal_prompt.render(
+            **{detail_field: detail},
+            message_tone=message_tone,
+            resume=compact_resume(resumes[resume_ids[negotiation_id]], DETAIL_BRIEF)
+        )
+        try:
+            response = llm.chat([{"role": "user", "content": prompt}], call_site=personal_prompt.name,
+                                cache=llm.CACHE_EXACT, template=personal_prompt.name)
+        except Exception as e:
+            logger.error(f"Ошибка при генерации персонального сообщения для отклика {negotiation_id}: {str(e)}")
+            return None
+        return getattr(response, "content", None)
+
+    if personalized:
+        logger.info(f"Генерация персональных сообщений для {len(personalized)} кандидатов")
+        with ThreadPoolExecutor(max_workers=MESSAGE_LLM_WORKERS) as pool:
+            for negotiation_id, text in zip(personalized, pool.map(tracing.bind(personalize), personalized)):
+                if text:
+                    messages[negotiation_id] = text
+
+    return {
+        "template": template,
+        "new_state": MESSAGE_KINDS[kind][2],
+        "negotiation_ids": list(messages),
+        "messages": messages,
+        "personalized": personalized,
+        "skipped": skipped,
+        "llm_calls": 1 + len(personalized)
+    }
@@ -0,0 +1,206 @@
+"""
+Компактное табличное представление больших списков откликов.
+
+Отклики из ответов API HeadHunter хранятся не вложенными словарями, а
+столбцами: числовые поля (зарплата, возраст, опыт, даты) - в массивах NumPy,
+повторяющиеся строки (состояние, вакансия, валюта, уровень образования) -
+кодами в словаре значений, идентификаторы - интернированными строками.
+Исходный JSON каждого отклика сохраняется в виде байтов и разбирается только
+при обращении к конкретной строке. Фильтрация и сортировка возвращают новую
+таблицу с общим словарем значений без копирования исходного JSON.
+"""
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+import json
+import sys
+import numpy as np
+
+# Числовые столбцы (NaN - нет значения)
+NUMERIC_COLUMNS = ("salary", "age", "experience_months", "created_at", "updated_at")
+# Категориальные столбцы: код значения в словаре, -1 - нет значения
+CATEGORY_COLUMNS = ("state", "vacancy_id", "currency", "education_level")
+
+def _timestamp(value: Optional[str]) -> float:
+    """Переводит дату HH (2024-01-31T12:00:00+0300) в секунды с начала эпохи."""
+    if not value:
+        return np.nan
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        # До Python 3.11 fromisoformat не разбирает смещение без двоеточия
+        try:
+            return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z").timestamp()
+        except ValueError:
+            return np.nan
+
+def _number(value: Any) -> float:
+    return float(value) if value is not None else np.nan
+
+def _intern(value: Any) -> Optional[str]:
+    return sys.intern(str(value)) if value is not None else None
+
+class NegotiationTable:
+    """Столбцовая таблица откликов с быстрыми фильтрами и ленивым доступом к JSON."""
+    __slots__ = ("ids", "resume_ids", "numeric", "codes", "vocabulary", "_raw")
+
+    def __init__(self, ids: List[str], resume_ids: List[Optional[str]], numeric: Dict[str, np.ndarray],
+                 codes: Dict[str, np.ndarray], vocabulary: Dict[str, List[str]], raw: List[bytes]):
+        self.ids = ids
+        self.resume_ids = resume_ids
+        self.numeric = numeric
+        self.codes = codes
+        self.vocabulary = vocabulary
+        self._raw = raw
+
+    @classmethod
+    def from_items(cls, items: Iterable[Union[Dict[str, Any], str, bytes]]) -> "NegotiationTable":
+        """
+        Строит таблицу из элементов ответа /negotiations/response.
+
+        Args:
+            items: Отклики в виде словарей или строк JSON
+
+        Returns:
+            NegotiationTable: Таблица откликов
+        """
+        ids, resume_ids, raw = [], [], []
+        numeric = {name: array("d") for name in NUMERIC_COLUMNS}
+        codes = {name: array("i") for name in CATEGORY_COLUMNS}
+        vocabulary: Dict[str, List[str]] = {name: [] for name in CATEGORY_COLUMNS}
+        lookup: Dict[str, Dict[str, int]] = {name: {} for name in CATEGORY_COLUMNS}
+
+        def code(column: str, value: Any) -> int:
+            if value is None:
+                return -1
+            known = lookup[column]
+            if value not in known:
+                known[value] = len(vocabulary[column])
+                vocabulary[column].append(_intern(value))
+            return known[value]
+
+        for item in items:
+            if isinstance(item, (str, bytes)):
+                data = item.encode() if isinstance(item, str) else item
+                item = json.loads(data)
+            else:
+                data = json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode()
+            resume = item.get("resume") or {}
+            salary = resume.get("salary") or {}
+            level = (resume.get("education") or {}).get("level")
+            ids.append(_intern(item.get("id")))
+            resume_ids.append(_intern(resume.get("id")))
+            raw.append(data)
+            numeric["salary"].append(_number(salary.get("amount")))
+            numeric["age"].append(_number(resume.get("age")))
+            numeric["experience_months"].append(_number((resume.get("total_experience") or {}).get("months")))
+            numeric["created_at"].append(_timestamp(item.get("created_at")))
+            numeric["updated_at"].append(_timestamp(item.get("updated_at")))
+            codes["state"].append(code("state", (item.get("state") or {}).get("id")))
+            codes["vacancy_id"].append(code("vacancy_id", (item.get("vacancy") or {}).get("id")))
+            codes["currency"].append(code("currency", salary.get("currency")))
+            codes["education_level"].append(code("education_level", level.get("id") if isinstance(level, dict) else level))
+
+        return cls(
+            ids, resume_ids,
+            {name: np.frombuffer(values, dtype=np.float64) for name, values in numeric.items()},
+            {name: np.frombuffer(values, dtype=np.int32) for name, values in codes.items()},
+            vocabulary, raw
+        )
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[List[Dict[str, Any]]]) -> "NegotiationTable":
+        """Строит таблицу из страниц откликов, не накапливая словари всех страниц."""
+        return cls.from_items(item for page in pages for item in page)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def column(self, name: str) -> np.ndarray:
+        """Возвращает числовой столбец или столбец категорий в виде строк (None - нет значения)."""
+        if name in self.numeric:
+            return self.numeric[name]
+        vocabulary = np.array(self.vocabulary[name] + [None], dtype=object)
+        return vocabulary[self.codes[name]]
+
+    def take(self, indices: Union[np.ndarray, List[int]]) -> "NegotiationTable":
+        """Возвращает таблицу из строк с указанными номерами в указанном порядке."""
+        indices = np.asarray(indices, dtype=np.intp)
+        return NegotiationTable(
+            [self.ids[i] for i in indices],
+            [self.resume_ids[i] for i in indices],
+            {name: values[indices] for name, values in self.numeric.items()},
+            {name: values[indices] for name, values in self.codes.items()},
+            self.vocabulary,
+            [self._raw[i] for i in indices]
+        )
+
+    def _range_mask(self, name: str, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        values = self.numeric[name]
+        mask = np.ones(len(self), dtype=bool)
+        # Сравнение с NaN дает False, поэтому строки без значения отбрасываются заданными границами
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+
+    def mask(self, state: Optional[Union[str, List[str]]] = None, vacancy_id: Optional[str] = None,
+             salary_from: Optional[float] = None, salary_to: Optional[float] = None,
+             age_from: Optional[float] = None, age_to: Optional[float] = None,
+             experience_from: Optional[float] = None, experience_to: Optional[float] = None,
+             created_after: Optional[str] = None, created_before: Optional[str] = None) -> np.ndarray:
+        """Возвращает булеву маску строк, удовлетворяющих всем условиям (опыт - в месяцах)."""
+        mask = self._range_mask("salary", salary_from, salary_to)
+        mask &= self._range_mask("age", age_from, age_to)
+        mask &= self._range_mask("experience_months", experience_from, experience_to)
+        mask &= self._range_mask(
+            "created_at",
+            _timestamp(created_after) if created_after else None,
+            _timestamp(created_before) if created_before else None
+        )
+        for column, wanted in (("state", state), ("vacancy_id", vacancy_id)):
+            if wanted is None:
+                continue
+            wanted = {wanted} if isinstance(wanted, str) else set(wanted)
+            known = [code for code, value in enumerate(self.vocabulary[column]) if value in wanted]
+            mask &= np.isin(self.codes[column], known)
+        return mask
+
+    def filter(self, **conditions: Any) -> "NegotiationTable":
+        """Возвращает таблицу из строк, удовлетворяющих условиям mask()."""
+        return self.take(np.flatnonzero(self.mask(**conditions)))
+
+    def sort(self, by: str, descending: bool = False) -> "NegotiationTable":
+        """Сортирует строки по числовому столбцу. Порядок равных сохраняется, строки без значения - в конце."""
+        values = self.numeric[by]
+        keys = -values if descending else values
+        # lexsort сортирует по последнему ключу: сначала наличие значения, затем само значение
+        return self.take(np.lexsort((keys, np.isnan(values))))
+
+    def head(self, n: int) -> "NegotiationTable":
+        return self.take(np.arange(min(n, len(self))))
+
+    def item(self, i: int) -> Dict[str, Any]:
+        """Возвращает исходный JSON отклика, разбирая его только при обращении."""
+        return json.loads(self._raw[i])
+
+    def items(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.item(i)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Возвращает сохраненные столбцы строки без разбора JSON."""
+        row = {"negotiation_id": self.ids[i], "resume_id": self.resume_ids[i]}
+        for name, values in self.numeric.items():
+            row[name] = None if np.isnan(values[i]) else values[i].item()
+        for name, values in self.codes.items():
+            row[name] = self.vocabulary[name][values[i]] if values[i] >= 0 else None
+        return row
+
+    def memory_usage(self) -> int:
+        """Оценивает занимаемую таблицей память в байтах."""
+        arrays = sum(values.nbytes for values in self.numeric.values()) + sum(values.nbytes for values in self.codes.values())
+        raw = sum(sys.getsizeof(data) for data in self._raw)
+        lists = sys.getsizeof(self.ids) + sys.getsizeof(self.resume_ids) + sys.getsizeof(self._raw)
+        return arrays + raw + lists
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Optional
+import threading
+import time
+
+class RateLimiter:
+    """
+    Потокобезопасный ограничитель частоты запросов по алгоритму token bucket.
+    
+    Args:
+        rate: Количество запросов в секунду
+        burst: Максимальное количество запросов подряд без ожидания
+    """
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or max(int(rate), 1))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Ожидает, пока не появится свободный токен.
+        
+        Returns:
+            float: Время ожидания в секундах
+        """
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+class RateLimiterPool:
+    """
+    Отдельные ограничители частоты по ключу (токену пользователя).
+
+    Лимиты API HeadHunter действуют на токен, поэтому долгая операция одного
+    работодателя не должна задерживать запросы других. Ограничители давно не
+    использованных ключей вытесняются.
+
+    Args:
+        rate: Количество запросов в секунду для одного ключа
+        burst: Максимальное количество запросов подряд без ожидания для одного ключа
+        max_keys: Максимальное количество хранимых ограничителей
+    """
+    def __init__(self, rate: float, burst: Optional[int] = None, max_keys: int = 1000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._limiters: "OrderedDict[str, RateLimiter]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> RateLimiter:
+        """Возвращает ограничитель для ключа, создавая его при первом обращении."""
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = self._limiters[key] = RateLimiter(self.rate, self.burst)
+                while len(self._limiters) > self.max_keys:
+                    self._limiters.popitem(last=False)
+            else:
+                self._limiters.move_to_end(key)
+            return limiter
+
+    def acquire(self, key: str) -> float:
+        """Ожидает свободный токен ограничителя ключа и возвращает время ожидания в секундах."""
+        return self.get(key).acquire()
@@ -0,0 +1,189 @@
+"""
+Компактное текстовое представление резюме HeadHunter для промптов LLM.
+
+Полный JSON резюме содержит фотографии, ссылки, идентификаторы справочников
+и служебные поля, которые расходуют токены и не влияют на оценку кандидата.
+Компактор оставляет только содержательные поля в плотном текстовом виде.
+
+Уровни детализации:
+    - brief: должность, опыт, ключевые навыки, последние места работы без описаний
+    - standard: места работы и раздел «О себе» с сокращенными описаниями, образование, языки, условия работы
+    - full: полные описания, курсы и сертификаты
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional
+import re
+from config import RESUME_DETAIL_LEVEL
+
+DETAIL_BRIEF = "brief"
+DETAIL_STANDARD = "standard"
+DETAIL_FULL = "full"
+DETAIL_LEVELS = (DETAIL_BRIEF, DETAIL_STANDARD, DETAIL_FULL)
+
+# Ограничения по уровням детализации: количество мест работы, навыков и длина описаний
+LIMITS = {
+    DETAIL_BRIEF: {"jobs": 3, "skills": 10, "description": 0, "about": 0},
+    DETAIL_STANDARD: {"jobs": 10, "skills": 30, "description": 300, "about": 300},
+    DETAIL_FULL: {"jobs": None, "skills": None, "description": None, "about": None},
+}
+
+TAG_RE = re.compile(r"<[^>]+>")
+WHITESPACE_RE = re.compile(r"\s+")
+
+def _name(value: Any) -> Optional[str]:
+    """Возвращает название элемента справочника HH или само значение."""
+    if isinstance(value, dict):
+        return value.get("name")
+    return value
+
+def _names(values: Any) -> List[str]:
+    return [name for name in (_name(value) for value in values or []) if name]
+
+def _clean(text: Optional[str], limit: Optional[int] = None) -> str:
+    """Удаляет разметку и лишние пробелы, обрезает текст до указанной длины."""
+    text = WHITESPACE_RE.sub(" ", TAG_RE.sub(" ", text or "")).strip()
+    if limit is not None and len(text) > limit:
+        text = text[:limit].rsplit(" ", 1)[0] + "…"
+    return text
+
+def _month(value: Optional[str]) -> str:
+    """Сокращает дату HH (YYYY-MM-DD) до года и месяца."""
+    return value[:7] if value else "н.в."
+
+def _duration(start: Optional[str], end: Optional[str]) -> str:
+    """Возвращает продолжительность работы в годах и месяцах."""
+    try:
+        start_year, start_month = int(start[:4]), int(start[5:7])
+        end_date = end or date.today().isoformat()
+        months = (int(end_date[:4]) - start_year) * 12 + int(end_date[5:7]) - start_month + 1
+    except (TypeError, ValueError):
+        return ""
+    years, months = divmod(max(months, 0), 12)
+    parts = [f"{years} г." if years else "", f"{months} мес." if months else ""]
+    return " ".join(part for part in parts if part)
+
+def _salary(salary: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not salary or not salary.get("amount"):
+        return None
+    return f"{salary['amount']} {salary.get('currency') or ''}".rstrip()
+
+def _experience_line(job: Dict[str, Any], description_limit: Optional[int]) -> str:
+    duration = _duration(job.get("start"), job.get("end"))
+    line = f"- {_month(job.get('start'))}–{_month(job.get('end'))}"
+    if duration:
+        line += f" ({duration})"
+    line += f": {job.get('position') or '-'}, {job.get('company') or '-'}"
+    industries = _names(job.get("industries"))
+    if industries and description_limit != 0:
+        line += f" [{', '.join(industries)}]"
+    if description_limit != 0:
+        description = _clean(job.get("description"), description_limit)
+        if description:
+            line += f". {description}"
+    return line
+
+def detail_level(detail: Optional[str] = None) -> str:
+    """Возвращает уровень детализации, по умолчанию RESUME_DETAIL_LEVEL."""
+    return detail if detail in DETAIL_LEVELS else RESUME_DETAIL_LEVEL
+
+def compact_resume(resume: Any, detail: Optional[str] = None) -> str:
+    """
+    Преобразует JSON резюме HeadHunter в компактный текст.
+
+    Args:
+        resume: Резюме HH (или список из одного резюме, как возвращает get-resume)
+        detail: Уровень детализации (brief/standard/full), по умолчанию RESUME_DETAIL_LEVEL
+
+    Returns:
+        str: Текстовое представление резюме
+    """
+    if isinstance(resume, list):
+        return "\n\n".join(compact_resume(item, detail) for item in resume)
+    if not isinstance(resume, dict):
+        return str(resume)
+
+    detail = detail_level(detail)
+    limits = LIMITS.get(detail, LIMITS[DETAIL_STANDARD])
+
+    lines = [f"Должность: {resume.get('title') or '-'}"]
+
+    name = " ".join(part for part in (resume.get("first_name"), resume.get("last_name")) if part)
+    personal = [
+        name,
+        f"возраст {resume['age']}" if resume.get("age") else "",
+        _name(resume.get("gender")) if detail != DETAIL_BRIEF else "",
+        _name(resume.get("area")),
+    ]
+    personal = [item for item in personal if item]
+    if personal:
+        lines.append("Кандидат: " + ", ".join(personal))
+
+    salary = _salary(resume.get("salary"))
+    if salary:
+        lines.append(f"Зарплата: {salary}")
+
+    total_months = (resume.get("total_experience") or {}).get("months")
+    if total_months:
+        years, months = divmod(int(total_months), 12)
+        lines.append(f"Общий опыт: {years} г. {months} мес.")
+
+    if detail != DETAIL_BRIEF:
+        roles = _names(resume.get("professional_roles"))
+        if roles:
+            lines.append(f"Профессиональные роли: {', '.join(roles)}")
+
+    skills = [skill for skill in resume.get("skill_set") or [] if skill]
+    if skills:
+        shown = skills if limits["skills"] is None else skills[:limits["skills"]]
+        more = f" (+{len(skills) - len(shown)})" if len(shown) < len(skills) else ""
+        lines.append(f"Навыки: {', '.join(shown)}{more}")
+
+    jobs = resume.get("experience") or []
+    if jobs:
+        shown = jobs if limits["jobs"] is None else jobs[:limits["jobs"]]
+        lines.append("Опыт работы:")
+        lines.extend(_experience_line(job, limits["description"]) for job in shown)
+        if len(shown) < len(jobs):
+            lines.append(f"- других мест работы: {len(jobs) - len(shown)}")
+
+    education = resume.get("education") or {}
+    level = _name(education.get("level"))
+    primary = education.get("primary") or []
+    if detail == DETAIL_BRIEF:
+        if level:
+            lines.append(f"Образование: {level}")
+    elif level or primary:
+        lines.append(f"Образование: {level or '-'}")
+        for item in primary:
+            parts = [item.get("name"), item.get("organization"), item.get("result")]
+            lines.append("- " + ", ".join(str(part) for part in [item.get("year")] + parts if part))
+
+    if detail != DETAIL_BRIEF:
+        languages = [
+            f"{language.get('name')} ({_name(language.get('level'))})" if _name(language.get("level")) else language.get("name")
+            for language in resume.get("language") or [] if language.get("name")
+        ]
+        if languages:
+            lines.append(f"Языки: {', '.join(languages)}")
+
+        conditions = _names(resume.get("employments")) + _names(resume.get("schedules"))
+        relocation = _name((resume.get("relocation") or {}).get("type"))
+        if relocation:
+            conditions.append(relocation)
+        if conditions:
+            lines.append(f"Условия: {', '.join(conditions)}")
+
+    if detail == DETAIL_FULL:
+        for item in (education.get("additional") or []) + (education.get("attestation") or []):
+            parts = [item.get("name"), item.get("organization"), item.get("result")]
+            lines.append("Курсы: " + ", ".join(str(part) for part in [item.get("year")] + parts if part))
+        certificates = [certificate.get("title") for certificate in resume.get("certificate") or [] if certificate.get("title")]
+        if certificates:
+            lines.append(f"Сертификаты: {', '.join(certificates)}")
+
+    if limits["about"] != 0:
+        about = _clean(resume.get("skills"), limits["about"])
+        if about:
+            lines.append(f"О себе: {about}")
+
+    return "\n".join(lines)
@@ -0,0 +1,452 @@
+"""
+Пакетный скрининг резюме по вакансии.
+
+Отклики читаются постранично, резюме загружаются параллельно, несколько
+сжатых резюме упаковываются в один запрос к LLM, а запросы выполняются
+ограниченным пулом потоков. Решения по каждому кандидату сохраняются в
+таблицу screening_results, поэтому прерванный прогон можно продолжить.
+Резюме, которые не изменились с прошлого анализа по тем же критериям,
+в LLM повторно не отправляются.
+
+Скрининг большого числа откликов занимает минуты, поэтому start_screening
+выполняет его в фоновом пуле и сразу возвращает run_id; повторный вызов с
+этим run_id возвращает ход прогона, а после завершения - его итоги.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import logging
+import re
+import threading
+import uuid
+import requests
+import llm
+import metrics
+import tracing
+import prompts
+from config import (
+    SCREENING_BATCH_SIZE, SCREENING_LLM_WORKERS, SCREENING_FETCH_WORKERS, SCREENING_RESUME_DETAIL, HH_API_URL,
+    SCREENING_SYNC_MAX_CANDIDATES, SCREENING_BACKGROUND_WORKERS
+)
+from database.database import SessionLocal
+from database.models import ScreeningRun, ScreeningResult
+from .transport import request
+from .analysis_store import resume_fingerprint, criteria_hash, get_analyses, save_analysis
+from .resume_compactor import compact_resume, detail_level
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = HH_API_URL
+
+# Максимальный размер страницы списка откликов в API HeadHunter
+NEGOTIATIONS_PAGE_SIZE = 50
+
+# Фоновые прогоны скрининга этого процесса: run_id -> Future
+_background: Optional[ThreadPoolExecutor] = None
+_active: Dict[str, Future] = {}
+_active_lock = threading.Lock()
+
+SCREENING_PROMPT = prompts.register("batch_screen_resumes", """Вы - рекрутер. Оцените каждого кандидата по критериям вакансии и решите, приглашать ли его на собеседование.
+
+Критерии: {criteria}
+
+Верните ТОЛЬКО JSON-массив без пояснений, по одному объекту на кандидата:
+[{{"id": "<id кандидата>", "score": <оценка 0-100>, "should_invite": <true|false>, "summary": "<обоснование в одном предложении>"}}]
+
+Кандидаты:
+{candidates}""")
+
+def iter_negotiations(session: requests.Session, vacancy_id: str, max_items: Optional[int] = None,
+                      extra_params: Optional[Dict[str, Any]] = None,
+                      base_url: str = BASE_URL) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Постранично возвращает отклики по вакансии, не загружая весь список в память.
+
+    Args:
+        session: Сессия API HeadHunter
+        vacancy_id: ID вакансии
+        max_items: Максимальное количество откликов
+        extra_params: Дополнительные фильтры списка откликов
+        base_url: Базовый URL API HeadHunter
+
+    Returns:
+        Итератор страниц откликов
+    """
+    page = 0
+    fetched = 0
+    while True:
+        params = {**(extra_params or {}), "vacancy_id": vacancy_id, "page": page, "per_page": NEGOTIATIONS_PAGE_SIZE}
+        response = request(session, "GET", f"{base_url}/negotiations/response", "get-negotiations-list", params=params)
+        if response.status_code != 200:
+            raise Exception(f"Ошибка при получении списка откликов: {response.status_code} - {response.text}")
+        data = response.json()
+        items = data.get("items", [])
+        if max_items is not None:
+            items = items[:max_items - fetched]
+        if items:
+            fetched += len(items)
+            yield items
+        page += 1
+        if not items or page >= data.get("pages", 0) or (max_items is not None and fetched >= max_items):
+            return
+
+def fetch_resumes(session: requests.Session, resume_ids: List[str], max_workers: int,
+                  base_url: str = BASE_URL) -> Dict[str, Dict[str, Any]]:
+    """
+    Параллельно загружает резюме по их идентификаторам.
+
+    Args:
+        session: Сессия API HeadHunter
+        resume_ids: Идентификаторы резюме
+        max_workers: Количество параллельных запросов
+        base_url: Базовый URL API HeadHunter
+
+    Returns:
+        Dict: Резюме по идентификаторам (резюме с ошибками пропускаются)
+    """
+    def fetch(resume_id: str) -> Optional[Dict[str, Any]]:
+        response = request(session, "GET", f"{base_url}/resumes/{resume_id}", "get-resume")
+        if response.status_code != 200:
+            logger.error(f"Ошибка при получении резюме {resume_id}: {response.status_code}")
+            return None
+        return response.json()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return {
+            resume_id: resume
+            for resume_id, resume in zip(resume_ids, pool.map(tracing.bind(fetch), resume_ids))
+            if resume is not None
+        }
+
+def parse_decisions(text: str) -> List[Dict[str, Any]]:
+    """Извлекает JSON-массив решений из ответа LLM."""
+    match = re.search(r"\[.*\]", text or "", re.DOTALL)
+    if not match:
+        raise ValueError("В ответе LLM не найден JSON-массив решений")
+    decisions = json.loads(match.group(0))
+    if not isinstance(decisions, list):
+        raise ValueError("Ответ LLM не является списком решений")
+    return [decision for decision in decisions if isinstance(decision, dict)]
+
+def screen_batch(candidates: List[Dict[str, Any]], criteria: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Оценивает пачку кандидатов одним запросом к LLM.
+
+    Args:
+        candidates: Кандидаты с полями negotiation_id и resume
+        criteria: Критерии оценки
+
+    Returns:
+        Dict: Решения по идентификаторам откликов
+    """
+    blocks = "\n\n".join(
+        f"### Кандидат id={candidate['negotiation_id']}\n{compact_resume(candidate['resume'], SCREENING_RESUME_DETAIL)}"
+        for candidate in candidates
+    )
+    prompt = SCREENING_PROMPT.render(criteria=criteria or "соответствие вакансии", candidates=blocks)
+    response = llm.chat([{"role": "user", "content": prompt}], call_site="batch_screen_resumes", cache=llm.CACHE_EXACT,
+                        template=SCREENING_PROMPT.name)
+    if not response or not getattr(response, "content", None):
+        raise Exception("Получен пустой ответ от GigaChat API")
+
+    decisions = {}
+    for decision in parse_decisions(response.content):
+        should_invite = decision.get("should_invite")
+        if isinstance(should_invite, str):
+            should_invite = should_invite.strip().lower() in ("true", "да", "yes")
+        try:
+            score = float(decision.get("score"))
+        except (TypeError, ValueError):
+            score = None
+        decisions[str(decision.get("id"))] = {
+            "score": score,
+            "should_invite": bool(should_invite),
+            "summary": decision.get("summary")
+        }
+    return decisions
+
+def _get_or_create_run(db, run_id: Optional[str], vacancy_id: str, employer_id: Optional[str], criteria: str) -> ScreeningRun:
+    """Находит незавершенный прогон для продолжения или создает новый."""
+    run = None
+    if run_id:
+        run = db.query(ScreeningRun).filter(ScreeningRun.id == run_id).first()
+        if not run:
+            raise Exception(f"Прогон скрининга {run_id} не найден")
+    if run is None:
+        run = ScreeningRun(
+            id=str(uuid.uuid4()),
+            vacancy_id=str(vacancy_id),
+            employer_id=employer_id,
+            criteria=criteria
+        )
+        db.add(run)
+        db.commit()
+    elif run.status != "running":
+        run.status = "running"
+        db.commit()
+    return run
+
+def _save_results(db, run: ScreeningRun, candidates: List[Dict[str, Any]], decisions: Dict[str, Dict[str, Any]],
+                  criteria_key: Optional[str] = None) -> int:
+    """
+    Сохраняет решения по пачке кандидатов и возвращает количество кандидатов без решения.
+
+    Если передан хеш критериев, решения также сохраняются по отпечаткам резюме
+    для последующих инкрементальных прогонов.
+    """
+    failed = 0
+    for candidate in candidates:
+        decision = decisions.get(str(candidate["negotiation_id"]))
+        if decision is None:
+            failed += 1
+            continue
+        if criteria_key is not None:
+            save_analysis(db, candidate["resume_id"], candidate["fingerprint"], criteria_key, **decision)
+        db.add(ScreeningResult(
+            id=str(uuid.uuid4()),
+            run_id=run.id,
+            negotiation_id=str(candidate["negotiation_id"]),
+            resume_id=candidate["resume_id"],
+            **decision
+        ))
+    run.processed += len(candidates) - failed
+    run.failed += failed
+    db.commit()
+    return failed
+
+def screen_vacancy(session: requests.Session, vacancy_id: str, criteria: str, employer_id: Optional[str] = None,
+                   run_id: Optional[str] = None, max_candidates: Optional[int] = None,
+                   batch_size: Optional[int] = None, llm_workers: Optional[int] = None,
+                   results_limit: int = 50, base_url: str = BASE_URL) -> Dict[str, Any]:
+    """
+    Выполняет пакетный скрининг всех откликов по вакансии.
+
+    Args:
+        session: Сессия API HeadHunter
+        vacancy_id: ID вакансии
+        criteria: Критерии оценки кандидатов
+        employer_id: ID работодателя
+        run_id: ID прогона для продолжения прерванного скрининга
+        max_candidates: Максимальное количество откликов
+        batch_size: Количество резюме в одном запросе к LLM
+        llm_workers: Количество параллельных запросов к LLM
+        results_limit: Количество лучших кандидатов в ответе
+        base_url: Базовый URL API HeadHunter
+
+    Returns:
+        Dict: Итоги прогона и решения по лучшим кандидатам
+    """
+    batch_size = max(batch_size or SCREENING_BATCH_SIZE, 1)
+    llm_workers = max(llm_workers or SCREENING_LLM_WORKERS, 1)
+    db = SessionLocal()
+    try:
+        run = _get_or_create_run(db, run_id, vacancy_id, employer_id, criteria)
+        criteria_key = criteria_hash(criteria, detail_level(SCREENING_RESUME_DETAIL))
+        done = {
+            negotiation_id for (negotiation_id,) in
+            db.query(ScreeningResult.negotiation_id).filter(ScreeningResult.run_id == run.id)
+        }
+        logger.info(f"Скрининг вакансии {vacancy_id}, прогон {run.id}: уже обработано {len(done)} откликов")
+        # Кандидаты без решения из прошлого запуска будут обработаны повторно
+        run.processed = len(done)
+        run.failed = 0
+
+        total = 0
+        skipped = 0
+        unchanged = 0
+        analyzed = 0
+        in_flight = set()
+        in_flight_batches = {}
+
+        def collect(finished) -> None:
+            for future in finished:
+                batch = in_flight_batches.pop(future)
+                try:
+                    decisions = future.result()
+                except Exception as e:
+                    logger.error(f"Ошибка при скрининге пачки резюме: {str(e)}")
+                    decisions = {}
+                _save_results(db, run, batch, decisions, criteria_key=criteria_key)
+
+        with ThreadPoolExecutor(max_workers=llm_workers) as pool:
+            for page in iter_negotiations(session, vacancy_id, max_items=max_candidates, base_url=base_url):
+                total += len(page)
+                pending = [
+                    item for item in page
+                    if str(item["id"]) not in done and (item.get("resume") or {}).get("id")
+                ]
+                skipped += len(page) - len(pending)
+                resumes = fetch_resumes(
+                    session, [item["resume"]["id"] for item in pending], SCREENING_FETCH_WORKERS, base_url=base_url
+                )
+                candidates = [
+                    {
+                        "negotiation_id": item["id"],
+                        "resume_id": item["resume"]["id"],
+                        "resume": resumes[item["resume"]["id"]],
+                        "fingerprint": resume_fingerprint(resumes[item["resume"]["id"]])
+                    }
+                    for item in pending if item["resume"]["id"] in resumes
+                ]
+                run.failed += len(pending) - len(candidates)
+
+                # Неизменившиеся резюме получают сохраненное решение без обращения к LLM
+                known = get_analyses(
+                    db, [(candidate["resume_id"], candidate["fingerprint"]) for candidate in candidates], criteria_key
+                )
+                # Записи одиночного анализа (hh_analyze_resume) не содержат решения
+                known = {resume_id: row for resume_id, row in known.items() if row.should_invite is not None}
+                reused = [candidate for candidate in candidates if str(candidate["resume_id"]) in known]
+                _save_results(db, run, reused, {
+                    str(candidate["negotiation_id"]): {
+                        "score": known[str(candidate["resume_id"])].score,
+                        "should_invite": known[str(candidate["resume_id"])].should_invite,
+                        "summary": known[str(candidate["resume_id"])].summary
+                    }
+                    for candidate in reused
+                })
+                unchanged += len(reused)
+                candidates = [candidate for candidate in candidates if str(candidate["resume_id"]) not in known]
+                analyzed += len(candidates)
+                metrics.observe_cache("analysis", "screening", hits=len(reused), misses=len(candidates))
+
+                for start in range(0, len(candidates), batch_size):
+                    # Ограничиваем число пачек в работе, чтобы не держать в памяти все резюме
+                    while len(in_flight) >= llm_workers * 2:
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        in_flight.difference_update(finished)
+                        collect(finished)
+                    batch = candidates[start:start + batch_size]
+                    future = pool.submit(tracing.bind(screen_batch), batch, criteria)
+                    in_flight_batches[future] = batch
+                    in_flight.add(future)
+
+            finished, _ = wait(in_flight)
+            collect(finished)
+
+        run.total = total
+        run.status = "completed" if run.failed == 0 else "partial"
+        db.commit()
+
+        return {
+            **_run_summary(db, run, results_limit),
+            "skipped": skipped,
+            "unchanged": unchanged,
+            "analyzed": analyzed,
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def _run_summary(db, run: ScreeningRun, results_limit: int) -> Dict[str, Any]:
+    """Итоги прогона по сохраненным решениям и лучшие кандидаты."""
+    top = (
+        db.query(ScreeningResult)
+        .filter(ScreeningResult.run_id == run.id)
+        .order_by(ScreeningResult.score.desc())
+        .limit(results_limit)
+        .all()
+    )
+    invited = db.query(ScreeningResult).filter(
+        ScreeningResult.run_id == run.id, ScreeningResult.should_invite.is_(True)
+    ).count()
+    return {
+        "run_id": run.id,
+        "vacancy_id": run.vacancy_id,
+        "status": run.status,
+        "total": run.total,
+        "processed": run.processed,
+        "failed": run.failed,
+        "invited": invited,
+        "rejected": run.processed - invited,
+        "results": [
+            {
+                "negotiation_id": result.negotiation_id,
+                "resume_id": result.resume_id,
+                "score": result.score,
+                "should_invite": result.should_invite,
+                "summary": result.summary
+            }
+            for result in top
+        ]
+    }
+
+def _run_in_background(session: requests.Session, run_id: str, vacancy_id: str, criteria: str,
+                       employer_id: Optional[str], **kwargs: Any) -> None:
+    try:
+        result = screen_vacancy(session, vacancy_id, criteria, employer_id=employer_id, run_id=run_id, **kwargs)
+        logger.info(f"Фоновый скрининг {run_id} завершен: {result['status']}, обработано {result['processed']}")
+    except Exception as e:
+        logger.error(f"Ошибка фонового скрининга {run_id}: {str(e)}")
+        db = SessionLocal()
+        try:
+            db.query(ScreeningRun).filter(ScreeningRun.id == run_id).update({"status": "failed"})
+            db.commit()
+        finally:
+            db.close()
+    finally:
+        with _active_lock:
+            _active.pop(run_id, None)
+
+def start_screening(session: requests.Session, vacancy_id: str, criteria: str, employer_id: Optional[str] = None,
+                    run_id: Optional[str] = None, max_candidates: Optional[int] = None,
+                    batch_size: Optional[int] = None, results_limit: int = 50,
+                    base_url: str = BASE_URL) -> Dict[str, Any]:
+    """
+    Запускает скрининг вакансии или возвращает ход уже запущенного прогона.
+
+    Небольшие прогоны (max_candidates не больше SCREENING_SYNC_MAX_CANDIDATES)
+    выполняются сразу. Остальные выполняются в фоновом пуле: ответ содержит
+    run_id и статус running, а вызов с этим run_id возвращает число
+    обработанных откликов и лучших кандидатов на текущий момент.
+
+    Args:
+        session: Сессия API HeadHunter
+        vacancy_id: ID вакансии
+        criteria: Критерии оценки кандидатов
+        employer_id: ID работодателя
+        run_id: ID прогона для проверки хода или продолжения прерванного скрининга
+        max_candidates: Максимальное количество откликов
+        batch_size: Количество резюме в одном запросе к LLM
+        results_limit: Количество лучших кандидатов в ответе
+        base_url: Базовый URL API HeadHunter
+
+    Returns:
+        Dict: Итоги или ход прогона
+    """
+    global _background
+    if max_candidates is not None and max_candidates <= SCREENING_SYNC_MAX_CANDIDATES:
+        return screen_vacancy(session, vacancy_id, criteria, employer_id=employer_id, run_id=run_id,
+                              max_candidates=max_candidates, batch_size=batch_size,
+                              results_limit=results_limit, base_url=base_url)
+
+    db = SessionLocal()
+    try:
+        with _active_lock:
+            if run_id and run_id in _active:
+                run = db.query(ScreeningRun).filter(ScreeningRun.id == run_id).first()
+                return {**_run_summary(db, run, results_limit), "status": "running"}
+        if run_id:
+            run = db.query(ScreeningRun).filter(ScreeningRun.id == run_id).first()
+            if not run:
+                raise Exception(f"Прогон скрининга {run_id} не найден")
+            if run.status in ("completed", "partial"):
+                return _run_summary(db, run, results_limit)
+        run = _get_or_create_run(db, run_id, vacancy_id, employer_id, criteria)
+        summary = _run_summary(db, run, results_limit)
+    finally:
+        db.close()
+
+    with _active_lock:
+        if _background is None:
+            _background = ThreadPoolExecutor(max_workers=max(SCREENING_BACKGROUND_WORKERS, 1),
+                                             thread_name_prefix="screening")
+        if summary["run_id"] not in _active:
+            _active[summary["run_id"]] = _background.submit(
+                _run_in_background, session, summary["run_id"], summary["vacancy_id"], criteria, employer_id,
+                max_candidates=max_candidates, batch_size=batch_size, results_limit=results_limit, base_url=base_url
+            )
+    logger.info(f"Скрининг вакансии {vacancy_id} запущен в фоне, прогон {summary['run_id']}")
+    return {**summary, "status": "running"}
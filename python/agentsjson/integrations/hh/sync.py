@@ -0,0 +1,205 @@
+"""
+Синхронизация вакансий и откликов работодателя в локальный индекс.
+
+Каждый проход — полное обновление: API не упорядочивает список откликов по
+времени изменения, поэтому изменения старых откликов могут встретиться на
+любой странице, и остановиться раньше по отметке времени нельзя. Активные
+вакансии загружаются целиком, отклики по каждой вакансии — постранично и
+заменяют сохраненные, так что удаленные в API отклики пропадают из индекса.
+Если список не уместился в SYNC_MAX_NEGOTIATION_PAGES страниц, загруженные
+отклики сохраняются, но вакансия отмечается неполной и ее список не
+отдается из индекса. Чтение списков обслуживается из индекса, пока данные
+свежее SYNC_FRESHNESS_SECONDS. Изменения состояния откликов через API сразу
+записываются в индекс.
+"""
+from typing import TYPE_CHECKING, Any, Dict, Optional
+import logging
+import math
+import time
+import requests
+import metrics
+from config import SYNC_FRESHNESS_SECONDS, SYNC_MAX_NEGOTIATION_PAGES, HH_API_URL
+from .transport import request
+from .screening import iter_negotiations
+from .candidate_index import get_index
+
+if TYPE_CHECKING:
+    from .negotiation_table import NegotiationTable
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = HH_API_URL
+
+VACANCIES_PAGE_SIZE = 50
+
+# Параметры, при которых список можно отдать из локального хранилища
+VACANCY_LOCAL_PARAMS = {"text", "page", "per_page"}
+NEGOTIATION_LOCAL_PARAMS = {"vacancy_id", "page", "per_page"}
+
+# Значения отметки синхронизации: список загружен полностью или обрезан лимитом страниц
+STATE_COMPLETE = "complete"
+STATE_INCOMPLETE = "incomplete"
+
+def _vacancies_key() -> str:
+    return "vacancies"
+
+def _negotiations_key(vacancy_id: str) -> str:
+    return f"negotiations:{vacancy_id}"
+
+def sync_vacancies(session: requests.Session, employer_id: str, base_url: str = BASE_URL) -> list:
+    """Загружает все активные вакансии работодателя и сохраняет их в индекс."""
+    items, page = [], 0
+    while True:
+        response = request(
+            session, "GET", f"{base_url}/employers/{employer_id}/vacancies/active", "get-active-vacancy-list",
+            params={"page": page, "per_page": VACANCIES_PAGE_SIZE}
+        )
+        if response.status_code != 200:
+            raise Exception(f"Ошибка при получении списка вакансий: {response.status_code} - {response.text}")
+        data = response.json()
+        items.extend(data.get("items", []))
+        page += 1
+        if page >= data.get("pages", 0):
+            break
+    index = get_index(employer_id)
+    index.replace_vacancies(items)
+    index.set_state(_vacancies_key(), STATE_COMPLETE)
+    return items
+
+def sync_negotiations(session: requests.Session, employer_id: str, vacancy_id: str,
+                      max_pages: Optional[int] = None, base_url: str = BASE_URL) -> int:
+    """
+    Загружает все отклики по вакансии и заменяет ими сохраненные.
+
+    Если откликов больше, чем помещается в max_pages страниц, загруженные
+    отклики добавляются к сохраненным, а вакансия отмечается неполной.
+
+    Args:
+        session: Сессия API HeadHunter
+        employer_id: ID работодателя
+        vacancy_id: ID вакансии
+        max_pages: Максимальное количество страниц за один проход
+        base_url: Базовый URL API HeadHunter
+
+    Returns:
+        int: Количество сохраненных откликов
+    """
+    index = get_index(employer_id)
+    max_pages = max_pages or SYNC_MAX_NEGOTIATION_PAGES
+    fetched, complete = [], True
+
+    for page, items in enumerate(iter_negotiations(session, vacancy_id, base_url=base_url)):
+        # Страница сверх лимита только подтверждает, что список обрезан
+        if page >= max_pages:
+            complete = False
+            break
+        fetched.extend(items)
+
+    if complete:
+        stored = index.replace_negotiations(vacancy_id, fetched)
+    else:
+        logger.warning(f"Синхронизация откликов по вакансии {vacancy_id} остановлена на {max_pages} страницах")
+        stored = index.ingest_negotiations(fetched, vacancy_id)
+    index.set_state(_negotiations_key(vacancy_id), STATE_COMPLETE if complete else STATE_INCOMPLETE)
+    return stored
+
+def sync_employer(session: requests.Session, employer_id: str, base_url: str = BASE_URL) -> Dict[str, Any]:
+    """Синхронизирует активные вакансии работодателя и отклики на них."""
+    started = time.perf_counter()
+    vacancies = sync_vacancies(session, employer_id, base_url=base_url)
+    negotiations, failed = 0, []
+    for vacancy in vacancies:
+        try:
+            negotiations += sync_negotiations(session, employer_id, str(vacancy["id"]), base_url=base_url)
+        except Exception as e:
+            logger.error(f"Ошибка синхронизации откликов по вакансии {vacancy['id']}: {str(e)}")
+            failed.append(str(vacancy["id"]))
+    return {
+        "employer_id": employer_id,
+        "vacancies": len(vacancies),
+        "negotiations": negotiations,
+        "failed_vacancies": failed,
+        "elapsed": round(time.perf_counter() - started, 3)
+    }
+
+def _is_fresh(state: Optional[Dict[str, Any]]) -> bool:
+    return (state is not None and state["value"] != STATE_INCOMPLETE
+            and time.time() - state["updated_at"] <= SYNC_FRESHNESS_SECONDS)
+
+def _page_params(parameters: Dict[str, Any], default_per_page: int = 20):
+    page = int(parameters.get("page") or 0)
+    per_page = int(parameters.get("per_page") or default_per_page)
+    return page, per_page
+
+def read_vacancies(employer_id: Optional[str], parameters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Возвращает список активных вакансий из локального хранилища.
+
+    Returns:
+        Dict: Ответ в формате API HeadHunter или None, если данные устарели,
+        запрос содержит фильтры, которые локально не поддерживаются, или
+        по тексту ничего не найдено
+    """
+    parameters = {key: value for key, value in (parameters or {}).items() if value not in (None, "")}
+    index = get_index(employer_id) if employer_id else None
+    if index is None:
+        return None
+    if not set(parameters) <= VACANCY_LOCAL_PARAMS or not _is_fresh(index.get_state(_vacancies_key())):
+        metrics.observe_cache("local_store", "vacancies", misses=1)
+        return None
+    items = index.get_vacancies(parameters.get("text"))
+    if not items:
+        metrics.observe_cache("local_store", "vacancies", misses=1)
+        return None
+    metrics.observe_cache("local_store", "vacancies", hits=1)
+    page, per_page = _page_params(parameters)
+    logger.info(f"Список вакансий получен из локального хранилища ({len(items)})")
+    return {
+        "items": items[page * per_page:(page + 1) * per_page],
+        "found": len(items),
+        "page": page,
+        "pages": math.ceil(len(items) / per_page),
+        "per_page": per_page
+    }
+
+def stored_negotiations(employer_id: Optional[str], vacancy_id: str) -> Optional["NegotiationTable"]:
+    """Возвращает таблицу синхронизированных откликов по вакансии или None, если данные устарели."""
+    index = get_index(employer_id) if employer_id else None
+    if index is None:
+        return None
+    if not _is_fresh(index.get_state(_negotiations_key(str(vacancy_id)))):
+        metrics.observe_cache("local_store", "negotiation_table", misses=1)
+        return None
+    metrics.observe_cache("local_store", "negotiation_table", hits=1)
+    # NumPy импортируется при первой оценке кандидатов, а не при запуске приложения
+    from .negotiation_table import NegotiationTable
+    return NegotiationTable.from_items(index.get_negotiation_data(str(vacancy_id)))
+
+def read_negotiations(employer_id: Optional[str], parameters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Возвращает отклики по вакансии из локального хранилища.
+
+    Returns:
+        Dict: Ответ в формате API HeadHunter или None, если данные устарели
+        или запрос содержит фильтры, которые локально не поддерживаются
+    """
+    parameters = {key: value for key, value in (parameters or {}).items() if value not in (None, "")}
+    vacancy_id = parameters.get("vacancy_id")
+    index = get_index(employer_id) if employer_id else None
+    if index is None:
+        return None
+    if (not vacancy_id or not set(parameters) <= NEGOTIATION_LOCAL_PARAMS
+            or not _is_fresh(index.get_state(_negotiations_key(str(vacancy_id))))):
+        metrics.observe_cache("local_store", "negotiations", misses=1)
+        return None
+    metrics.observe_cache("local_store", "negotiations", hits=1)
+    page, per_page = _page_params(parameters)
+    stored = index.get_negotiations(str(vacancy_id), offset=page * per_page, limit=per_page)
+    logger.info(f"Отклики по вакансии {vacancy_id} получены из локального хранилища ({stored['total']})")
+    return {
+        "items": stored["items"],
+        "found": stored["total"],
+        "page": page,
+        "pages": math.ceil(stored["total"] / per_page),
+        "per_page": per_page
+    }
@@ -8,12 +8,65 @@ import json
 import os
 from datetime import datetime
 import re
-from langchain_community.chat_models.gigachat import GigaChat
-from config import GIGACHAT_CREDENTIALS
+import llm
+import metrics
+import prompts
+from config import SCORING_MAX_CANDIDATES, HH_API_URL
+from database.database import SessionLocal
+from .transport import request
+from .screening import start_screening, iter_negotiations
+from .resume_compactor import compact_resume, detail_level, DETAIL_BRIEF
+from .bulk_actions import bulk_change_state
+from .message_templates import generate_messages
+from .candidate_index import get_index, index_negotiations, index_resumes, update_negotiation_states
+from .sync import read_vacancies, read_negotiations, stored_negotiations
+from .analysis_store import resume_fingerprint, criteria_hash, get_analyses, save_analysis
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+# Шаблоны промптов: неизменные инструкции идут первыми, данные кандидата в конце
+ANALYZE_RESUME_PROMPT = prompts.register("analyze_resume", """Проанализируйте следующее резюме и дайте рекомендацию о приглашении на собеседование или отказе.
+Укажите основные причины вашего решения.
+
+Пожалуйста, предоставьте анализ в следующем формате:
+1. Общая оценка кандидата
+2. Сильные стороны
+3. Слабые стороны
+4. Рекомендация (пригласить/отказать)
+5. Обоснование решения
+
+{criteria_line}Резюме:
+{resume}""")
+
+REJECTION_MESSAGE_PROMPT = prompts.register("generate_rejection_message", """Сгенерируйте вежливое сообщение об отказе кандидату на основе следующей информации.
+
+Требования к сообщению:
+1. Вежливый и профессиональный тон
+2. Конструктивная обратная связь
+3. Благодарность за интерес к вакансии
+4. Пожелания успехов в поиске работы
+
+Причина отказа: {rejection_reason}
+Тон сообщения: {message_tone}
+
+Резюме кандидата:
+{resume}""")
+
+INVITATION_MESSAGE_PROMPT = prompts.register("generate_invitation_message", """Сгенерируйте приглашение на собеседование на основе следующей информации.
+
+Требования к сообщению:
+1. Профессиональный и дружелюбный тон
+2. Четкое описание деталей собеседования
+3. Выражение заинтересованности в кандидате
+4. Контактная информация для связи
+
+Детали собеседования: {interview_details}
+Тон сообщения: {message_tone}
+
+Резюме кандидата:
+{resume}""")
+
 class HHAuthConfig(OAuth2AuthConfig):
     """
     Расширенная конфигурация аутентификации для HeadHunter API.
@@ -31,7 +84,7 @@ class Executor(BaseModel):
     - employer_id: The HeadHunter employer ID
     """
     
-    BASE_URL: ClassVar[str] = "https://api.hh.ru"
+    BASE_URL: ClassVar[str] = HH_API_URL
     
     @staticmethod
     def _handle_api_error(response: requests.Response, operation: str) -> None:
@@ -101,13 +154,13 @@ class Executor(BaseModel):
         url = f"{Executor.BASE_URL}/me"
         
         # Логируем URL и параметры запроса
-        logger.info(f"Выполняется запрос GET: {url}")
-        logger.info(f"Параметры запроса: {kwargs}")
+        logger.debug("Выполняется запрос GET: %s", url)
+        logger.debug("Параметры запроса: %s", kwargs)
         
-        response = session.get(url)
+        response = request(session, "GET", url, "get-current-user-info")
         Executor._handle_api_error(response, "получении информации о пользователе")
         
-        logger.info(f"Запрос успешно выполнен: {url}")
+        logger.info("Запрос успешно выполнен: %s", url)
         return response.json()
     
     @staticmethod
@@ -131,18 +184,23 @@ class Executor(BaseModel):
             logger.error("employer_id не указан в конфигурации аутентификации")
             raise Exception("employer_id не указан в конфигурации аутентификации")
         
+        # Синхронизированный список отдаем из локального хранилища, пока он свежий
+        local = read_vacancies(employer_id, parameters)
+        if local is not None:
+            return local
+        
         # Формируем URL для запроса
         url = f"{Executor.BASE_URL}/employers/{employer_id}/vacancies/active"
         
         # Логируем URL и параметры запроса
-        logger.info(f"Выполняется запрос GET: {url}")
-        logger.info(f"Параметры запроса: {parameters}")
+        logger.debug("Выполняется запрос GET: %s", url)
+        logger.debug("Параметры запроса: %s", parameters)
         
         # Выполняем запрос с параметрами
-        response = session.get(url, params=parameters)
+        response = request(session, "GET", url, "get-active-vacancy-list", params=parameters)
         Executor._handle_api_error(response, "получении списка вакансий")
         
-        logger.info(f"Запрос успешно выполнен: {url}")
+        logger.info("Запрос успешно выполнен: %s", url)
         return response.json()
     
     @staticmethod
@@ -170,14 +228,14 @@ class Executor(BaseModel):
         url = f"{Executor.BASE_URL}/vacancies/{vacancy_id}"
         
         # Логируем URL и параметры запроса
-        logger.info(f"Выполняется запрос GET: {url}")
-        logger.info(f"Параметры запроса: {parameters}")
+        logger.debug("Выполняется запрос GET: %s", url)
+        logger.debug("Параметры запроса: %s", parameters)
         
         # Выполняем запрос
-        response = session.get(url)
+        response = request(session, "GET", url, "get-vacancy")
         Executor._handle_api_error(response, "получении информации о вакансии")
         
-        logger.info(f"Запрос успешно выполнен: {url}")
+        logger.info("Запрос успешно выполнен: %s", url)
         return response.json()
 
     @staticmethod
@@ -206,17 +264,22 @@ class Executor(BaseModel):
         Returns:
             Dict: Список откликов с информацией о резюме
         """
+        local = read_negotiations(auth_config.employer_id, parameters)
+        if local is not None:
+            return local
+        
         session = Executor._get_hh_session(auth_config)
         
         # Формируем URL для запроса
         url = f"{Executor.BASE_URL}/negotiations/response"
         
         # Выполняем запрос
-        response = session.get(url, params=parameters)
+        response = request(session, "GET", url, "get-negotiations-list", params=parameters)
         Executor._handle_api_error(response, "получении списка откликов")
         
         # Получаем данные ответа
         data = response.json()
+        index_negotiations(auth_config.employer_id, data, parameters.get('vacancy_id'))
         
         # Создаем директорию для сохранения данных, если она не существует
         data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
@@ -231,7 +294,7 @@ class Executor(BaseModel):
             json.dump(data, f, ensure_ascii=False, indent=2)
         
         logger.info(f"Данные сохранены в файл: {filename}")
-        logger.info(f"Запрос успешно выполнен: {url}")
+        logger.info("Запрос успешно выполнен: %s", url)
         return data
 
     @staticmethod
@@ -268,16 +331,16 @@ class Executor(BaseModel):
                 url = f"{Executor.BASE_URL}/resumes/{rid}"
                 
                 # Логируем URL и параметры запроса
-                logger.info(f"Выполняется запрос GET: {url}")
-                logger.info(f"Параметры запроса: {parameters}")
+                logger.debug("Выполняется запрос GET: %s", url)
+                logger.debug("Параметры запроса: %s", parameters)
                 
                 # Выполняем запрос
-                response = session.get(url, params=parameters)
+                response = request(session, "GET", url, "get-resume", params=parameters)
                 try:
                     Executor._handle_api_error(response, f"получении информации о резюме {rid}")
                     # Добавляем информацию о резюме в результат
                     result.append(response.json())
-                    logger.info(f"Запрос успешно выполнен: {url}")
+                    logger.info("Запрос успешно выполнен: %s", url)
                 except Exception as e:
                     logger.error(f"Ошибка при получении информации о резюме {rid}: {str(e)}")
                     continue
@@ -286,19 +349,137 @@ class Executor(BaseModel):
             url = f"{Executor.BASE_URL}/resumes/{resume_id}"
             
             # Логируем URL и параметры запроса
-            logger.info(f"Выполняется запрос GET: {url}")
-            logger.info(f"Параметры запроса: {parameters}")
+            logger.debug("Выполняется запрос GET: %s", url)
+            logger.debug("Параметры запроса: %s", parameters)
             
             # Выполняем запрос
-            response = session.get(url, params=parameters)
+            response = request(session, "GET", url, "get-resume", params=parameters)
             Executor._handle_api_error(response, "получении информации о резюме")
             
             # Добавляем информацию о резюме в результат
             result.append(response.json())
-            logger.info(f"Запрос успешно выполнен: {url}")
+            logger.info("Запрос успешно выполнен: %s", url)
         
+        index_resumes(auth_config.employer_id, result)
+        return result
+
+    @staticmethod
+    def hh_search_local_candidates(auth_config: HHAuthConfig, parameters: Dict = None, **kwargs):
+        """
+        Ищет кандидатов в локальном индексе ранее полученных откликов и резюме
+        
+        Args:
+            auth_config: HHAuthConfig с токеном доступа
+            parameters: Параметры запроса:
+                - text: Слова для поиска по должности, навыкам и опыту
+                - vacancy_id: ID вакансии
+                - area: Регион
+                - salary_from: Нижняя граница желаемой ЗП
+                - salary_to: Верхняя граница желаемой ЗП
+                - experience_from: Минимальный опыт работы в годах
+                - experience_to: Максимальный опыт работы в годах
+                - age_from: Нижняя граница возраста
+                - age_to: Верхняя граница возраста
+                - order_by: Сортировка (salary/experience/age/updated)
+                - limit: Максимальное количество кандидатов (по умолчанию 20)
+            **kwargs: Дополнительные параметры запроса
+        
+        Returns:
+            Dict: Найденные кандидаты
+        """
+        index = get_index(auth_config.employer_id)
+        if index is None:
+            raise Exception("Локальный индекс кандидатов отключен")
+        
+        def number(name: str):
+            value = parameters.get(name)
+            return float(value) if value not in (None, "") else None
+        
+        result = index.search(
+            text=parameters.get('text'),
+            vacancy_id=parameters.get('vacancy_id'),
+            area=parameters.get('area'),
+            salary_from=number('salary_from'),
+            salary_to=number('salary_to'),
+            experience_from=number('experience_from'),
+            experience_to=number('experience_to'),
+            age_from=number('age_from'),
+            age_to=number('age_to'),
+            order_by=parameters.get('order_by'),
+            limit=int(parameters.get('limit') or 20)
+        )
+        logger.info(f"Локальный поиск кандидатов: найдено {result['total']} за {result['elapsed_ms']} мс")
         return result
 
+    @staticmethod
+    def hh_score_candidates(auth_config: HHAuthConfig, parameters: Dict = None, **kwargs):
+        """
+        Оценивает и ранжирует откликнувшихся кандидатов по критериям вакансии
+        
+        Args:
+            auth_config: HHAuthConfig с токеном доступа
+            parameters: Параметры запроса:
+                - vacancy_id: ID вакансии (обязательный)
+                - salary_from: Нижняя граница желаемой ЗП
+                - salary_to: Верхняя граница желаемой ЗП
+                - salary_currency: Валюта границ ЗП (по умолчанию RUR)
+                - experience: Опыт работы (noExperience/between1And3/between3And6/moreThan6)
+                - experience_from: Минимальный опыт работы в годах
+                - experience_to: Максимальный опыт работы в годах
+                - age_from: Нижняя граница возраста
+                - age_to: Верхняя граница возраста
+                - education_level: Минимальный уровень образования
+                - weights: Веса критериев (salary, experience, age, education)
+                - limit: Количество лучших кандидатов (по умолчанию 20)
+            **kwargs: Дополнительные параметры запроса
+        
+        Returns:
+            Dict: Кандидаты по убыванию оценки
+        """
+        vacancy_id = parameters.get('vacancy_id')
+        if not vacancy_id:
+            logger.error("vacancy_id не указан в параметрах запроса")
+            raise Exception("vacancy_id не указан в параметрах запроса")
+        
+        # NumPy импортируется при первой оценке кандидатов, а не при запуске приложения
+        from .candidate_scoring import score_candidates
+        from .negotiation_table import NegotiationTable
+        
+        # Синхронизированные отклики берем из локального хранилища, иначе загружаем постранично
+        table = stored_negotiations(auth_config.employer_id, vacancy_id)
+        if table is None:
+            session = Executor._get_hh_session(auth_config)
+            
+            def pages():
+                for page in iter_negotiations(session, vacancy_id, max_items=SCORING_MAX_CANDIDATES, base_url=Executor.BASE_URL):
+                    index_negotiations(auth_config.employer_id, {"items": page}, vacancy_id)
+                    yield page
+            
+            table = NegotiationTable.from_pages(pages())
+        
+        def number(name: str):
+            value = parameters.get(name)
+            return float(value) if value not in (None, "") else None
+        
+        weights = parameters.get('weights')
+        if isinstance(weights, str):
+            weights = json.loads(weights)
+        
+        return score_candidates(
+            table,
+            salary_from=number('salary_from'),
+            salary_to=number('salary_to'),
+            salary_currency=parameters.get('salary_currency'),
+            experience_from=number('experience_from'),
+            experience_to=number('experience_to'),
+            experience=parameters.get('experience'),
+            age_from=number('age_from'),
+            age_to=number('age_to'),
+            education_level=parameters.get('education_level'),
+            weights=weights,
+            limit=int(parameters.get('limit') or 20)
+        )
+
     def get_negotiations_and_change_state_flow(self, search_text: str, new_state: str, salary_from: int = None, 
         salary_to: int = None, experience: str = None, education_level: str = None, 
         age_from: int = None, age_to: int = None) -> dict:
@@ -398,55 +579,77 @@ class Executor(BaseModel):
         }
         
         # Логируем URL и параметры запроса
-        logger.info(f"Выполняется запрос PUT: {url}")
-        logger.info(f"Данные запроса: {data}")
+        logger.debug("Выполняется запрос PUT: %s", url)
+        logger.debug("Данные запроса: %s", data)
         
         # Выполняем запрос
-        response = session.put(url, json=data)
+        response = request(session, "PUT", url, "change-negotiation-action", json=data)
         Executor._handle_api_error(response, "изменении состояния отклика")
+        update_negotiation_states(auth_config.employer_id, [negotiation_id], new_state)
         
-        logger.info(f"Запрос успешно выполнен: {url}")
+        logger.info("Запрос успешно выполнен: %s", url)
         return response.json()
 
     @staticmethod
     def hh_analyze_resume(auth_config: HHAuthConfig, parameters: Dict = None, **kwargs):
         """
         Анализирует резюме кандидата и принимает решение о приглашении или отказе с помощью GigaChat
+        
+        Результат сохраняется по отпечатку резюме и хешу критериев, поэтому
+        повторный анализ неизменного резюме по тем же критериям не обращается к LLM.
         """
         try:
             # Получаем данные резюме из параметров
             resume_data = parameters.get('resume_data')
             if not resume_data:
                 raise Exception("Данные резюме не предоставлены")
+            analysis_criteria = parameters.get('analysis_criteria')
 
-            # Формируем промпт для GigaChat
-            prompt = f"""Проанализируйте следующее резюме и дайте рекомендацию о приглашении на собеседование или отказе.
-            Укажите основные причины вашего решения.
+            # get-resume возвращает список резюме
+            resume = resume_data[0] if isinstance(resume_data, list) and len(resume_data) == 1 else resume_data
+            resume_id = resume.get('id') if isinstance(resume, dict) else None
+            fingerprint = resume_fingerprint(resume) if resume_id else None
+            criteria_key = criteria_hash(analysis_criteria, detail_level(parameters.get('detail_level')))
 
-            Резюме:
-            {json.dumps(resume_data, ensure_ascii=False, indent=2)}
+            db = SessionLocal()
+            try:
+                if resume_id:
+                    stored = get_analyses(db, [(resume_id, fingerprint)], criteria_key).get(str(resume_id))
+                    cached = stored is not None and bool(stored.analysis)
+                    metrics.observe_cache("analysis", "analyze_resume", hits=int(cached), misses=int(not cached))
+                    if cached:
+                        logger.info(f"Резюме {resume_id} не изменилось, используется сохраненный анализ")
+                        return {
+                            "analysis": stored.analysis,
+                            "timestamp": stored.created_at.isoformat() if stored.created_at else datetime.now().isoformat(),
+                            "cached": True
+                        }
 
-            Пожалуйста, предоставьте анализ в следующем формате:
-            1. Общая оценка кандидата
-            2. Сильные стороны
-            3. Слабые стороны
-            4. Рекомендация (пригласить/отказать)
-            5. Обоснование решения
-            """
+                # Формируем промпт для GigaChat
+                criteria_line = f"Критерии оценки: {analysis_criteria}\n\n" if analysis_criteria else ""
+                prompt = ANALYZE_RESUME_PROMPT.render(
+                    criteria_line=criteria_line,
+                    resume=compact_resume(resume_data, parameters.get('detail_level'))
+                )
 
-            # Создаем клиент GigaChat
-            giga = GigaChat(credentials=GIGACHAT_CREDENTIALS, verify_ssl_certs=False)
+                # Отправляем запрос к GigaChat
+                response = llm.chat([{"role": "user", "content": prompt}], call_site="analyze_resume", cache=llm.CACHE_EXACT,
+                                    template=ANALYZE_RESUME_PROMPT.name)
 
-            # Отправляем запрос к GigaChat
-            response = giga.chat([{"role": "user", "content": prompt}])
+                if not response or not hasattr(response, 'content'):
+                    raise Exception("Получен пустой ответ от GigaChat API")
 
-            if not response or not hasattr(response, 'content'):
-                raise Exception("Получен пустой ответ от GigaChat API")
+                if resume_id:
+                    save_analysis(db, resume_id, fingerprint, criteria_key, analysis=response.content)
+                    db.commit()
 
-            return {
-                "analysis": response.content,
-                "timestamp": datetime.now().isoformat()
-            }
+                return {
+                    "analysis": response.content,
+                    "timestamp": datetime.now().isoformat(),
+                    "cached": False
+                }
+            finally:
+                db.close()
 
         except Exception as e:
             logger.error(f"Ошибка при анализе резюме через GigaChat: {str(e)}")
@@ -506,6 +709,154 @@ class Executor(BaseModel):
             "state_change": state_change_result
         } 
 
+    @staticmethod
+    def hh_batch_screen_resumes(auth_config: HHAuthConfig, parameters: Dict = None, **kwargs):
+        """
+        Выполняет пакетный скрининг всех откликов по вакансии с помощью GigaChat
+        
+        Args:
+            auth_config: HHAuthConfig с токеном доступа
+            parameters: Параметры запроса:
+                - vacancy_id: ID вакансии (обязательный)
+                - analysis_criteria: Критерии оценки кандидатов
+                - max_candidates: Максимальное количество откликов
+                - batch_size: Количество резюме в одном запросе к LLM
+                - run_id: ID прогона для проверки хода или продолжения прерванного скрининга
+            **kwargs: Дополнительные параметры запроса
+        
+        Returns:
+            Dict: Итоги прогона и решения по лучшим кандидатам; для большого прогона -
+            run_id и статус running (скрининг продолжается в фоне)
+        """
+        vacancy_id = parameters.get('vacancy_id')
+        if not vacancy_id:
+            logger.error("vacancy_id не указан в параметрах запроса")
+            raise Exception("vacancy_id не указан в параметрах запроса")
+        
+        max_candidates = parameters.get('max_candidates')
+        batch_size = parameters.get('batch_size')
+        
+        return start_screening(
+            Executor._get_hh_session(auth_config),
+            vacancy_id=vacancy_id,
+            criteria=parameters.get('analysis_criteria'),
+            employer_id=auth_config.employer_id,
+            run_id=parameters.get('run_id'),
+            max_candidates=int(max_candidates) if max_candidates else None,
+            batch_size=int(batch_size) if batch_size else None,
+            base_url=Executor.BASE_URL
+        )
+
+    @staticmethod
+    def hh_bulk_change_negotiation_state(auth_config: HHAuthConfig, parameters: Dict = None, **kwargs):
+        """
+        Массово изменяет состояние откликов (по умолчанию в режиме предпросмотра)
+        
+        Args:
+            auth_config: HHAuthConfig с токеном доступа
+            parameters: Параметры запроса:
+                - new_state: Новое состояние откликов (обязательный)
+                - negotiation_ids: Список ID откликов
+                - run_id: ID прогона скрининга для отбора откликов по его результатам
+                - score_below: Отбирать кандидатов с оценкой ниже порога
+                - score_above: Отбирать кандидатов с оценкой не ниже порога
+                - should_invite: Отбирать кандидатов с указанным решением скрининга
+                - messages: Сообщения кандидатам по ID откликов
+                - dry_run: Только показать отклики, которые будут изменены (по умолчанию true)
+                - idempotency_key: Ключ идемпотентности для безопасного повтора
+                - max_items: Максимальное количество откликов
+            **kwargs: Дополнительные параметры запроса
+        
+        Returns:
+            Dict: Итоги и результат по каждому отклику
+        """
+        new_state = parameters.get('new_state')
+        if not new_state:
+            logger.error("new_state не указан в параметрах запроса")
+            raise Exception("new_state не указан в параметрах запроса")
+        
+        negotiation_ids = parameters.get('negotiation_ids')
+        if isinstance(negotiation_ids, str):
+            negotiation_ids = [nid.strip() for nid in negotiation_ids.split(',') if nid.strip()]
+        
+        # Необязательные параметры потока приходят как None, поэтому по умолчанию только предпросмотр
+        dry_run = parameters.get('dry_run')
+        if dry_run is None:
+            dry_run = True
+        if isinstance(dry_run, str):
+            dry_run = dry_run.lower() not in ('false', '0', 'no', 'нет')
+        should_invite = parameters.get('should_invite')
+        if isinstance(should_invite, str):
+            should_invite = should_invite.lower() in ('true', '1', 'yes', 'да')
+        
+        return bulk_change_state(
+            Executor._get_hh_session(auth_config),
+            new_state=new_state,
+            negotiation_ids=negotiation_ids,
+            run_id=parameters.get('run_id'),
+            score_below=parameters.get('score_below'),
+            score_above=parameters.get('score_above'),
+            should_invite=should_invite,
+            messages=parameters.get('messages'),
+            dry_run=bool(dry_run),
+            idempotency_key=parameters.get('idempotency_key'),
+            max_items=parameters.get('max_items'),
+            employer_id=auth_config.employer_id,
+            base_url=Executor.BASE_URL
+        )
+
+    @staticmethod
+    def hh_generate_bulk_messages(auth_config: HHAuthConfig, parameters: Dict = None, **kwargs):
+        """
+        Генерирует сообщения об отказе или приглашения для набора откликов по общему шаблону
+        
+        Args:
+            auth_config: HHAuthConfig с токеном доступа
+            parameters: Параметры запроса:
+                - message_kind: Тип сообщения: rejection или invitation (обязательный)
+                - message_detail: Причина отказа или детали собеседования (обязательный)
+                - message_tone: Тон сообщения
+                - run_id: ID прогона скрининга для отбора откликов по его результатам
+                - negotiation_ids: Список ID откликов
+                - vacancy_id: ID вакансии
+                - score_below: Отбирать кандидатов с оценкой ниже порога
+                - score_above: Отбирать кандидатов с оценкой не ниже порога
+                - should_invite: Отбирать кандидатов с указанным решением скрининга
+                - personalize_count: Количество кандидатов для персональных сообщений через LLM
+            **kwargs: Дополнительные параметры запроса
+        
+        Returns:
+            Dict: Шаблон, сообщения по ID откликов и новое состояние откликов
+        """
+        message_kind = parameters.get('message_kind')
+        if not message_kind:
+            logger.error("message_kind не указан в параметрах запроса")
+            raise Exception("message_kind не указан в параметрах запроса")
+        
+        negotiation_ids = parameters.get('negotiation_ids')
+        if isinstance(negotiation_ids, str):
+            negotiation_ids = [nid.strip() for nid in negotiation_ids.split(',') if nid.strip()]
+        should_invite = parameters.get('should_invite')
+        if isinstance(should_invite, str):
+            should_invite = should_invite.lower() in ('true', '1', 'yes', 'да')
+        personalize_count = parameters.get('personalize_count')
+        
+        return generate_messages(
+            Executor._get_hh_session(auth_config),
+            kind=message_kind,
+            detail=parameters.get('message_detail'),
+            vacancy_id=parameters.get('vacancy_id'),
+            message_tone=parameters.get('message_tone') or 'professional',
+            negotiation_ids=negotiation_ids,
+            run_id=parameters.get('run_id'),
+            score_below=parameters.get('score_below'),
+            score_above=parameters.get('score_above'),
+            should_invite=should_invite,
+            personalize_count=int(personalize_count) if personalize_count is not None else None,
+            personalize_ids=parameters.get('personalize_ids'),
+            base_url=Executor.BASE_URL
+        )
+
     @staticmethod
     def hh_generate_rejection_message(auth_config: HHAuthConfig, parameters: Dict = None, **kwargs):
         """
@@ -521,26 +872,15 @@ class Executor(BaseModel):
                 raise Exception("Необходимые параметры не предоставлены")
 
             # Формируем промпт для GigaChat
-            prompt = f"""Сгенерируйте вежливое сообщение об отказе кандидату на основе следующей информации:
-
-            Резюме кандидата:
-            {json.dumps(resume_data, ensure_ascii=False, indent=2)}
-
-            Причина отказа: {rejection_reason}
-            Тон сообщения: {message_tone}
-
-            Требования к сообщению:
-            1. Вежливый и профессиональный тон
-            2. Конструктивная обратная связь
-            3. Благодарность за интерес к вакансии
-            4. Пожелания успехов в поиске работы
-            """
-
-            # Создаем клиент GigaChat
-            giga = GigaChat(credentials=GIGACHAT_CREDENTIALS, verify_ssl_certs=False)
+            prompt = REJECTION_MESSAGE_PROMPT.render(
+                rejection_reason=rejection_reason,
+                message_tone=message_tone,
+                resume=compact_resume(resume_data, parameters.get('detail_level') or DETAIL_BRIEF)
+            )
 
             # Отправляем запрос к GigaChat
-            response = giga.chat([{"role": "user", "content": prompt}])
+            response = llm.chat([{"role": "user", "content": prompt}], call_site="generate_rejection_message", cache=llm.CACHE_EXACT,
+                                template=REJECTION_MESSAGE_PROMPT.name)
 
             if not response or not hasattr(response, 'content'):
                 raise Exception("Получен пустой ответ от GigaChat API")
@@ -625,26 +965,15 @@ class Executor(BaseModel):
                 raise Exception("Необходимые параметры не предоставлены")
 
             # Формируем промпт для GigaChat
-            prompt = f"""Сгенерируйте приглашение на собеседование на основе следующей информации:
-
-            Резюме кандидата:
-            {json.dumps(resume_data, ensure_ascii=False, indent=2)}
-
-            Детали собеседования: {interview_details}
-            Тон сообщения: {message_tone}
-
-            Требования к сообщению:
-            1. Профессиональный и дружелюбный тон
-            2. Четкое описание деталей собеседования
-            3. Выражение заинтересованности в кандидате
-            4. Контактная информация для связи
-            """
-
-            # Создаем клиент GigaChat
-            giga = GigaChat(credentials=GIGACHAT_CREDENTIALS, verify_ssl_certs=False)
+            prompt = INVITATION_MESSAGE_PROMPT.render(
+                interview_details=interview_details,
+                message_tone=message_tone,
+                resume=compact_resume(resume_data, parameters.get('detail_level') or DETAIL_BRIEF)
+            )
 
             # Отправляем запрос к GigaChat
-            response = giga.chat([{"role": "user", "content": prompt}])
+            response = llm.chat([{"role": "user", "content": prompt}], call_site="generate_invitation_message", cache=llm.CACHE_EXACT,
+                                template=INVITATION_MESSAGE_PROMPT.name)
 
             if not response or not hasattr(response, 'content'):
                 raise Exception("Получен пустой ответ от GigaChat API")
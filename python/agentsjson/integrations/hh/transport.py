@@ -0,0 +1,56 @@
+"""
+Единая точка выполнения HTTP-запросов к API HeadHunter.
+
+Все запросы проходят через ограничитель частоты токена сессии, чтобы
+параллельные операции (пакетный скрининг, массовое изменение откликов) не
+превышали лимиты API. Лимиты действуют на пользователя, поэтому у каждого
+токена свой ограничитель и операции одного работодателя не задерживают
+запросы других.
+"""
+from urllib.parse import urlsplit
+import time
+import requests
+import tracing
+import metrics
+from traffic import traffic
+from config import HH_RATE_LIMIT_RPS, HH_RATE_LIMIT_BURST
+from .rate_limiter import RateLimiterPool
+
+rate_limiters = RateLimiterPool(HH_RATE_LIMIT_RPS, HH_RATE_LIMIT_BURST)
+
+def _limiter_key(session: requests.Session) -> str:
+    headers = getattr(session, "headers", None) or {}
+    return headers.get("Authorization") or ""
+
+def request(session: requests.Session, method: str, url: str, operation_id: str, **kwargs) -> requests.Response:
+    """
+    Выполняет HTTP-запрос к API HeadHunter с учетом ограничения частоты для токена сессии.
+    
+    Args:
+        session: Сессия API HeadHunter
+        method: HTTP-метод
+        url: URL запроса
+        operation_id: Идентификатор операции (operationId) для журналирования
+        **kwargs: Параметры requests (params, json и т.д.)
+    
+    Returns:
+        Ответ API
+    """
+    with tracing.span("hh.request", operation_id=operation_id, method=method, path=urlsplit(url).path) as span:
+        started = time.perf_counter()
+        rate_limiters.acquire(_limiter_key(session))
+        span.set_attribute("rate_limit_wait_ms", round((time.perf_counter() - started) * 1000, 1))
+        sent = time.perf_counter()
+        try:
+            response = traffic.hh_request(operation_id, method, url, kwargs, lambda: session.request(method, url, **kwargs))
+        except Exception:
+            metrics.observe_hh(operation_id, time.perf_counter() - sent, None)
+            raise
+        metrics.observe_hh(operation_id, time.perf_counter() - sent, response.status_code)
+        if tracing.enabled():
+            span.set_attributes(
+                status=response.status_code,
+                request_bytes=tracing.payload_size(kwargs.get("json") or kwargs.get("data")),
+                response_bytes=len(response.content or b"") if hasattr(response, "content") else len(response.text or "")
+            )
+        return response
@@ -2,24 +2,36 @@ from datetime import datetime, timedelta
 import uuid
 from typing import Dict, Optional, List
 from loguru import logger
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.models import UserToken, EmployerInfo
-from database.encryption import decrypt_token
+from database.encryption import decrypt_token_async
 import json
 import os
+import threading
 import yaml
 from agentsjson.core.models import Flow
 from agentsjson.core.models.bundle import Bundle
 from agentsjson.core.models.auth import AuthType, OAuth2AuthConfig
 from agentsjson.integrations.hh.tools import HHAuthConfig
 import agentsjson.core as core
-from agentsjson.core.executor import execute_flows
+from agentsjson.core.executor import execute_flows, execute_flow
 from agentsjson.core import ToolFormat
-from langchain_community.chat_models.gigachat import GigaChat
-from config import GIGACHAT_CREDENTIALS
+import llm
+import metrics
+import prompts
+import tracing
+from config import (
+    INTENT_ROUTER_ENABLED, INTENT_ROUTER_TOP_K, INTENT_ROUTER_MIN_SCORE,
+    HISTORY_TOKEN_BUDGET, HISTORY_KEEP_RECENT, HISTORY_TRUNCATE_TOKENS, HISTORY_MAX_MESSAGES
+)
+from intent_router import IntentRouter
+
+# Ядро agentsjson не зависит от модуля трассировки приложения: интервалы потоков передаются через его хук
+core.tracing.set_tracer(tracing)
 
 # Системный промпт для AI
-SYSTEM_PROMPT = """Вы - ИИ-ассистент, который помогает пользователям взаимодействовать с API HeadHunter.
+SYSTEM_PROMPT = prompts.register("system", """Вы - ИИ-ассистент, который помогает пользователям взаимодействовать с API HeadHunter.
 Ваша задача - помогать пользователям управлять вакансиями, откликами и другими функциями работодателя на HeadHunter.
 
 Правила:
@@ -32,7 +44,99 @@ SYSTEM_PROMPT = """Вы - ИИ-ассистент, который помогае
 6. В случае ошибок, объясняйте их простыми словами
 
 ВАЖНО: Используйте API HeadHunter ТОЛЬКО для запросов, связанных с вакансиями, работодателями и другими функциями HeadHunter.
-Для всех остальных запросов давайте прямые текстовые ответы."""
+Для всех остальных запросов давайте прямые текстовые ответы.""", role="system")
+
+# Подсказка маршрутизатора намерений передается в тексте запроса, а не сужением списка инструментов,
+# чтобы префикс запроса (системный промпт и инструменты) не менялся между вызовами
+FLOW_HINT_PROMPT = prompts.register(
+    "flow_hint",
+    "{query}\n\n(Вероятно, подходят инструменты: {flows}. Другие инструменты используйте, только если эти не подходят.)"
+)
+
+# Роли сообщений с результатами вызова инструментов
+TOOL_ROLES = ("tool", "function")
+
+AGENTS_JSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'agents_json', 'hh', 'agents.json')
+
+# Загрузчик libyaml на C разбирает openapi.yaml в несколько раз быстрее чистого Python
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+class LoadedAgent:
+    """
+    Разобранные agents.json и OpenAPI спецификация, общие для всех сессий.
+
+    Bundle, маршрутизатор намерений и описания инструментов не меняются
+    после загрузки, поэтому строятся один раз на процесс, а не на сессию.
+    """
+    __slots__ = ("bundle", "flows", "intent_router", "tools_cache", "mtime")
+
+    def __init__(self, bundle: Bundle, mtime: float):
+        self.bundle = bundle
+        self.flows = bundle.agentsJson.flows
+        self.intent_router = IntentRouter(self.flows, top_k=INTENT_ROUTER_TOP_K, min_score=INTENT_ROUTER_MIN_SCORE)
+        # Описания инструментов по набору потоков и их размер в токенах
+        self.tools_cache: Dict[tuple, tuple] = {}
+        self.mtime = mtime
+
+    def get_tools(self, flows: List[Flow]) -> tuple:
+        return cached_tools(self.tools_cache, flows)
+
+def cached_tools(cache: Dict[tuple, tuple], flows: List[Flow]) -> tuple:
+    """
+    Возвращает описания инструментов для набора потоков и их размер в токенах.
+
+    Описания строятся один раз на набор потоков. execute_query всегда
+    передает полный список потоков, поэтому префикс запроса (системный
+    промпт и инструменты) остается неизменным между вызовами.
+    """
+    key = tuple(flow.id for flow in flows)
+    cached = cache.get(key)
+    metrics.observe_cache("tool_schema", "flows", hits=int(cached is not None), misses=int(cached is None))
+    if cached is None:
+        tools = core.flows_tools(flows, format=ToolFormat.OPENAI)
+        cached = (tools, llm.estimate_tokens(json.dumps(tools, ensure_ascii=False)))
+        cache[key] = cached
+    return cached
+
+_loaded_agents: Dict[str, LoadedAgent] = {}
+_loaded_agents_lock = threading.Lock()
+
+def load_agent(agents_json_path: str = AGENTS_JSON_PATH) -> LoadedAgent:
+    """
+    Загружает agents.json и openapi.yaml из того же каталога.
+
+    Результат кешируется по пути и перечитывается при изменении файлов.
+    Параллельные первые запросы ждут одну загрузку, а не разбирают
+    спецификацию каждый сам.
+    """
+    agents_json_path = os.path.abspath(agents_json_path)
+    openapi_path = os.path.join(os.path.dirname(agents_json_path), 'openapi.yaml')
+    mtime = max(os.path.getmtime(agents_json_path), os.path.getmtime(openapi_path))
+    with _loaded_agents_lock:
+        agent = _loaded_agents.get(agents_json_path)
+        if agent is None or agent.mtime != mtime:
+            with open(agents_json_path, 'r') as f:
+                agents_json_content = json.load(f)
+            with open(openapi_path, 'r') as f:
+                openapi_content = yaml.load(f, Loader=YAML_LOADER)
+
+            bundle_data = {
+                "agentsJson": agents_json_content,
+                "openapi": openapi_content,
+                "operations": {}
+            }
+            agent = LoadedAgent(Bundle.model_validate(bundle_data), mtime)
+            _loaded_agents[agents_json_path] = agent
+            logger.info("agents.json и OpenAPI спецификация успешно загружены")
+        return agent
+
+def _truncate_message(message: Dict[str, str], max_tokens: int) -> Dict[str, str]:
+    """Сокращает текст сообщения до заданного количества токенов."""
+    content = message["content"] or ""
+    if llm.estimate_tokens(content) <= max_tokens:
+        return message
+    limit = int(max_tokens * llm.CHARS_PER_TOKEN)
+    return {**message, "content": content[:limit].rstrip() + " … [сокращено]"}
 
 class UserSession:
     def __init__(self, session_id: str):
@@ -46,89 +150,167 @@ class UserSession:
         self.hh_tokens = None
         self.hh_auth = None
         self.extension_user_id = None
+        self.intent_router = None
+        self.last_prompt_tokens = 0
+        # Описания инструментов по набору потоков и их размер в токенах
+        self._tools_cache: Dict[tuple, tuple] = {}
 
     def add_message(self, role: str, content: str):
         """Добавляет сообщение в историю чата."""
         self.chat_history.append({"role": role, "content": content})
         self.last_activity = datetime.now()
-        if len(self.chat_history) > 10:
-            self.chat_history = [self.chat_history[0]] + self.chat_history[-9:]
+        self.compact_history()
+
+    def history_tokens(self) -> int:
+        """Оценивает размер истории чата в токенах."""
+        return sum(llm.estimate_message_tokens(msg) for msg in self.chat_history)
+
+    def compact_history(self) -> None:
+        """
+        Сжимает историю чата, чтобы она укладывалась в бюджет токенов.
+
+        Системный промпт и последние сообщения сохраняются, устаревшие ответы
+        инструментов удаляются, старые ответы ассистента сокращаются, а если
+        этого недостаточно, самые старые сообщения отбрасываются.
+        """
+        pinned = self.chat_history[:1] if self.chat_history and self.chat_history[0]["role"] == "system" else []
+        messages = self.chat_history[len(pinned):]
+
+        # Ответы инструментов нужны только до следующего сообщения пользователя
+        last_user = max((i for i, msg in enumerate(messages) if msg["role"] == "user"), default=-1)
+        messages = [
+            msg for i, msg in enumerate(messages)
+            if msg["role"] not in TOOL_ROLES or i > last_user
+        ]
+        if len(messages) > HISTORY_MAX_MESSAGES:
+            messages = messages[-HISTORY_MAX_MESSAGES:]
+
+        def total() -> int:
+            return sum(llm.estimate_message_tokens(msg) for msg in pinned + messages)
+
+        # Сначала сокращаем старые ответы ассистента, затем недавние
+        for start in (max(len(messages) - HISTORY_KEEP_RECENT, 0), len(messages)):
+            if total() <= HISTORY_TOKEN_BUDGET:
+                break
+            messages = [
+                _truncate_message(msg, HISTORY_TRUNCATE_TOKENS) if i < start and msg["role"] == "assistant" else msg
+                for i, msg in enumerate(messages)
+            ]
+        # Последнее сообщение сохраняем целиком, даже если оно больше бюджета
+        while total() > HISTORY_TOKEN_BUDGET and len(messages) > 1:
+            messages.pop(0)
+
+        self.chat_history = pinned + messages
 
     def update_history(self, history: List[dict]):
         """Обновляет историю чата новыми сообщениями."""
-        self.chat_history = [{
-            "role": "system",
-            "content": SYSTEM_PROMPT
-        }]
+        self.chat_history = [SYSTEM_PROMPT.message()]
         for msg in history:
             self.add_message(msg.role, msg.content)
 
-    def setup_hh_auth(self, extension_user_id: str, db: Session) -> None:
+    async def setup_hh_auth(self, extension_user_id: str, db: AsyncSession) -> None:
         """Настройка OAuth2 аутентификации HeadHunter из базы данных."""
-        user_token = db.query(UserToken).filter(
-            UserToken.extension_user_id == extension_user_id
-        ).first()
+        user_token = (await db.execute(
+            select(UserToken).where(UserToken.extension_user_id == extension_user_id)
+        )).scalars().first()
         
         if not user_token:
             raise ValueError(f"Токен не найден для extension_user_id: {extension_user_id}")
         
-        employer_info = db.query(EmployerInfo).filter(
-            EmployerInfo.extension_user_id == extension_user_id
-        ).first()
+        employer_info = (await db.execute(
+            select(EmployerInfo).where(EmployerInfo.extension_user_id == extension_user_id)
+        )).scalars().first()
         
         if not employer_info:
             raise ValueError(f"Информация о работодателе не найдена для extension_user_id: {extension_user_id}")
         
         self.hh_tokens = {
-            'access_token': decrypt_token(user_token.encrypted_access_token),
-            'refresh_token': decrypt_token(user_token.encrypted_refresh_token),
+            'access_token': await decrypt_token_async(user_token.encrypted_access_token),
+            'refresh_token': await decrypt_token_async(user_token.encrypted_refresh_token),
             'employer_id': employer_info.employer_id
         }
+        self.extension_user_id = extension_user_id
         logger.info("Учетные данные API HeadHunter успешно загружены из базы данных")
 
-    def load_agents_json(self, agents_json_path: str) -> None:
+    def load_agents_json(self, agents_json_path: str = AGENTS_JSON_PATH) -> None:
         """Загрузка файла agents.json и OpenAPI спецификации."""
         try:
-            with open(agents_json_path, 'r') as f:
-                agents_json_content = json.load(f)
-            
-            openapi_path = os.path.join(os.path.dirname(agents_json_path), 'openapi.yaml')
-            with open(openapi_path, 'r') as f:
-                openapi_content = yaml.safe_load(f)
-            
-            bundle_data = {
-                "agentsJson": agents_json_content,
-                "openapi": openapi_content,
-                "operations": {}
-            }
-            
-            self.bundle = Bundle.model_validate(bundle_data)
-            self.flows = self.bundle.agentsJson.flows
-            logger.info("agents.json и OpenAPI спецификация успешно загружены")
+            agent = load_agent(agents_json_path)
+            self.bundle = agent.bundle
+            self.flows = agent.flows
+            self.intent_router = agent.intent_router
+            self._tools_cache = agent.tools_cache
         except Exception as e:
             logger.error(f"Ошибка загрузки agents.json: {str(e)}")
             raise
 
+    def _build_auth(self) -> HHAuthConfig:
+        """Формирует конфигурацию аутентификации HeadHunter из загруженных токенов."""
+        return HHAuthConfig(
+            type=AuthType.OAUTH2,
+            token=self.hh_tokens['access_token'],
+            refresh_token=self.hh_tokens.get('refresh_token'),
+            scopes=set(),
+            employer_id=self.hh_tokens.get('employer_id')
+        )
+
+    def _get_tools(self, flows: List[Flow]) -> tuple:
+        """Возвращает описания инструментов для набора потоков и их размер в токенах."""
+        return cached_tools(self._tools_cache, flows)
+
     def execute_query(self, query: str, flow_hint: Optional[List[str]] = None) -> Dict:
         """Выполнение запроса на естественном языке к API HeadHunter."""
         try:
             if not self.bundle or not self.flows:
                 raise Exception("Агент не инициализирован")
+            self.last_prompt_tokens = 0
+
+            if flow_hint is None and INTENT_ROUTER_ENABLED and self.intent_router:
+                with tracing.span("intent_router") as span:
+                    decision = self.intent_router.route(query)
+                    span.set_attribute("flow_id", decision.flow_id)
+                if decision.flow_id:
+                    # Очевидный запрос выполняем без обращения к LLM
+                    flow = next(f for f in self.flows if f.id == decision.flow_id)
+                    try:
+                        return execute_flow(
+                            bundle=self.bundle,
+                            flow=flow,
+                            arguments={"parameters": decision.parameters},
+                            auth=self._build_auth()
+                        )
+                    except Exception as e:
+                        logger.error(f"Ошибка при выполнении flow {flow.id}: {str(e)}")
+                        raise Exception(f"Ошибка при выполнении flows: {str(e)}")
+                flow_hint = decision.candidates or None
 
             flows = self.flows
+            content = query
             if flow_hint:
-                flows = [f for f in self.flows if f.name in flow_hint]
+                content = FLOW_HINT_PROMPT.render(
+                    query=query, flows=", ".join(f.id for f in self.flows if f.id in flow_hint)
+                )
 
-            giga = GigaChat(credentials=GIGACHAT_CREDENTIALS, verify_ssl_certs=False)
+            messages = self.chat_history + [{"role": "user", "content": content}]
+            tools, tools_tokens = self._get_tools(flows)
+            history_tokens = sum(llm.estimate_message_tokens(msg) for msg in messages)
+            self.last_prompt_tokens = history_tokens + tools_tokens
+            logger.info(
+                f"Размер промпта: ~{self.last_prompt_tokens} токенов "
+                f"(история: {history_tokens}, инструменты: {tools_tokens}, сообщений: {len(messages)})"
+            )
 
             try:
-                response = giga.chat(
-                    messages=self.chat_history + [{"role": "user", "content": query}],
-                    tools=core.flows_tools(flows, format=ToolFormat.OPENAI),
+                response = llm.chat(
+                    messages,
+                    call_site="execute_query",
+                    cache=llm.CACHE_EXACT,
+                    template=SYSTEM_PROMPT.name,
+                    tools=tools,
                     temperature=0.7
                 )
             except Exception as e:
-                logger.error(f"Ошибка при вызове GigaChat API: {str(e)}", exc_info=True)
+                logger.error(f"Ошибка при вызове GigaChat API: {str(e)}")
                 raise Exception(f"Ошибка при вызове GigaChat API: {str(e)}")
 
             if not response or not hasattr(response, 'content'):
@@ -143,29 +325,21 @@ class UserSession:
                 self.add_message("assistant", response_content)
                 return {"text_response": response_content}
 
-            auth = HHAuthConfig(
-                type=AuthType.OAUTH2,
-                token=self.hh_tokens['access_token'],
-                refresh_token=self.hh_tokens.get('refresh_token'),
-                scopes=set(),
-                employer_id=self.hh_tokens.get('employer_id')
-            )
-
             try:
                 result = execute_flows(
                     response,
                     format=ToolFormat.OPENAI,
                     bundle=self.bundle,
                     flows=flows,
-                    auth=auth
+                    auth=self._build_auth()
                 )
                 return result
             except Exception as e:
-                logger.error(f"Ошибка при выполнении flows: {str(e)}", exc_info=True)
+                logger.error(f"Ошибка при выполнении flows: {str(e)}")
                 raise Exception(f"Ошибка при выполнении flows: {str(e)}")
 
         except Exception as e:
-            logger.error(f"Ошибка при выполнении запроса: {str(e)}", exc_info=True)
+            logger.error(f"Ошибка при выполнении запроса: {str(e)}")
             raise
 
 class SessionManager:
@@ -189,6 +363,11 @@ class SessionManager:
             return session
         return None
 
+    def active_count(self) -> int:
+        """Возвращает количество сессий, срок действия которых не истек."""
+        now = datetime.now()
+        return sum(1 for session in list(self.sessions.values()) if now - session.last_activity < self.session_timeout)
+
     def clear_session(self, session_id: str):
         """Удаляет сессию из системы."""
         if session_id in self.sessions:
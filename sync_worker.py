@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from loguru import logger
+from sqlalchemy import select
+from database.database import AsyncSessionLocal
+from database.models import UserToken, EmployerInfo
+from database.encryption import decrypt_token_async
+from agentsjson.integrations.hh.tools import Executor
+from agentsjson.integrations.hh.sync import sync_employer
+from config import SYNC_INTERVAL_SECONDS, SYNC_CONCURRENCY
+import tracing
+
+class SyncWorker:
+    """
+    Фоновая синхронизация вакансий и откликов авторизованных работодателей.
+
+    Каждые SYNC_INTERVAL_SECONDS загружает список работодателей с токенами и
+    синхронизирует их параллельно, не более SYNC_CONCURRENCY одновременно.
+    Запросы к API выполняются в потоках и проходят через общий ограничитель
+    частоты запросов, поэтому синхронизация не превышает лимиты HeadHunter.
+    """
+    def __init__(self, interval: int = SYNC_INTERVAL_SECONDS, concurrency: int = SYNC_CONCURRENCY):
+        self.interval = interval
+        self._semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self._task: Optional[asyncio.Task] = None
+        self._status: Dict[str, Dict[str, Any]] = {}
+
+    async def _load_employers(self) -> Dict[str, str]:
+        """Возвращает токен доступа для каждого работодателя."""
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(EmployerInfo.employer_id, UserToken.encrypted_access_token)
+                .join(UserToken, UserToken.extension_user_id == EmployerInfo.extension_user_id)
+                .order_by(UserToken.updated_at.desc())
+            )).all()
+        employers = {}
+        for employer_id, encrypted_token in rows:
+            # Для работодателя с несколькими менеджерами используем последний обновленный токен
+            if employer_id not in employers:
+                employers[employer_id] = await decrypt_token_async(encrypted_token)
+        return employers
+
+    async def sync_one(self, employer_id: str, token: str) -> None:
+        """Синхронизирует одного работодателя."""
+        async with self._semaphore:
+            started = time.time()
+            try:
+                with tracing.span("sync", employer_id=employer_id):
+                    result = await asyncio.to_thread(sync_employer, Executor._get_session(token), employer_id)
+                self._status[employer_id] = {"ok": True, "synced_at": started, **result}
+                logger.info(
+                    f"Синхронизация работодателя {employer_id}: {result['vacancies']} вакансий, "
+                    f"{result['negotiations']} откликов за {result['elapsed']} с"
+                )
+            except Exception as e:
+                self._status[employer_id] = {"ok": False, "synced_at": started, "error": str(e)}
+                logger.error(f"Ошибка синхронизации работодателя {employer_id}: {str(e)}")
+
+    async def run_once(self) -> None:
+        """Выполняет один проход синхронизации по всем работодателям."""
+        employers = await self._load_employers()
+        await asyncio.gather(*(self.sync_one(employer_id, token) for employer_id, token in employers.items()))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка фоновой синхронизации: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            logger.info(f"Запуск фоновой синхронизации с интервалом {self.interval} с")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Возвращает результат последней синхронизации по каждому работодателю."""
+        return dict(self._status)
+
+sync_worker = SyncWorker()
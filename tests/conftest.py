@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "python")]
+
+# Модули приложения читают настройки при импорте; тестам внешние сервисы не нужны
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("TRACING_EXPORTER", "none")
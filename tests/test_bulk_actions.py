@@ -0,0 +1,57 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from database.database import engine
+from database.models import Base
+from agentsjson.integrations.hh.bulk_actions import bulk_change_state
+
+class FakeSession:
+    """Сессия API HeadHunter, запоминающая отправленные изменения состояния."""
+    def __init__(self):
+        self.headers = {"Authorization": "Bearer test"}
+        self.puts = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.puts.append((method, url.rsplit("/", 1)[-1], kwargs.get("json")))
+        return SimpleNamespace(status_code=204, text="", content=b"")
+
+@pytest.fixture(autouse=True)
+def tables():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+def test_dry_run_sends_nothing():
+    session = FakeSession()
+    result = bulk_change_state(session, "discard", negotiation_ids=["1", "2"])
+    assert result["dry_run"] is True
+    assert result["planned"] == 2
+    assert session.puts == []
+
+def test_same_key_returns_stored_outcomes_without_second_put():
+    session = FakeSession()
+    first = bulk_change_state(session, "discard", negotiation_ids=["1", "2"], dry_run=False)
+    assert first["succeeded"] == 2
+    assert sorted(nid for _, nid, _ in session.puts) == ["1", "2"]
+    assert all(method == "PUT" and data == {"state": "discard"} for method, _, data in session.puts)
+
+    second = bulk_change_state(session, "discard", negotiation_ids=["2", "1"], dry_run=False)
+    assert second["idempotency_key"] == first["idempotency_key"]
+    assert second["duplicates"] == 2 and second["succeeded"] == 0
+    assert len(session.puts) == 2
+
+def test_failed_change_is_retried():
+    session = FakeSession()
+    responses = iter([SimpleNamespace(status_code=500, text="error", content=b"")])
+    original = session.request
+    session.request = lambda method, url, **kwargs: next(responses, None) or original(method, url, **kwargs)
+
+    first = bulk_change_state(session, "invitation", negotiation_ids=["7"], dry_run=False)
+    assert first["failed"] == 1
+    second = bulk_change_state(session, "invitation", negotiation_ids=["7"], dry_run=False)
+    assert second["succeeded"] == 1
+    assert len(session.puts) == 1
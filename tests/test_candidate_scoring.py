@@ -0,0 +1,30 @@
+from agentsjson.integrations.hh.candidate_scoring import MISSING_SCORE, score_candidates
+
+def negotiation(i, salary=None):
+    resume = {"id": f"r{i}", "title": "Разработчик"}
+    if salary is not None:
+        resume["salary"] = {"amount": salary, "currency": "RUR"}
+    return {"id": str(i), "resume": resume}
+
+def test_limit_caps_ties_without_criteria():
+    result = score_candidates([negotiation(i) for i in range(10)], limit=3)
+    assert [item["negotiation_id"] for item in result["items"]] == ["0", "1", "2"]
+    assert result["ties_omitted"] == 7
+
+def test_limit_keeps_best_scores():
+    items = [negotiation(i, salary) for i, salary in enumerate([500000, 100000, 120000, 100000, 90000])]
+    result = score_candidates(items, salary_to=120000, limit=2)
+    assert len(result["items"]) == 2
+    assert all(item["score"] == 1.0 for item in result["items"])
+    assert result["ties_omitted"] == 2
+
+def test_salary_in_other_currency_scored_as_missing():
+    items = [negotiation(0, 100000), negotiation(1, 100000), negotiation(2)]
+    items[1]["resume"]["salary"]["currency"] = "USD"
+    result = score_candidates(items, salary_to=120000)
+    scores = {item["negotiation_id"]: item["criteria"]["salary"] for item in result["items"]}
+    assert scores == {"0": 1.0, "1": MISSING_SCORE, "2": MISSING_SCORE}
+
+    result = score_candidates(items, salary_to=2000, salary_currency="USD")
+    scores = {item["negotiation_id"]: item["criteria"]["salary"] for item in result["items"]}
+    assert scores["0"] == MISSING_SCORE and scores["1"] == 0.0
@@ -0,0 +1,55 @@
+import json
+import os
+
+import pytest
+
+from agentsjson.core.models import Flow
+from intent_router import IntentRouter
+
+AGENTS_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents_json", "hh", "agents.json")
+
+@pytest.fixture(scope="module")
+def router():
+    with open(AGENTS_JSON, encoding="utf-8") as f:
+        flows = [Flow.model_validate(flow) for flow in json.load(f)["flows"]]
+    return IntentRouter(flows)
+
+# Запросы на чтение, которые вызывают поток напрямую
+DIRECT = [
+    ("кто я", "get_current_user_info_flow", {}),
+    ("вакансия 1234567", "get_vacancy_info_flow", {"vacancy_id": "1234567"}),
+    ("покажи вакансию №1234567", "get_vacancy_info_flow", {"vacancy_id": "1234567"}),
+    ("открой информацию о вакансии 1234567", "get_vacancy_info_flow", {"vacancy_id": "1234567"}),
+    ("отклики на вакансию Python разработчик", "get_negotiations_by_vacancy_flow", {"search_text": "Python разработчик"}),
+    ("покажи отклики на вакансию Python", "get_negotiations_by_vacancy_flow", {"search_text": "Python"}),
+    ("выведи список откликов по вакансии «Аналитик»", "get_negotiations_by_vacancy_flow", {"search_text": "Аналитик"}),
+    ("расскажи о вакансии Python разработчик", "search_and_get_vacancy_info_flow", {"search_text": "Python разработчик"}),
+    ("мои вакансии", "get_active_vacancies_flow", {}),
+    ("покажите активные вакансии", "get_active_vacancies_flow", {}),
+]
+
+# Запросы, которые должна решать LLM: изменяющие действия, посторонние глаголы, фильтры
+TO_LLM = [
+    "закрой вакансию 1234567",
+    "пригласи всех кандидатов на вакансию 123456",
+    "отклоните отклики на вакансию Python",
+    "пригласите отклики на вакансию Python",
+    "откажи откликам на вакансию Python",
+    "переведи отклики на вакансию Python в интервью",
+    "удали вакансию 1234567",
+    "измени вакансию 1234567",
+    "обработай отклики на вакансию Python",
+    "кандидаты с опытом от 3 лет на вакансию 1234567",
+    "отклики на вакансию Python с зарплатой до 200000",
+    "архивируй мои вакансии",
+]
+
+@pytest.mark.parametrize("query, flow_id, parameters", DIRECT)
+def test_direct_route(router, query, flow_id, parameters):
+    decision = router.route(query)
+    assert decision.flow_id == flow_id
+    assert decision.parameters == parameters
+
+@pytest.mark.parametrize("query", TO_LLM)
+def test_llm_route(router, query):
+    assert router.route(query).flow_id is None
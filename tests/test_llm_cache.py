@@ -0,0 +1,42 @@
+import json
+import sqlite3
+from types import SimpleNamespace
+
+from llm_cache import LLMCache
+
+def make_response(content="ответ", tool_calls=None):
+    message = SimpleNamespace(content=content, tool_calls=tool_calls or [])
+    return SimpleNamespace(content=content, tool_calls=message.tool_calls, choices=[SimpleNamespace(message=message)],
+                           usage_metadata={"input_tokens": 10, "output_tokens": 2})
+
+def test_key_keeps_case():
+    assert LLMCache.make_key("site", [{"role": "user", "content": "ID abc"}]) != \
+        LLMCache.make_key("site", [{"role": "user", "content": "id ABC"}])
+    assert LLMCache.make_key("site", [{"role": "user", "content": "a  b\n"}]) == \
+        LLMCache.make_key("site", [{"role": "user", "content": "a b"}])
+
+def test_stores_json_and_restores_response(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    call = SimpleNamespace(id="1", function=SimpleNamespace(name="flow", arguments='{"a": 1}'))
+    messages = [{"role": "user", "content": "вопрос"}]
+    LLMCache(path=path).set("site", messages, make_response(tool_calls=[call]))
+
+    value, = sqlite3.connect(path).execute("SELECT value FROM llm_responses").fetchone()
+    assert json.loads(value)["tool_calls"] == [{"id": "1", "name": "flow", "arguments": '{"a": 1}'}]
+
+    # Новый экземпляр читает запись с диска
+    cached = LLMCache(path=path).get("site", messages)
+    assert cached.content == "ответ"
+    assert cached.choices[0].message.tool_calls[0].function.name == "flow"
+    assert cached.usage_metadata == {"input_tokens": 10, "output_tokens": 2}
+
+def test_approximate_match_requires_same_exact_part():
+    cache = LLMCache(approx_threshold=0.5)
+    prompt = "покажи отклики по вакансии python разработчик в москве пожалуйста"
+    cache.set("formatter", [{"role": "user", "content": prompt}], make_response("ответ A"),
+              approximate=True, exact="user-a\n{\"found\": 3}")
+    similar = [{"role": "user", "content": prompt + " сейчас"}]
+
+    assert cache.get("formatter", similar, approximate=True, exact="user-a\n{\"found\": 3}").content == "ответ A"
+    assert cache.get("formatter", similar, approximate=True, exact="user-a\n{\"found\": 4}") is None
+    assert cache.get("formatter", similar, approximate=True, exact="user-b\n{\"found\": 3}") is None
@@ -0,0 +1,36 @@
+import pytest
+
+from agentsjson.core.loader import apply_overrides
+from agentsjson.core.models.schema import Override
+
+def spec():
+    return {"paths": {"/vacancies": {"get": {
+        "operationId": "get-vacancies",
+        "summary": "Вакансии",
+        "parameters": [{"name": "page", "required": False}],
+        "responses": {200: {"description": "OK"}}
+    }}}}
+
+def override(field_path, value, source_id="hh", operation_id="get-vacancies"):
+    return Override(sourceId=source_id, operationId=operation_id, fieldPath=field_path, value=value)
+
+def test_applies_overrides_by_operation():
+    result = apply_overrides(spec(), [
+        override("parameters.0.required", True),
+        override("responses.200.description", "Список"),
+    ], source_id="hh")
+    operation = result["paths"]["/vacancies"]["get"]
+    assert operation["parameters"][0]["required"] is True
+    assert operation["responses"][200]["description"] == "Список"
+
+def test_skips_overrides_for_other_sources():
+    result = apply_overrides(spec(), [
+        override("summary", "Другой источник", source_id="other"),
+        # Операция другого источника не проверяется на существование
+        override("summary", "x", source_id="other", operation_id="unknown"),
+    ], source_id="hh")
+    assert result["paths"]["/vacancies"]["get"]["summary"] == "Вакансии"
+
+def test_rejects_missing_path():
+    with pytest.raises(ValueError):
+        apply_overrides(spec(), [override("requestBody.content", {})], source_id="hh")
@@ -0,0 +1,30 @@
+import metrics
+
+def test_application_caches_reported_with_hit_ratio(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    monkeypatch.setattr(metrics.CACHE_REQUESTS, "_values", {})
+    metrics.observe_cache("analysis", "screening", hits=3, misses=1)
+    metrics.observe_cache("local_store", "vacancies", misses=2)
+
+    collected = {name: samples for name, _, _, samples in metrics.collect_caches()}
+    requests = collected["cache_requests_total"]
+    assert ({"cache": "analysis", "namespace": "screening", "result": "hit"}, 3) in requests
+    assert ({"cache": "local_store", "namespace": "vacancies", "result": "miss"}, 2) in requests
+    ratios = collected["cache_hit_ratio"]
+    assert ({"cache": "analysis", "namespace": "screening"}, 0.75) in ratios
+    assert ({"cache": "local_store", "namespace": "vacancies"}, 0) in ratios
+
+def test_counters_disabled_by_default():
+    metrics.observe_cache("tool_schema", "flows", hits=1)
+    assert not [labels for labels, _ in metrics.CACHE_REQUESTS.samples() if labels["cache"] == "tool_schema"]
+
+def test_prompt_stats_exposed(monkeypatch):
+    import llm
+    monkeypatch.setattr(llm, "prompt_stats", lambda: {"system": {
+        "calls": 3, "cached": 1, "prompt_tokens": 300, "completion_tokens": 30,
+        "avg_prompt_tokens": 100.0, "avg_latency_ms": 250.0, "max_latency_ms": 500.0
+    }})
+    text = metrics.render()
+    assert 'hh_assistant_prompt_calls_total{template="system",cached="true"} 1' in text
+    assert 'hh_assistant_prompt_tokens_total{template="system",kind="prompt"} 300' in text
+    assert 'hh_assistant_prompt_latency_max_seconds{template="system"} 0.5' in text
@@ -0,0 +1,17 @@
+from agentsjson.integrations.hh.rate_limiter import RateLimiterPool
+
+def test_keys_have_separate_buckets():
+    pool = RateLimiterPool(rate=1, burst=1)
+    assert pool.acquire("employer-a") == 0
+    # Исчерпанный лимит одного токена не задерживает другой
+    assert pool.acquire("employer-b") == 0
+    assert pool.get("employer-a") is pool.get("employer-a")
+
+def test_evicts_least_recently_used():
+    pool = RateLimiterPool(rate=1, burst=1, max_keys=2)
+    first = pool.get("a")
+    pool.get("b")
+    pool.get("a")
+    pool.get("c")
+    assert pool.get("a") is first
+    assert len(pool._limiters) == 2 and "b" not in pool._limiters
@@ -0,0 +1,38 @@
+import pytest
+
+from agentsjson.integrations.hh import sync
+from agentsjson.integrations.hh.candidate_index import CandidateIndex
+
+def negotiation(nid):
+    return {"id": nid, "created_at": f"2026-01-0{nid}", "state": {"id": "response"}, "resume": {"id": f"r{nid}"}}
+
+@pytest.fixture
+def index(monkeypatch):
+    index = CandidateIndex(":memory:")
+    monkeypatch.setattr(sync, "get_index", lambda employer_id: index)
+    return index
+
+def serve(monkeypatch, pages):
+    monkeypatch.setattr(sync, "iter_negotiations", lambda session, vacancy_id, base_url=None: iter(pages))
+
+def test_full_pass_removes_negotiations_missing_from_api(index, monkeypatch):
+    serve(monkeypatch, [[negotiation("1"), negotiation("2")], [negotiation("3")]])
+    assert sync.sync_negotiations(None, "e1", "v1") == 3
+    serve(monkeypatch, [[negotiation("1"), negotiation("3")]])
+    assert sync.sync_negotiations(None, "e1", "v1") == 2
+
+    result = sync.read_negotiations("e1", {"vacancy_id": "v1"})
+    assert result["found"] == 2
+    assert sorted(item["id"] for item in result["items"]) == ["1", "3"]
+
+def test_truncated_list_is_not_served_from_index(index, monkeypatch):
+    serve(monkeypatch, [[negotiation("1")], [negotiation("2")], [negotiation("3")]])
+    assert sync.sync_negotiations(None, "e1", "v1", max_pages=2) == 2
+    assert index.get_state("negotiations:v1")["value"] == sync.STATE_INCOMPLETE
+    assert sync.read_negotiations("e1", {"vacancy_id": "v1"}) is None
+    assert sync.stored_negotiations("e1", "v1") is None
+
+def test_list_fitting_page_limit_is_complete(index, monkeypatch):
+    serve(monkeypatch, [[negotiation("1")], [negotiation("2")]])
+    sync.sync_negotiations(None, "e1", "v1", max_pages=2)
+    assert sync.read_negotiations("e1", {"vacancy_id": "v1"})["found"] == 2
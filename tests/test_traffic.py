@@ -0,0 +1,43 @@
+import json
+from types import SimpleNamespace
+
+from traffic import Traffic, MODE_RECORD, MASK
+
+def hh_response(body):
+    return SimpleNamespace(status_code=200, text=json.dumps(body, ensure_ascii=False),
+                           headers={"Content-Type": "application/json"})
+
+def llm_response(content, arguments):
+    call = SimpleNamespace(id="1", function=SimpleNamespace(name="flow", arguments=arguments))
+    message = SimpleNamespace(content=content, tool_calls=[call])
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage_metadata=None)
+
+def test_llm_text_redacts_names_seen_in_hh_responses(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    traffic = Traffic(mode=MODE_RECORD, path=str(path))
+    resume = {"id": "r1", "first_name": "Иван", "last_name": "Петров", "title": "Разработчик"}
+    traffic.hh_request("get-resume", "GET", "http://hh/resumes/r1", {}, lambda: hh_response(resume))
+    traffic.llm_chat("formatter", [], {}, lambda: llm_response(
+        "Кандидат Петров Иван подходит, Ивановский - нет", '{"comment": "Пригласить Петрова Ивана"}'
+    ))
+    traffic.close()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert records[0]["body"].count(MASK) == 2
+    response = records[1]["response"]
+    assert response["content"] == f"Кандидат {MASK} {MASK} подходит, Ивановский - нет"
+    # Падежные формы имен тоже заменяются, другие слова с той же основой - нет
+    assert response["tool_calls"][0]["arguments"] == f'{{"comment": "Пригласить {MASK} {MASK}"}}'
+
+def test_name_forms_are_redacted(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    traffic = Traffic(mode=MODE_RECORD, path=str(path))
+    resume = {"id": "r1", "first_name": "Мария", "last_name": "Ли", "middle_name": "Петровна", "birth_date": "1990-05-01"}
+    traffic.hh_request("get-resume", "GET", "http://hh/resumes/r1", {}, lambda: hh_response(resume))
+    traffic.llm_chat("formatter", [], {}, lambda: llm_response(
+        "Марии Ли, Марией Петровной (1990-05-01); Мариинский", None
+    ))
+    traffic.close()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert records[1]["response"]["content"] == f"{MASK} {MASK}, {MASK} {MASK} ({MASK}); Мариинский"
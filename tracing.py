@@ -0,0 +1,186 @@
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from loguru import logger
+import logging_setup
+from config import TRACING_EXPORTER, TRACE_SLOW_MS
+
+# Экспортеры: none - трассировка отключена, log - дерево медленных запросов в лог,
+# otel - спаны передаются в OpenTelemetry API (SDK и экспортер настраиваются отдельно)
+EXPORTER_NONE = "none"
+EXPORTER_LOG = "log"
+EXPORTER_OTEL = "otel"
+
+class Span:
+    """Интервал выполнения операции с атрибутами и вложенными интервалами."""
+    __slots__ = ("name", "attributes", "parent", "children", "start", "end", "error", "_otel")
+
+    def __init__(self, name: str, attributes: Dict[str, Any], parent: Optional["Span"]):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.children: List[Span] = []
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self._otel = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+        if self._otel is not None:
+            self._otel.set_attribute(key, _otel_value(value))
+
+    def set_attributes(self, **attributes: Any) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+class _NoopSpan:
+    """Заглушка интервала при отключенной трассировке."""
+    __slots__ = ()
+    name = ""
+    attributes: Dict[str, Any] = {}
+    duration_ms = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_exporter = TRACING_EXPORTER
+_tracer = None
+
+def _otel_value(value: Any) -> Any:
+    """Приводит значение атрибута к типу, допустимому в OpenTelemetry."""
+    return value if isinstance(value, (str, bool, int, float)) else str(value)
+
+def _get_tracer():
+    global _tracer, _exporter
+    if _tracer is None:
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            logger.warning("Пакет opentelemetry-api не установлен, трассировка выводится в лог")
+            _exporter = EXPORTER_LOG
+            return None
+        _tracer = trace.get_tracer("hh-assistant")
+    return _tracer
+
+def _start_otel(span: Span) -> None:
+    tracer = _get_tracer()
+    if tracer is None:
+        return
+    from opentelemetry import trace
+    parent = span.parent._otel if span.parent is not None else None
+    context = trace.set_span_in_context(parent) if parent is not None else None
+    span._otel = tracer.start_span(
+        span.name, context=context,
+        attributes={key: _otel_value(value) for key, value in span.attributes.items() if value is not None}
+    )
+
+def _finish_otel(span: Span, error: Optional[BaseException]) -> None:
+    if span._otel is None:
+        return
+    if error is not None:
+        from opentelemetry.trace import Status, StatusCode
+        span._otel.record_exception(error)
+        span._otel.set_status(Status(StatusCode.ERROR, str(error)))
+    span._otel.end()
+
+def _format_tree(span: Span, depth: int = 0) -> List[str]:
+    attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items() if value is not None)
+    line = f"{'  ' * depth}{span.name} {span.duration_ms:.1f} мс"
+    if attributes:
+        line += f" [{attributes}]"
+    if span.error:
+        line += f" ОШИБКА: {span.error}"
+    lines = [line]
+    for child in span.children:
+        lines.extend(_format_tree(child, depth + 1))
+    return lines
+
+def _export(span: Span) -> None:
+    """Выводит завершенную трассу в лог: медленные - предупреждением, остальные - при уровне DEBUG."""
+    if _exporter == EXPORTER_LOG:
+        # Дерево строится только для записей, которые попадут в лог
+        if span.duration_ms >= TRACE_SLOW_MS:
+            tree = "\n".join(_format_tree(span))
+            logger.warning(f"Медленная операция {span.name}: {span.duration_ms:.0f} мс\n{tree}")
+        elif logging_setup.enabled_for(__name__, "DEBUG"):
+            tree = "\n".join(_format_tree(span))
+            logger.debug(f"Трасса {span.name}:\n{tree}")
+
+def enabled() -> bool:
+    return _exporter != EXPORTER_NONE
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Открывает интервал трассировки.
+
+    Интервал становится дочерним для текущего интервала в контексте
+    выполнения, поэтому вложенные вызовы образуют дерево одного запроса.
+
+    Args:
+        name: Имя операции
+        **attributes: Атрибуты интервала (размеры, идентификаторы, статусы)
+    """
+    if _exporter == EXPORTER_NONE:
+        yield NOOP_SPAN
+        return
+    parent = _current.get()
+    current = Span(name, attributes, parent)
+    if _exporter == EXPORTER_OTEL:
+        _start_otel(current)
+    token = _current.set(current)
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = e
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current.reset(token)
+        _finish_otel(current, error)
+        if parent is not None:
+            parent.children.append(current)
+        else:
+            _export(current)
+
+def bind(func: Callable) -> Callable:
+    """Привязывает функцию к текущему интервалу, чтобы интервалы из пула потоков попадали в трассу запроса."""
+    parent = _current.get()
+    if parent is None:
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+def payload_size(value: Any) -> int:
+    """Возвращает размер данных в символах (для словарей и списков - размер JSON)."""
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):
+        return len(str(value))
@@ -0,0 +1,300 @@
+"""
+Запись и воспроизведение запросов к API HeadHunter и GigaChat.
+
+В режиме record каждый запрос к API HeadHunter (transport.request) и каждый
+вызов GigaChat (llm.chat) сохраняется в файл JSON Lines (сжатый, если имя
+оканчивается на .gz) вместе с длительностью. Персональные данные (ФИО,
+контакты, дата рождения, фото, токены, адреса почты и телефоны в тексте)
+заменяются перед записью. В тексте ответов LLM и аргументах инструментов
+дополнительно заменяются значения этих полей (ФИО, дата рождения), уже
+встреченные в записанных ответах HeadHunter, вместе с падежными формами
+имен (Петров - Петрову, Иван - Ивана).
+
+В режиме replay ответы берутся из файла без обращения к внешним сервисам:
+запрос HeadHunter сопоставляется по методу, пути, параметрам и телу, вызов
+LLM - по месту вызова, сообщениям и параметрам. Промпты, построенные из
+очищенных ответов HeadHunter, не совпадают с записанными, поэтому вызов LLM
+без точного совпадения получает записанный ответ того же места вызова.
+Повторяющиеся запросы получают записанные ответы по кругу. Исходная задержка воспроизводится с
+множителем TRAFFIC_REPLAY_LATENCY (0 - без задержки).
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Pattern, Set
+from urllib.parse import urlsplit
+import requests
+from loguru import logger
+from config import TRAFFIC_MODE, TRAFFIC_FILE, TRAFFIC_REPLAY_LATENCY
+from llm_cache import LLMCache, serialize_response, deserialize_response
+from logging_setup import EMAIL_RE, PHONE_RE, MASK
+
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+KIND_HH = "hh"
+KIND_LLM = "llm"
+
+# Поля ответов HeadHunter с персональными данными и секретами
+SENSITIVE_KEYS = frozenset({
+    "first_name", "last_name", "middle_name", "email", "contact", "birth_date",
+    "photo", "access_token", "refresh_token"
+})
+
+class TrafficMissError(LookupError):
+    """В записанном трафике нет ответа на запрос."""
+
+def _redact_text(text: str) -> str:
+    return PHONE_RE.sub(MASK, EMAIL_RE.sub(MASK, text))
+
+def redact(value: Any, seen: Optional[Set[str]] = None) -> Any:
+    """
+    Заменяет персональные данные в структуре ответа.
+
+    Args:
+        value: Ответ API
+        seen: Множество, в которое добавляются замененные строковые значения
+    """
+    if isinstance(value, dict):
+        redacted = {}
+        for key, item in value.items():
+            if key in SENSITIVE_KEYS:
+                if isinstance(item, str) and seen is not None:
+                    seen.add(item)
+                redacted[key] = MASK if isinstance(item, str) else type(item)() if isinstance(item, (list, dict)) else None
+            else:
+                redacted[key] = redact(item, seen)
+        return redacted
+    if isinstance(value, list):
+        return [redact(item, seen) for item in value]
+    if isinstance(value, str):
+        return _redact_text(value)
+    return value
+
+def _redact_body(text: str, seen: Optional[Set[str]] = None) -> str:
+    try:
+        return json.dumps(redact(json.loads(text), seen), ensure_ascii=False, separators=(",", ":"))
+    except ValueError:
+        return _redact_text(text)
+
+# Окончания, отбрасываемые от имени перед поиском его падежных форм
+NAME_ENDINGS = "аеёиоуыэюяйь"
+# Минимальная длина основы имени и максимальная длина окончания падежной формы
+MIN_STEM_LENGTH = 3
+MAX_ENDING_LENGTH = 3
+
+def _value_regex(value: str) -> str:
+    """Выражение для значения: имя из одного слова совпадает со всеми формами с той же основой."""
+    stem = value.rstrip(NAME_ENDINGS + NAME_ENDINGS.upper())
+    if not value.isalpha() or len(stem) < MIN_STEM_LENGTH:
+        return re.escape(value)
+    return re.escape(stem) + rf"\w{{0,{MAX_ENDING_LENGTH}}}"
+
+def _values_pattern(values: Set[str]) -> Optional[Pattern]:
+    """Регулярное выражение для замены известных значений и их падежных форм целыми словами, более длинные первыми."""
+    values = sorted((value.strip() for value in values if len(value.strip()) > 1), key=len, reverse=True)
+    if not values:
+        return None
+    return re.compile(r"(?<!\w)(?:" + "|".join(_value_regex(value) for value in values) + r")(?!\w)", re.IGNORECASE)
+
+def hh_key(method: str, url: str, params: Any = None, body: Any = None) -> str:
+    """Ключ запроса HeadHunter без базового URL, чтобы запись воспроизводилась с любым HH_API_URL."""
+    key = f"{method.upper()} {urlsplit(url).path}"
+    if params:
+        key += " " + json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    if body is not None:
+        key += " " + hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return key
+
+def llm_key(call_site: str, messages: List[Any], params: Dict[str, Any]) -> str:
+    return LLMCache.make_key(call_site, messages, params)
+
+class ReplayResponse:
+    """Ответ API HeadHunter из записи с интерфейсом requests.Response."""
+    def __init__(self, status_code: int, text: str, content_type: Optional[str], url: str):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode()
+        self.headers = {"Content-Type": content_type} if content_type else {}
+        self.url = url
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+def _serialize_llm(response: Any, known: Optional[Pattern] = None) -> Dict[str, Any]:
+    """
+    Ответ LLM для записи: текст и аргументы инструментов без персональных данных.
+
+    Args:
+        response: Ответ LLM
+        known: Выражение для значений персональных полей из ответов HeadHunter
+    """
+    def clean(text: str) -> str:
+        text = _redact_text(text)
+        return known.sub(MASK, text) if known is not None else text
+
+    data = serialize_response(response)
+    return {
+        **data,
+        "content": clean(data["content"]),
+        "tool_calls": [{**call, "arguments": clean(call["arguments"] or "")} for call in data["tool_calls"]],
+    }
+
+class Traffic:
+    """Запись трафика в файл или воспроизведение из него."""
+    def __init__(self, mode: str = TRAFFIC_MODE, path: str = TRAFFIC_FILE, latency_scale: float = TRAFFIC_REPLAY_LATENCY):
+        if mode not in (MODE_OFF, MODE_RECORD, MODE_REPLAY):
+            logger.warning(f"Неизвестный режим TRAFFIC_MODE={mode}, запись трафика отключена")
+            mode = MODE_OFF
+        self.mode = mode
+        self.path = path
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._file = None
+        self._records: Optional[Dict[str, Deque[Dict[str, Any]]]] = None
+        self._stats = {"recorded": 0, "replayed": 0, "fallbacks": 0, "misses": 0}
+        # Значения персональных полей из записанных ответов HeadHunter
+        self._sensitive: Set[str] = set()
+        self._sensitive_pattern: Optional[Pattern] = None
+
+    def _open(self, mode: str):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = self._open("a")
+                logger.info(f"Запись трафика в {self.path}")
+            self._file.write(line)
+            self._file.flush()
+            self._stats["recorded"] += 1
+
+    def _remember(self, values: Set[str]) -> None:
+        with self._lock:
+            if values - self._sensitive:
+                self._sensitive |= values
+                self._sensitive_pattern = None
+
+    def _known_pattern(self) -> Optional[Pattern]:
+        with self._lock:
+            if self._sensitive_pattern is None and self._sensitive:
+                self._sensitive_pattern = _values_pattern(self._sensitive)
+            return self._sensitive_pattern
+
+    def _load(self) -> Dict[str, Deque[Dict[str, Any]]]:
+        with self._lock:
+            if self._records is None:
+                records: Dict[str, Deque[Dict[str, Any]]] = {}
+                with self._open("r") as f:
+                    for line in f:
+                        if line.strip():
+                            record = json.loads(line)
+                            records.setdefault(f"{record['kind']}:{record['key']}", deque()).append(record)
+                            if record["kind"] == KIND_LLM:
+                                records.setdefault(f"{KIND_LLM}@{record['call_site']}", deque()).append(record)
+                logger.info(f"Загружено {sum(len(items) for items in records.values())} записей трафика из {self.path}")
+                self._records = records
+            return self._records
+
+    def _next(self, kind: str, key: str, fallback: Optional[str] = None) -> Dict[str, Any]:
+        records = self._load()
+        with self._lock:
+            queue = records.get(f"{kind}:{key}")
+            if not queue and fallback:
+                queue = records.get(f"{kind}@{fallback}")
+                if queue:
+                    self._stats["fallbacks"] += 1
+            if not queue:
+                self._stats["misses"] += 1
+                raise TrafficMissError(f"Нет записанного ответа {kind} для {key[:200]}")
+            record = queue.popleft()
+            queue.append(record)
+            self._stats["replayed"] += 1
+        if self.latency_scale > 0:
+            time.sleep(record.get("elapsed", 0) * self.latency_scale)
+        return record
+
+    def hh_request(self, operation_id: str, method: str, url: str, kwargs: Dict[str, Any],
+                   send: Callable[[], Any]) -> Any:
+        """Выполняет запрос HeadHunter через send с учетом режима."""
+        if self.mode == MODE_OFF:
+            return send()
+        key = hh_key(method, url, kwargs.get("params"), kwargs.get("json", kwargs.get("data")))
+        if self.mode == MODE_REPLAY:
+            record = self._next(KIND_HH, key)
+            return ReplayResponse(record["status"], record["body"], record.get("content_type"), url)
+
+        started = time.perf_counter()
+        response = send()
+        elapsed = time.perf_counter() - started
+        seen: Set[str] = set()
+        body = _redact_body(response.text or "", seen)
+        self._remember(seen)
+        self._write({
+            "kind": KIND_HH,
+            "key": key,
+            "operation_id": operation_id,
+            "elapsed": round(elapsed, 4),
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type") if getattr(response, "headers", None) else None,
+            "body": body,
+        })
+        return response
+
+    def llm_chat(self, call_site: str, messages: List[Any], params: Dict[str, Any], send: Callable[[], Any]) -> Any:
+        """Выполняет вызов LLM через send с учетом режима."""
+        if self.mode == MODE_OFF:
+            return send()
+        key = llm_key(call_site, messages, params)
+        if self.mode == MODE_REPLAY:
+            return deserialize_response(self._next(KIND_LLM, key, fallback=call_site)["response"])
+
+        started = time.perf_counter()
+        response = send()
+        elapsed = time.perf_counter() - started
+        self._write({
+            "kind": KIND_LLM,
+            "key": key,
+            "call_site": call_site,
+            "elapsed": round(elapsed, 4),
+            # Промпт содержит резюме, поэтому сохраняется только его размер
+            "messages": len(messages),
+            "prompt_chars": sum(len(str(message.get("content") or "")) for message in messages if isinstance(message, dict)),
+            "response": _serialize_llm(response, self._known_pattern()),
+        })
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": self.mode, "path": self.path, **self._stats}
+
+    def close(self) -> None:
+        if self.mode != MODE_OFF:
+            logger.info(f"Трафик ({self.mode}): {self.stats()}")
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+traffic = Traffic()
+# Закрываем файл при завершении процесса, иначе сжатая запись останется неполной
+atexit.register(traffic.close)